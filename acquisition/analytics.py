@@ -0,0 +1,341 @@
+"""Cohort analytics over acq_funnel_events.
+
+Events are held column-wise in typed arrays with dictionary-encoded
+string columns, so a year of events fits in a few flat buffers and each
+group-by is a single pass over integer codes rather than dict-of-dict
+bookkeeping per row.
+
+Computes per (niche, platform, variant) segment:
+  - contacts entering each stage and the share that got further
+  - median and p90 time-in-stage
+  - drop-off (archived) counts per stage
+"""
+
+import asyncio
+import logging
+from array import array
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterable
+
+import httpx
+
+from .config import PIPELINE_STAGES
+from .db.queries import iter_funnel_events
+
+logger = logging.getLogger(__name__)
+
+# Forward funnel order; "archived" is the drop-off sink, not a step
+FUNNEL_STAGES = [s for s in PIPELINE_STAGES if s != "archived"]
+STAGE_CODES = {stage: i for i, stage in enumerate(PIPELINE_STAGES)}
+ARCHIVED = STAGE_CODES["archived"]
+NO_STAGE = -1
+
+SEGMENT_DIMENSIONS = ("niche_id", "platform", "variant_id")
+EVENT_COLUMNS = "contact_id,from_stage,to_stage,metadata,created_at"
+
+
+class Dictionary:
+    """String ↔ int code mapping for a dictionary-encoded column."""
+
+    def __init__(self):
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class EventFrame:
+    """Column-oriented funnel events.
+
+    Columns are parallel typed arrays: contact/niche/platform/variant are
+    dictionary codes, stages are PIPELINE_STAGES indexes (-1 for unknown
+    stages such as discovery's "none"), ts is epoch seconds.
+    """
+
+    def __init__(self):
+        self.contact = array("q")
+        self.from_stage = array("b")
+        self.to_stage = array("b")
+        self.ts = array("d")
+        self.niche = array("q")
+        self.platform = array("q")
+        self.variant = array("q")
+        self.contacts = Dictionary()
+        self.niches = Dictionary()
+        self.platforms = Dictionary()
+        self.variants = Dictionary()
+        # Code 0 is "unset" for the segment columns
+        for d in (self.niches, self.platforms, self.variants):
+            d.encode("")
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def extend(self, rows: Iterable[dict]):
+        """Append raw acq_funnel_events rows."""
+        for row in rows:
+            meta = row.get("metadata") or {}
+            self.contact.append(self.contacts.encode(str(row["contact_id"])))
+            self.from_stage.append(STAGE_CODES.get(row.get("from_stage"), NO_STAGE))
+            self.to_stage.append(STAGE_CODES.get(row.get("to_stage"), NO_STAGE))
+            self.ts.append(_epoch(row["created_at"]))
+            self.niche.append(self.niches.encode(str(meta.get("niche_id") or "")))
+            self.platform.append(self.platforms.encode(str(meta.get("platform") or "")))
+            self.variant.append(self.variants.encode(str(meta.get("variant_id") or "")))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> "EventFrame":
+        frame = cls()
+        frame.extend(rows)
+        return frame
+
+    def contact_order(self) -> list[int]:
+        """Row indexes sorted by (contact, ts).
+
+        Two stable single-key sorts beat one sort on a tuple key, and the
+        ts sort is skipped for pages that arrived in created_at order.
+        """
+        ts = self.ts
+        if all(a <= b for a, b in zip(ts, islice(ts, 1, None))):
+            order = list(range(len(ts)))
+        else:
+            order = sorted(range(len(ts)), key=ts.__getitem__)
+        order.sort(key=self.contact.__getitem__)
+        return order
+
+    def contact_attributes(self, order: list[int]) -> tuple[array, array, array]:
+        """Per-contact niche/platform/variant codes.
+
+        Events rarely carry every attribute (scoring events have no
+        platform, only outreach carries a variant), so each contact takes
+        the last non-empty value seen across its events.
+        """
+        n = len(self.contacts)
+        niche, platform, variant = _zeros(n), _zeros(n), _zeros(n)
+        for i in order:
+            c = self.contact[i]
+            if self.niche[i]:
+                niche[c] = self.niche[i]
+            if self.platform[i]:
+                platform[c] = self.platform[i]
+            if self.variant[i]:
+                variant[c] = self.variant[i]
+        return niche, platform, variant
+
+
+async def load_event_frame(
+    client: httpx.AsyncClient,
+    since: datetime,
+    until: datetime | None = None,
+) -> EventFrame:
+    """Stream acq_funnel_events for a window into an EventFrame."""
+    frame = EventFrame()
+    async for page in iter_funnel_events(client, since, until, select=EVENT_COLUMNS):
+        frame.extend(page)
+    return frame
+
+
+def compute_cohorts(
+    frame: EventFrame,
+    by: tuple[str, ...] = SEGMENT_DIMENSIONS,
+) -> dict:
+    """Conversion, time-in-stage and drop-off per segment.
+
+    `by` is any subset of SEGMENT_DIMENSIONS; dimensions left out are
+    collapsed. Returns {"overall": stats, "segments": [stats, ...]}.
+    """
+    unknown = set(by) - set(SEGMENT_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown cohort dimensions: {sorted(unknown)}")
+
+    order = frame.contact_order()
+    niche, platform, variant = frame.contact_attributes(order)
+    dims = {
+        "niche_id": (niche, frame.niches),
+        "platform": (platform, frame.platforms),
+        "variant_id": (variant, frame.variants),
+    }
+
+    # Segment code per contact: mixed-radix over the chosen dimensions
+    n_contacts = len(frame.contacts)
+    segment = _zeros(n_contacts)
+    radix = 1
+    for dim in by:
+        codes, dictionary = dims[dim]
+        for c in range(n_contacts):
+            segment[c] += codes[c] * radix
+        radix *= len(dictionary)
+    n_segments = radix
+
+    n_stages = len(PIPELINE_STAGES)
+    # Bit s set once the contact is seen in stage s (either end of an event)
+    entered = _zeros(n_contacts)
+    furthest = array("b", [NO_STAGE]) * n_contacts
+    dropped = _zeros(n_segments * n_stages)
+    dwell: dict[int, list[float]] = {}
+
+    prev_contact = -1
+    prev_stage = NO_STAGE
+    prev_ts = 0.0
+    contact, from_stage, to_stage, ts = frame.contact, frame.from_stage, frame.to_stage, frame.ts
+    for i in order:
+        c = contact[i]
+        to = to_stage[i]
+        if c == prev_contact and prev_stage != NO_STAGE:
+            key = segment[c] * n_stages + prev_stage
+            bucket = dwell.get(key)
+            if bucket is None:
+                bucket = dwell[key] = []
+            bucket.append(ts[i] - prev_ts)
+        src = from_stage[i]
+        if src != NO_STAGE and src != ARCHIVED:
+            entered[c] |= 1 << src
+            if src > furthest[c]:
+                furthest[c] = src
+        if to == ARCHIVED:
+            src = src if src != NO_STAGE else prev_stage
+            if src != NO_STAGE:
+                dropped[segment[c] * n_stages + src] += 1
+        elif to != NO_STAGE:
+            entered[c] |= 1 << to
+            if to > furthest[c]:
+                furthest[c] = to
+        prev_contact, prev_stage, prev_ts = c, to, ts[i]
+
+    # Only stages a contact actually entered count as reached (warmup can
+    # be skipped); it converted from a stage if it got further later.
+    reached = _zeros(n_segments * n_stages)
+    converted = _zeros(n_segments * n_stages)
+    for c in range(n_contacts):
+        mask = entered[c]
+        base = segment[c] * n_stages
+        for s in range(n_stages):
+            if mask >> s & 1:
+                reached[base + s] += 1
+                if furthest[c] > s:
+                    converted[base + s] += 1
+    overall_reached = [0] * n_stages
+    overall_converted = [0] * n_stages
+    for seg in range(n_segments):
+        for s in range(n_stages):
+            overall_reached[s] += reached[seg * n_stages + s]
+            overall_converted[s] += converted[seg * n_stages + s]
+
+    overall_dropped = [0] * n_stages
+    overall_dwell: dict[int, list[float]] = {}
+    for key, values in dwell.items():
+        overall_dwell.setdefault(key % n_stages, []).extend(values)
+    for seg in range(n_segments):
+        for s in range(n_stages):
+            overall_dropped[s] += dropped[seg * n_stages + s]
+
+    segments = []
+    for seg in range(n_segments):
+        base = seg * n_stages
+        if not any(reached[base:base + n_stages]):
+            continue
+        labels = {}
+        rem = seg
+        for dim in by:
+            codes, dictionary = dims[dim]
+            labels[dim] = dictionary.values[rem % len(dictionary)] or None
+            rem //= len(dictionary)
+        segments.append({
+            **labels,
+            **_stage_stats(
+                reached[base:base + n_stages],
+                converted[base:base + n_stages],
+                dropped[base:base + n_stages],
+                {s: dwell.get(base + s, []) for s in range(n_stages)},
+            ),
+        })
+    segments.sort(key=lambda s: s["contacts"], reverse=True)
+
+    return {
+        "events": len(frame),
+        "contacts": n_contacts,
+        "dimensions": list(by),
+        "overall": _stage_stats(
+            overall_reached, overall_converted, overall_dropped, overall_dwell
+        ),
+        "segments": segments,
+    }
+
+
+async def get_cohort_report(
+    client: httpx.AsyncClient,
+    since: datetime,
+    until: datetime | None = None,
+    *,
+    by: tuple[str, ...] = SEGMENT_DIMENSIONS,
+    snapshot=None,
+) -> dict:
+    """Load events for a window and compute cohorts over them.
+
+    With a LocalSnapshot, events are read from its files instead of Supabase.
+    """
+    if snapshot is not None:
+        frame = await asyncio.to_thread(snapshot.event_frame, since, until)
+    else:
+        frame = await load_event_frame(client, since, until)
+    # Seconds of CPU per million events: keep it off the event loop
+    report = await asyncio.to_thread(compute_cohorts, frame, by)
+    report["since"] = since.isoformat()
+    report["until"] = (until or datetime.now(timezone.utc)).isoformat()
+    return report
+
+
+def _stage_stats(reached, converted, dropped, dwell: dict[int, list[float]]) -> dict:
+    stages = {}
+    for i, stage in enumerate(FUNNEL_STAGES):
+        s = STAGE_CODES[stage]
+        last = i + 1 == len(FUNNEL_STAGES)
+        durations = sorted(dwell.get(s, []))
+        stages[stage] = {
+            "reached": reached[s],
+            "converted": None if last else converted[s],
+            "conversion_rate": (
+                round(converted[s] / reached[s], 4) if not last and reached[s] else None
+            ),
+            "dropped": dropped[s],
+            "median_hours": _hours(_quantile(durations, 0.5)),
+            "p90_hours": _hours(_quantile(durations, 0.9)),
+        }
+    return {"contacts": max(reached), "stages": stages}
+
+
+def _zeros(n: int) -> array:
+    return array("q", bytes(8 * n))
+
+
+def _quantile(sorted_values: list[float], q: float) -> float | None:
+    """Linear-interpolated quantile of an already sorted list."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _hours(seconds: float | None) -> float | None:
+    return round(seconds / 3600, 2) if seconds is not None else None
+
+
+def _epoch(value: str | datetime) -> float:
+    if isinstance(value, datetime):
+        ts = value
+    else:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
@@ -0,0 +1,121 @@
+"""Response caching with ETags for polled read endpoints.
+
+Dashboards poll a few read endpoints from many tabs at once. cached_json
+serves a route's JSON body from a short-lived cache (concurrent misses
+share one computation) and tags it with an ETag, so a client sending
+If-None-Match gets an empty 304 while the body is unchanged.
+
+Entries tagged "pipeline" are dropped whenever agents change contact
+stages (see transitions.add_pipeline_listener), so dashboards see a
+transition right away rather than after the TTL.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+PIPELINE_TAG = "pipeline"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    expires_at: float
+    tags: frozenset[str]
+
+
+class ResponseCache:
+    """JSON bodies keyed by request path and query, with a per-entry TTL."""
+
+    def __init__(self):
+        self._entries: dict[str, CachedResponse] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        *,
+        ttl: float,
+        tags: tuple[str, ...] = (),
+    ) -> CachedResponse:
+        entry = self._fresh(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            entry = self._fresh(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generation
+            body = _encode(await compute())
+            entry = CachedResponse(
+                body=body,
+                etag=f'"{hashlib.sha1(body).hexdigest()}"',
+                expires_at=time.monotonic() + ttl,
+                tags=frozenset(tags),
+            )
+            # Computed from data an invalidation has since made stale
+            if ttl > 0 and generation == self._generation:
+                self._entries[key] = entry
+            return entry
+
+    def invalidate(self, tag: str | None = None):
+        """Drop entries carrying `tag`, or every entry."""
+        self._generation += 1
+        if tag is None:
+            self._entries.clear()
+            return
+        for key in [k for k, e in self._entries.items() if tag in e.tags]:
+            del self._entries[key]
+
+    def invalidate_pipeline(self):
+        self.invalidate(PIPELINE_TAG)
+
+    def metrics(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _fresh(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            return entry
+        return None
+
+
+async def cached_json(
+    request: Request,
+    compute: Callable[[], Awaitable[Any]],
+    *,
+    ttl: float,
+    tags: tuple[str, ...] = (),
+) -> Response:
+    """Respond with compute()'s JSON, cached for ttl seconds, honouring If-None-Match."""
+    key = f"{request.url.path}?{request.url.query}"
+    entry = await request.app.state.response_cache.get(key, compute, ttl=ttl, tags=tags)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(jsonable_encoder(value), separators=(",", ":")).encode()
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
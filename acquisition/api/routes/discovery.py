@@ -3,17 +3,20 @@
 from fastapi import APIRouter, Request
 
 from ...discovery_agent import run_discovery
-from ...db.queries import get_active_niches
+from ...reentry_agent import sweep_reentries
+from ...niche_cache import get_niche_cache
 from ..schemas import DiscoveryRunRequest, DiscoveryRunResponse
+from .jobs import submit_job
+from .orchestrator import run_guarded
 
 router = APIRouter()
 
 
 @router.post("/run", response_model=DiscoveryRunResponse)
-async def trigger_discovery(req: DiscoveryRunRequest, request: Request):
+async def trigger_discovery(req: DiscoveryRunRequest, request: Request, background: bool = False):
     client = request.app.state.http_client
-    niches = await get_active_niches(client)
-    niche = next((n for n in niches if n["niche_id"] == req.niche_id), None)
+    niches = await get_niche_cache(client)
+    niche = niches.get(req.niche_id)
     if not niche:
         return DiscoveryRunResponse(
             niche_id=req.niche_id,
@@ -25,9 +28,24 @@ async def trigger_discovery(req: DiscoveryRunRequest, request: Request):
             errors=[f"Niche {req.niche_id} not found"],
         )
 
-    result = await run_discovery(
-        client, niche, req.platform,
-        max_results=req.max_results,
-        dry_run=req.dry_run,
+    async def work(progress=None) -> dict:
+        result = await run_discovery(
+            client, niche.row, req.platform,
+            matcher=niche.matcher,
+            max_results=req.max_results,
+            dry_run=req.dry_run,
+        )
+        return DiscoveryRunResponse(**result).model_dump()
+
+    if background:
+        return submit_job(request, "discovery", work, req.model_dump())
+    return await work()
+
+
+@router.post("/reentry")
+async def trigger_reentry(request: Request, max_contacts: int = 5000, dry_run: bool = False):
+    client = request.app.state.http_client
+    return await run_guarded(
+        request, "reentry", dry_run,
+        lambda: sweep_reentries(client, max_contacts=max_contacts, dry_run=dry_run),
     )
-    return DiscoveryRunResponse(**result)
@@ -0,0 +1,86 @@
+"""Background job API routes."""
+
+import json
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+
+router = APIRouter()
+
+# Seconds between SSE keep-alive comments while a job is quiet
+SSE_KEEPALIVE = 15.0
+
+
+def submit_job(request: Request, kind: str, work, params: dict | None = None) -> JSONResponse:
+    """Start `work` as a background job and return 202 with its id.
+
+    `work` is an async callable taking a progress callback.
+    """
+    job = request.app.state.jobs.submit(kind, work, params)
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.id, "kind": kind, "status": job.status, "url": f"/api/jobs/{job.id}"},
+    )
+
+
+def _get_job(request: Request, job_id: str):
+    job = request.app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("")
+async def list_jobs(request: Request, kind: str | None = None):
+    return jsonable_encoder(
+        [j.summary(include_events=False) for j in request.app.state.jobs.recent(kind=kind)]
+    )
+
+
+@router.get("/{job_id}")
+async def get_job(request: Request, job_id: str):
+    return jsonable_encoder(_get_job(request, job_id).summary())
+
+
+@router.delete("/{job_id}")
+async def cancel_job(request: Request, job_id: str):
+    _get_job(request, job_id)
+    return {"cancelled": request.app.state.jobs.cancel(job_id)}
+
+
+@router.get("/{job_id}/events")
+async def job_events(request: Request, job_id: str, after: int = -1):
+    """Server-sent events: each job event as it happens, from seq > after.
+
+    The stream ends after the job's final status event.
+    """
+    job = _get_job(request, job_id)
+
+    async def stream():
+        sent = after + 1
+        while True:
+            while sent < len(job.events):
+                event = job.events[sent]
+                name = "phase" if "phase" in event else "status"
+                data = json.dumps(jsonable_encoder(event))
+                yield f"id: {event['seq']}\nevent: {name}\ndata: {data}\n\n"
+                sent += 1
+            if job.done and sent >= len(job.events):
+                return
+            # Read before awaiting: an event emitted during the disconnect
+            # check would otherwise be slept through
+            before = len(job.events)
+            if await request.is_disconnected():
+                return
+            if len(job.events) > before or job.done:
+                continue
+            await job.wait(SSE_KEEPALIVE)
+            if len(job.events) == before and not job.done:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
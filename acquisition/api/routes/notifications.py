@@ -0,0 +1,10 @@
+"""Notification API routes."""
+
+from fastapi import APIRouter, Request
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def outbox_metrics(request: Request):
+    return request.app.state.outbox.metrics()
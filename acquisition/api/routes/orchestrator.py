@@ -1,46 +1,88 @@
 """Orchestrator API routes."""
 
 import asyncio
+from typing import Any, Awaitable, Callable
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
 
+from ...config import RESPONSE_CACHE_TTL
 from ...orchestrator import AcquisitionOrchestrator
+from ...single_flight import RunLockedError, get_single_flight, phase_key
+from ..response_cache import cached_json
 from ..schemas import OrchestratorStatus
+from .jobs import submit_job
 
 router = APIRouter()
 
 _orchestrator: AcquisitionOrchestrator | None = None
 
+# Response cache tag for /status, dropped on start/stop
+STATUS_TAG = "orchestrator_status"
+
+
+async def run_guarded(
+    request: Request,
+    phase: str,
+    dry_run: bool,
+    fn: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Run a phase single-flight, attaching to a run already in flight.
+
+    409 if the phase is running in another process.
+    """
+    try:
+        return await get_single_flight().run(
+            phase_key(phase, dry_run), fn, client=request.app.state.http_client
+        )
+    except RunLockedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 
 @router.post("/start")
-async def start_orchestrator(request: Request, dry_run: bool = False, interval: int = 3600):
+async def start_orchestrator(
+    request: Request,
+    dry_run: bool = False,
+    interval: int = 3600,
+    pacing: bool = True,
+):
     global _orchestrator
     if _orchestrator and _orchestrator.running:
         return {"status": "already_running"}
 
-    _orchestrator = AcquisitionOrchestrator(dry_run=dry_run, cycle_interval=interval)
+    _orchestrator = AcquisitionOrchestrator(
+        dry_run=dry_run, cycle_interval=interval, pacing=pacing
+    )
     asyncio.create_task(_orchestrator.start())
-    return {"status": "started", "dry_run": dry_run, "interval": interval}
+    request.app.state.response_cache.invalidate(STATUS_TAG)
+    return {"status": "started", "dry_run": dry_run, "interval": interval, "pacing": pacing}
 
 
 @router.post("/stop")
-async def stop_orchestrator():
+async def stop_orchestrator(request: Request):
     global _orchestrator
     if _orchestrator and _orchestrator.running:
         await _orchestrator.stop()
+        request.app.state.response_cache.invalidate(STATUS_TAG)
         return {"status": "stopped"}
     return {"status": "not_running"}
 
 
 @router.get("/status", response_model=OrchestratorStatus)
-async def get_status():
-    if _orchestrator and _orchestrator.running:
-        return OrchestratorStatus(running=True)
-    return OrchestratorStatus(running=False)
+async def get_status(request: Request):
+    async def compute():
+        in_flight = get_single_flight().running()
+        if _orchestrator and _orchestrator.running:
+            return OrchestratorStatus(running=True, in_flight=in_flight)
+        return OrchestratorStatus(running=False, in_flight=in_flight)
+
+    return await cached_json(request, compute, ttl=RESPONSE_CACHE_TTL, tags=(STATUS_TAG,))
 
 
 @router.post("/cycle")
-async def run_single_cycle(request: Request, dry_run: bool = False):
-    orch = AcquisitionOrchestrator(dry_run=dry_run)
+async def run_single_cycle(request: Request, dry_run: bool = False, background: bool = False):
+    # One-off cycles send right away, like --once
+    orch = AcquisitionOrchestrator(dry_run=dry_run, pacing=False)
     orch._client = request.app.state.http_client
+    if background:
+        return submit_job(request, "cycle", orch.run_cycle, {"dry_run": dry_run})
     return await orch.run_cycle()
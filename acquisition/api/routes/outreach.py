@@ -4,23 +4,43 @@ from fastapi import APIRouter, Request
 
 from ...outreach_agent import run_outreach
 from ...followup_agent import check_replies, send_followups
+from .jobs import submit_job
+from .orchestrator import run_guarded
 
 router = APIRouter()
 
 
 @router.post("/send")
-async def trigger_outreach(request: Request, dry_run: bool = False, batch_size: int = 10):
+async def trigger_outreach(
+    request: Request,
+    dry_run: bool = False,
+    batch_size: int = 10,
+    background: bool = False,
+):
     client = request.app.state.http_client
-    return await run_outreach(client, batch_size=batch_size, dry_run=dry_run)
+
+    def send(progress=None):
+        return run_guarded(
+            request, "outreach", dry_run,
+            lambda: run_outreach(client, batch_size=batch_size, dry_run=dry_run),
+        )
+
+    if background:
+        return submit_job(request, "outreach", send, {"dry_run": dry_run, "batch_size": batch_size})
+    return await send()
 
 
 @router.post("/check-replies")
 async def trigger_check_replies(request: Request, dry_run: bool = False):
     client = request.app.state.http_client
-    return await check_replies(client, dry_run=dry_run)
+    return await run_guarded(
+        request, "replies", dry_run, lambda: check_replies(client, dry_run=dry_run)
+    )
 
 
 @router.post("/followups")
 async def trigger_followups(request: Request, dry_run: bool = False):
     client = request.app.state.http_client
-    return await send_followups(client, dry_run=dry_run)
+    return await run_guarded(
+        request, "followups", dry_run, lambda: send_followups(client, dry_run=dry_run)
+    )
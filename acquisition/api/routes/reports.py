@@ -1,8 +1,20 @@
 """Reporting API routes."""
 
-from fastapi import APIRouter, Request
+from datetime import datetime, timedelta, timezone
+from typing import Literal
 
-from ...reporting_agent import generate_weekly_report, get_funnel_snapshot
+from fastapi import APIRouter, HTTPException, Request
+
+from ...analytics import get_cohort_report
+from ...config import FUNNEL_CACHE_TTL
+from ...reporting_agent import (
+    generate_weekly_report,
+    get_funnel_activity,
+    get_funnel_snapshot,
+)
+from ...snapshot import open_snapshot
+from ..response_cache import PIPELINE_TAG, cached_json
+from .jobs import submit_job
 
 router = APIRouter()
 
@@ -10,10 +22,60 @@ router = APIRouter()
 @router.get("/funnel")
 async def funnel_snapshot(request: Request):
     client = request.app.state.http_client
-    return await get_funnel_snapshot(client)
+    return await cached_json(
+        request,
+        lambda: get_funnel_snapshot(client, max_age=FUNNEL_CACHE_TTL),
+        ttl=FUNNEL_CACHE_TTL,
+        tags=(PIPELINE_TAG,),
+    )
 
 
 @router.post("/weekly")
-async def trigger_weekly_report(request: Request, dry_run: bool = False):
+async def trigger_weekly_report(request: Request, dry_run: bool = False, background: bool = False):
     client = request.app.state.http_client
+    if background:
+        return submit_job(
+            request, "weekly_report",
+            lambda progress: generate_weekly_report(client, dry_run=dry_run),
+            {"dry_run": dry_run},
+        )
     return await generate_weekly_report(client, dry_run=dry_run)
+
+
+@router.get("/activity")
+async def funnel_activity(
+    request: Request,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    group_by: str = "platform,to_stage",
+    granularity: Literal["hour", "day"] | None = None,
+):
+    client = request.app.state.http_client
+    since = since or datetime.now(timezone.utc) - timedelta(days=7)
+    try:
+        return await get_funnel_activity(
+            client, since, until,
+            group_by=tuple(g.strip() for g in group_by.split(",") if g.strip()),
+            granularity=granularity,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/cohorts")
+async def cohort_report(
+    request: Request,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    by: str = "niche_id,platform,variant_id",
+):
+    client = request.app.state.http_client
+    since = since or datetime.now(timezone.utc) - timedelta(days=28)
+    try:
+        return await get_cohort_report(
+            client, since, until,
+            by=tuple(d.strip() for d in by.split(",") if d.strip()),
+            snapshot=open_snapshot(),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -2,7 +2,9 @@
 
 from fastapi import APIRouter, Request
 
+from ...content_scanner import scan_content
 from ...warmup_agent import execute_warmups, schedule_warmups
+from .orchestrator import run_guarded
 
 router = APIRouter()
 
@@ -10,10 +12,23 @@ router = APIRouter()
 @router.post("/schedule")
 async def trigger_schedule(request: Request, dry_run: bool = False):
     client = request.app.state.http_client
-    return await schedule_warmups(client, dry_run=dry_run)
+    return await run_guarded(
+        request, "warmup_schedule", dry_run, lambda: schedule_warmups(client, dry_run=dry_run)
+    )
+
+
+@router.post("/scan")
+async def trigger_scan(request: Request, lookahead_hours: float | None = None, dry_run: bool = False):
+    client = request.app.state.http_client
+    kwargs = {} if lookahead_hours is None else {"lookahead_hours": lookahead_hours}
+    return await run_guarded(
+        request, "content_scan", dry_run, lambda: scan_content(client, dry_run=dry_run, **kwargs)
+    )
 
 
 @router.post("/execute")
 async def trigger_execute(request: Request, dry_run: bool = False):
     client = request.app.state.http_client
-    return await execute_warmups(client, dry_run=dry_run)
+    return await run_guarded(
+        request, "warmup_execute", dry_run, lambda: execute_warmups(client, dry_run=dry_run)
+    )
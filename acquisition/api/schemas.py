@@ -103,6 +103,7 @@ class OrchestratorStatus(BaseModel):
     next_run: Optional[datetime] = None
     active_niches: int = 0
     contacts_in_pipeline: dict = Field(default_factory=dict)
+    in_flight: list[str] = Field(default_factory=list)
 
 
 class HealthResponse(BaseModel):
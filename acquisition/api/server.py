@@ -3,10 +3,16 @@
 import time
 from contextlib import asynccontextmanager
 
-import httpx
 from fastapi import FastAPI
 
-from .routes import discovery, warmup, outreach, orchestrator, reports
+from ..config import JOB_MAX_CONCURRENT, JOB_RETAIN, NOTIFY_DIGEST_SECONDS
+from ..http_client import create_http_client
+from ..jobs import JobManager
+from ..notification_outbox import NotificationOutbox, install_outbox
+from ..transitions import add_pipeline_listener, remove_pipeline_listener
+from ..worker_pool import get_worker_pool
+from .response_cache import ResponseCache
+from .routes import discovery, warmup, outreach, orchestrator, reports, notifications, jobs
 from .schemas import HealthResponse
 
 START_TIME = time.time()
@@ -14,8 +20,21 @@ START_TIME = time.time()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.http_client = httpx.AsyncClient(timeout=60.0)
+    app.state.http_client = create_http_client()
+    app.state.outbox = NotificationOutbox(
+        app.state.http_client, digest_window=NOTIFY_DIGEST_SECONDS
+    )
+    app.state.outbox.start()
+    install_outbox(app.state.outbox)
+    app.state.jobs = JobManager(max_concurrent=JOB_MAX_CONCURRENT, retain=JOB_RETAIN)
+    app.state.response_cache = ResponseCache()
+    add_pipeline_listener(app.state.response_cache.invalidate_pipeline)
     yield
+    remove_pipeline_listener(app.state.response_cache.invalidate_pipeline)
+    await app.state.jobs.shutdown()
+    await get_worker_pool().close()
+    install_outbox(None)
+    await app.state.outbox.stop()
     await app.state.http_client.aclose()
 
 
@@ -30,6 +49,8 @@ app.include_router(warmup.router, prefix="/api/warmup", tags=["warmup"])
 app.include_router(outreach.router, prefix="/api/outreach", tags=["outreach"])
 app.include_router(orchestrator.router, prefix="/api/orchestrator", tags=["orchestrator"])
 app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
+app.include_router(notifications.router, prefix="/api/notifications", tags=["notifications"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 
 @app.get("/api/health", response_model=HealthResponse)
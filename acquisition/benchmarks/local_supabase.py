@@ -0,0 +1,690 @@
+"""In-memory PostgREST stand-in for offline benchmarks and load tests.
+
+LocalSupabase is an ASGI app serving /rest/v1/<table> and
+/rest/v1/rpc/<function> with the subset of PostgREST the acquisition
+package uses:
+
+  filters   eq, neq, gt, gte, lt, lte, in, is, not.<op>, and=(...), or=(...)
+  shaping   select (column lists), order (asc/desc, nulls last/first),
+            limit, offset, max-rows, Prefer: count=exact
+  writes    single and array POST, Prefer: resolution=merge-duplicates
+            with on_conflict, PATCH/DELETE by filter, return=minimal
+  RPCs      the acq_* functions from db/migrations, implemented in Python
+
+Every request can be delayed by a fixed latency plus uniform jitter, so
+request-count changes show up as wall-time changes. Counters in `stats`
+record requests per route.
+
+Select it for the whole package with ACQ_SUPABASE_BACKEND=local (see
+http_client.create_http_client), or mount it on a client directly:
+
+    db = LocalSupabase(latency_ms=20)
+    client = httpx.AsyncClient(mounts={SUPABASE_URL: httpx.ASGITransport(app=db)})
+"""
+
+import asyncio
+import json
+import random
+import re
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable
+from urllib.parse import parse_qsl
+
+from ..config import LOCAL_SUPABASE_JITTER_MS, LOCAL_SUPABASE_LATENCY_MS, PIPELINE_STAGES
+
+POSTGREST_MAX_ROWS = 1000
+
+# Column defaults applied on insert (from db/migrations)
+TABLE_DEFAULTS: dict[str, dict[str, Any]] = {
+    "crm_contacts": {
+        "pipeline_stage": "new", "archived_at": None, "icp_score": None,
+        "niche_id": None, "warmup_comments_sent": 0, "metadata": {},
+    },
+    "acq_niche_configs": {
+        "platforms": [], "keywords": [], "icp_criteria": {},
+        "daily_discovery_limit": 50, "daily_dm_limit": 10,
+        "warmup_comments_before_dm": 3, "warmup_interval_hours": 24, "enabled": True,
+    },
+    "acq_warmup_schedules": {
+        "comment_text": None, "sent_at": None, "status": "pending",
+        "error": None, "attempt_count": 0,
+    },
+    "acq_outreach_sequences": {
+        "sequence_step": 1, "message_text": None, "variant_id": None,
+        "scheduled_at": None, "sent_at": None, "status": "pending",
+        "reply_detected_at": None, "error": None,
+    },
+    "acq_daily_caps": {"current_count": 0},
+    "acq_message_variants": {
+        "sequence_step": 1, "times_sent": 0, "times_replied": 0, "active": True,
+    },
+    "acq_funnel_events": {"triggered_by": "automation", "metadata": {}},
+    "acq_human_notifications": {"contact_id": None, "subject": None, "acknowledged_at": None},
+}
+
+# Timestamp columns set to now() on insert
+TIMESTAMP_DEFAULTS: dict[str, tuple[str, ...]] = {
+    "crm_contacts": ("created_at", "updated_at"),
+    "acq_niche_configs": ("created_at", "updated_at"),
+    "acq_discovery_runs": ("started_at",),
+    "acq_human_notifications": ("sent_at",),
+    "acq_daily_caps": ("created_at", "updated_at"),
+    "acq_message_variants": ("created_at", "updated_at"),
+}
+
+# UNIQUE constraints besides the id primary key
+UNIQUE_KEYS: dict[str, tuple[str, ...]] = {
+    "acq_niche_configs": ("niche_id",),
+    "acq_daily_caps": ("platform", "action", "cap_date"),
+}
+
+# Columns with an equality index, used to narrow eq/in filters
+INDEXED_COLUMNS: dict[str, tuple[str, ...]] = {
+    "crm_contacts": ("pipeline_stage", "platform_id"),
+    "acq_warmup_schedules": ("status", "contact_id"),
+    "acq_outreach_sequences": ("status", "contact_id"),
+}
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+_TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+class PostgRESTError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+class Table:
+    """Rows keyed by id, with equality indexes on a few columns."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows: dict[str, dict] = {}
+        self.indexed = INDEXED_COLUMNS.get(name, ())
+        self._index: dict[str, dict[Any, dict[str, dict]]] = {c: {} for c in self.indexed}
+
+    def insert(self, row: dict):
+        self.rows[row["id"]] = row
+        for column in self.indexed:
+            self._index[column].setdefault(_key(row.get(column)), {})[row["id"]] = row
+
+    def update(self, row: dict, changes: dict):
+        for column in self.indexed:
+            if column in changes and changes[column] != row.get(column):
+                self._index[column].get(_key(row.get(column)), {}).pop(row["id"], None)
+                self._index[column].setdefault(_key(changes[column]), {})[row["id"]] = row
+        row.update(changes)
+
+    def delete(self, row: dict):
+        self.rows.pop(row["id"], None)
+        for column in self.indexed:
+            self._index[column].get(_key(row.get(column)), {}).pop(row["id"], None)
+
+    def candidates(self, filters: list[tuple[str, str, bool, str]]) -> list[dict]:
+        """Rows that could match: the narrowest id/index lookup, else all."""
+        best: list[dict] | None = None
+        for column, op, negate, value in filters:
+            if negate or op not in ("eq", "in"):
+                continue
+            values = [value] if op == "eq" else _in_values(value)
+            if column == "id":
+                found = [self.rows[v] for v in values if v in self.rows]
+            elif column in self._index:
+                found = [r for v in values for r in self._index[column].get(v, {}).values()]
+            else:
+                continue
+            if best is None or len(found) < len(best):
+                best = found
+        return list(self.rows.values()) if best is None else best
+
+
+class LocalSupabase:
+    """ASGI PostgREST stand-in holding every table in memory."""
+
+    def __init__(
+        self,
+        *,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        max_rows: int = POSTGREST_MAX_ROWS,
+        seed: int | None = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.max_rows = max_rows
+        self.tables: dict[str, Table] = {}
+        self.stats: Counter = Counter()
+        self._rng = random.Random(seed)
+        self.rpcs: dict[str, Callable[..., Any]] = {
+            "acq_funnel_stage_counts": self._rpc_funnel_stage_counts,
+            "acq_platform_breakdown": self._rpc_platform_breakdown,
+            "acq_funnel_rollups": self._rpc_funnel_rollups,
+            "acq_bulk_transition": self._rpc_bulk_transition,
+            "acq_transition_contact": self._rpc_transition_contact,
+            "acq_seed_contact": self._rpc_seed_contact,
+            "acq_record_warmup_sent": self._rpc_record_warmup_sent,
+            "acq_exhausted_warming_contacts": self._rpc_exhausted_warming_contacts,
+            "acq_increment_cap": self._rpc_increment_cap,
+            "acq_try_run_lock": self._rpc_try_run_lock,
+            "acq_release_run_lock": self._rpc_release_run_lock,
+        }
+
+    # --- data access for benchmarks ---
+
+    def table(self, name: str) -> Table:
+        if name not in self.tables:
+            self.tables[name] = Table(name)
+        return self.tables[name]
+
+    def load(self, table: str, rows: list[dict]) -> list[dict]:
+        """Insert rows directly, applying column defaults."""
+        return [self._insert(table, dict(row)) for row in rows]
+
+    def rows(self, table: str) -> list[dict]:
+        return list(self.table(table).rows.values())
+
+    @property
+    def requests(self) -> int:
+        return self.stats["requests"]
+
+    # --- ASGI ---
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        headers = {k.decode().lower(): v.decode() for k, v in scope["headers"]}
+        params = parse_qsl(scope.get("query_string", b"").decode(), keep_blank_values=True)
+        delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        status, payload, extra = 404, None, {}
+        try:
+            status, payload, extra = self.handle(
+                scope["method"], scope["path"], params, headers,
+                json.loads(body) if body else None,
+            )
+        except PostgRESTError as e:
+            status, payload = e.status, {"code": e.code, "message": str(e)}
+
+        content = b"" if payload is None else json.dumps(payload, default=str).encode()
+        response_headers = [(b"content-type", b"application/json")]
+        response_headers += [(k.encode(), v.encode()) for k, v in extra.items()]
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": content})
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        params: list[tuple[str, str]],
+        headers: dict[str, str],
+        body: Any,
+    ) -> tuple[int, Any, dict[str, str]]:
+        """Serve one request. Returns (status, json payload, extra headers)."""
+        self.stats["requests"] += 1
+        parts = path.strip("/").split("/")
+        if parts[:2] != ["rest", "v1"] or len(parts) < 3:
+            raise PostgRESTError(404, "PGRST000", f"Unknown path {path}")
+
+        if parts[2] == "rpc":
+            name = parts[3] if len(parts) > 3 else ""
+            self.stats[f"RPC {name}"] += 1
+            if name not in self.rpcs:
+                raise PostgRESTError(404, "PGRST202", f"Could not find the function {name}")
+            result = self.rpcs[name](**(body or {}))
+            return 200, result, {}
+
+        table = parts[2]
+        self.stats[f"{method} {table}"] += 1
+        prefer = headers.get("prefer", "")
+        if method == "GET":
+            return self._select(table, params, prefer)
+        if method == "POST":
+            return self._post(table, params, prefer, body)
+        if method == "PATCH":
+            return self._patch(table, params, prefer, body or {})
+        if method == "DELETE":
+            return self._delete(table, params, prefer)
+        raise PostgRESTError(405, "PGRST000", f"Method {method} not supported")
+
+    # --- tables ---
+
+    def _select(self, table: str, params, prefer: str):
+        options = dict(p for p in params if p[0] in RESERVED_PARAMS)
+        rows = self._filter(table, params)
+        if "order" in options:
+            rows = _order(rows, options["order"])
+        total = len(rows)
+        offset = int(options.get("offset", 0))
+        limit = min(int(options.get("limit", self.max_rows)), self.max_rows)
+        page = rows[offset:offset + limit]
+        self.stats["rows_returned"] += len(page)
+
+        extra = {}
+        if "count=exact" in prefer:
+            span = f"{offset}-{offset + len(page) - 1}" if page else "*"
+            extra["content-range"] = f"{span}/{total}"
+        return 200, _project(page, options.get("select", "*")), extra
+
+    def _post(self, table: str, params, prefer: str, body):
+        options = dict(p for p in params if p[0] in RESERVED_PARAMS)
+        rows = body if isinstance(body, list) else [body]
+        merge = "resolution=merge-duplicates" in prefer
+        conflict = tuple(options["on_conflict"].split(",")) if "on_conflict" in options else ("id",)
+
+        written = []
+        for row in rows:
+            existing = self._find_unique(table, conflict, row) if merge else None
+            if existing is not None:
+                self._update(table, existing, row)
+                written.append(existing)
+            else:
+                written.append(self._insert(table, dict(row)))
+        if "return=minimal" in prefer:
+            return 201, None, {}
+        return 201, _project(written, options.get("select", "*")), {}
+
+    def _patch(self, table: str, params, prefer: str, changes: dict):
+        rows = self._filter(table, params)
+        for row in rows:
+            self._update(table, row, changes)
+        if "return=minimal" in prefer:
+            return 204, None, {}
+        return 200, [dict(r) for r in rows], {}
+
+    def _delete(self, table: str, params, prefer: str):
+        rows = self._filter(table, params)
+        for row in rows:
+            self.table(table).delete(row)
+        if "return=minimal" in prefer:
+            return 204, None, {}
+        return 200, [dict(r) for r in rows], {}
+
+    def _filter(self, table: str, params) -> list[dict]:
+        simple = []
+        predicates = []
+        for key, value in params:
+            if key in RESERVED_PARAMS:
+                continue
+            if key in ("and", "or", "not.and", "not.or"):
+                predicates.append(_parse_logic(key, value))
+            else:
+                column, op, negate, literal = _parse_filter(key, value)
+                simple.append((column, op, negate, literal))
+                predicates.append(_predicate(column, op, negate, literal))
+        rows = self.table(table).candidates(simple)
+        return [r for r in rows if all(p(r) for p in predicates)]
+
+    def _insert(self, table: str, row: dict) -> dict:
+        now = _now()
+        full = {"id": str(uuid.uuid4()), "created_at": now}
+        full.update({k: _copy(v) for k, v in TABLE_DEFAULTS.get(table, {}).items()})
+        full.update({column: now for column in TIMESTAMP_DEFAULTS.get(table, ())})
+        full.update(row)
+        full["id"] = str(full["id"])
+        unique = UNIQUE_KEYS.get(table)
+        if full["id"] in self.table(table).rows or (
+            unique and self._find_unique(table, unique, full) is not None
+        ):
+            raise PostgRESTError(409, "23505", f"duplicate key value violates unique constraint on {table}")
+        self.table(table).insert(full)
+        return full
+
+    def _update(self, table: str, row: dict, changes: dict):
+        changes = {k: v for k, v in changes.items() if k != "id"}
+        if table == "acq_niche_configs":
+            # trg_acq_niche_configs_touch (migration 010)
+            changes["updated_at"] = _now()
+        self.table(table).update(row, changes)
+
+    def _find_unique(self, table: str, columns: tuple[str, ...], row: dict) -> dict | None:
+        if any(c not in row for c in columns):
+            return None
+        if columns == ("id",):
+            return self.table(table).rows.get(str(row["id"]))
+        values = tuple(_key(row[c]) for c in columns)
+        for existing in self.table(table).rows.values():
+            if tuple(_key(existing.get(c)) for c in columns) == values:
+                return existing
+        return None
+
+    # --- RPCs (db/migrations) ---
+
+    def _rpc_funnel_stage_counts(self):
+        counts = Counter(r["pipeline_stage"] for r in self.rows("crm_contacts"))
+        return [{"pipeline_stage": s, "count": n} for s, n in counts.items()]
+
+    def _events_between(self, since: str, until: str | None) -> list[dict]:
+        lo, hi = _ts(since), _ts(until) if until else None
+        return [
+            e for e in self.rows("acq_funnel_events")
+            if _ts(e["created_at"]) >= lo and (hi is None or _ts(e["created_at"]) < hi)
+        ]
+
+    def _rpc_platform_breakdown(self, since: str, until: str | None = None):
+        counts = Counter(
+            ((e.get("metadata") or {}).get("platform", "unknown"), e["to_stage"])
+            for e in self._events_between(since, until)
+        )
+        return [{"platform": p, "to_stage": s, "count": n} for (p, s), n in counts.items()]
+
+    def _rpc_funnel_rollups(self, since: str, until: str | None = None, granularity: str | None = None):
+        lo, hi = _ts(since), _ts(until) if until else None
+        if granularity is None:
+            whole_days = lo == _truncate(lo, "day") and (hi is None or hi == _truncate(hi, "day"))
+            granularity = "day" if whole_days else "hour"
+        contacts = self.table("crm_contacts").rows
+        counts: Counter = Counter()
+        for e in self._events_between(_truncate(lo, granularity).isoformat(), until):
+            meta = e.get("metadata") or {}
+            contact = contacts.get(str(e.get("contact_id")), {})
+            bucket = _truncate(_ts(e["created_at"]), granularity).isoformat()
+            niche = meta.get("niche_id") or contact.get("niche_id") or ""
+            platform = meta.get("platform") or contact.get("platform") or "unknown"
+            counts[(bucket, niche, platform, e["from_stage"], e["to_stage"])] += 1
+        return [
+            {"bucket": b, "niche_id": n, "platform": p, "from_stage": f, "to_stage": t, "count": c}
+            for (b, n, p, f, t), c in counts.items()
+        ]
+
+    def _rpc_bulk_transition(self, transitions: list[dict]):
+        contacts = self.table("crm_contacts")
+        results = []
+        for t in transitions:
+            contact = contacts.rows.get(str(t["contact_id"]))
+            applied = contact is not None and contact.get("pipeline_stage") == t["from_stage"]
+            if applied:
+                now = _now()
+                changes = {"pipeline_stage": t["to_stage"], "updated_at": now}
+                if t["to_stage"] == "archived":
+                    changes["archived_at"] = now
+                if t["to_stage"] == "warming":
+                    changes["warmup_comments_sent"] = 0
+                contacts.update(contact, changes)
+                self._insert("acq_funnel_events", {
+                    "contact_id": str(t["contact_id"]),
+                    "from_stage": t["from_stage"],
+                    "to_stage": t["to_stage"],
+                    "triggered_by": t.get("triggered_by") or "automation",
+                    "metadata": t.get("metadata") or {},
+                })
+            results.append({
+                "contact_id": str(t["contact_id"]),
+                "from_stage": t["from_stage"],
+                "to_stage": t["to_stage"],
+                "status": "applied" if applied else "stale",
+            })
+        return results
+
+    def _rpc_transition_contact(self, contact_id, from_stage, to_stage, triggered_by="automation", metadata=None):
+        rows = self._rpc_bulk_transition([{
+            "contact_id": contact_id, "from_stage": from_stage, "to_stage": to_stage,
+            "triggered_by": triggered_by, "metadata": metadata or {},
+        }])
+        return rows[0]["status"]
+
+    def _rpc_seed_contact(self, contact: dict, triggered_by: str = "automation", event_metadata=None):
+        row = {
+            "source": triggered_by,
+            **{k: v for k, v in contact.items() if v is not None},
+            "pipeline_stage": "new",
+            "updated_at": _now(),
+        }
+        existing = self._find_unique("crm_contacts", ("platform", "platform_id"), row)
+        if existing is not None:
+            previous = existing.get("pipeline_stage")
+            self._update("crm_contacts", existing, row)
+            seeded = existing
+        else:
+            previous = "none"
+            seeded = self._insert("crm_contacts", row)
+        self._insert("acq_funnel_events", {
+            "contact_id": seeded["id"], "from_stage": previous, "to_stage": "new",
+            "triggered_by": triggered_by, "metadata": event_metadata or {},
+        })
+        return [dict(seeded)]
+
+    def _rpc_record_warmup_sent(self, warmup_id: str):
+        warmup = self.table("acq_warmup_schedules").rows.get(str(warmup_id))
+        if warmup is None or warmup.get("status") == "sent":
+            return []
+        self.table("acq_warmup_schedules").update(warmup, {"status": "sent", "sent_at": _now()})
+        contact = self.table("crm_contacts").rows.get(str(warmup["contact_id"]))
+        if contact is None:
+            return []
+        sent = (contact.get("warmup_comments_sent") or 0) + 1
+        self.table("crm_contacts").update(contact, {"warmup_comments_sent": sent})
+        return [{"contact_id": contact["id"], "warmup_comments_sent": sent}]
+
+    def _rpc_exhausted_warming_contacts(self, settle_seconds=600, max_rows=500):
+        settled = datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)
+        pending = {
+            str(w["contact_id"]) for w in self.table("acq_warmup_schedules").rows.values()
+            if w.get("status") == "pending"
+        }
+        contacts = sorted(
+            (
+                c for c in self.table("crm_contacts").rows.values()
+                if c.get("pipeline_stage") == "warming"
+                and _ts(c["updated_at"]) < settled
+                and str(c["id"]) not in pending
+            ),
+            key=lambda c: (_ts(c["updated_at"]), c["id"]),
+        )
+        return [
+            {k: c.get(k) for k in ("id", "niche_id", "platform", "warmup_comments_sent")}
+            for c in contacts[:max_rows]
+        ]
+
+    def _rpc_increment_cap(self, platform, action, cap_date, daily_limit, amount=1):
+        key = {"platform": platform, "action": action, "cap_date": cap_date}
+        row = self._find_unique("acq_daily_caps", ("platform", "action", "cap_date"), key)
+        if row is None:
+            row = self._insert("acq_daily_caps", {**key, "daily_limit": daily_limit, "current_count": 0})
+        self.table("acq_daily_caps").update(row, {
+            "current_count": row["current_count"] + amount, "updated_at": _now(),
+        })
+        return row["current_count"]
+
+    def _rpc_try_run_lock(self, lock_name, lock_holder, ttl_seconds):
+        locks = self.table("acq_run_locks")
+        now = datetime.now(timezone.utc)
+        expires = (now + timedelta(seconds=ttl_seconds)).isoformat()
+        lock = locks.rows.get(lock_name)
+        if lock is None:
+            locks.insert({
+                "id": lock_name, "name": lock_name, "holder": lock_holder,
+                "acquired_at": now.isoformat(), "expires_at": expires,
+            })
+        elif lock["holder"] == lock_holder or _ts(lock["expires_at"]) < now:
+            if lock["holder"] != lock_holder:
+                lock["acquired_at"] = now.isoformat()
+            lock.update({"holder": lock_holder, "expires_at": expires})
+        return locks.rows[lock_name]["holder"]
+
+    def _rpc_release_run_lock(self, lock_name, lock_holder):
+        lock = self.table("acq_run_locks").rows.get(lock_name)
+        if lock is None or lock["holder"] != lock_holder:
+            return False
+        self.table("acq_run_locks").delete(lock)
+        return True
+
+
+# --- filter parsing ---
+
+def _parse_filter(column: str, spec: str) -> tuple[str, str, bool, str]:
+    negate = spec.startswith("not.")
+    if negate:
+        spec = spec[4:]
+    op, _, value = spec.partition(".")
+    return column, op, negate, value
+
+
+def _parse_logic(key: str, value: str) -> Callable[[dict], bool]:
+    negate = key.startswith("not.")
+    combine = all if key.removeprefix("not.") == "and" else any
+    parts = [_parse_condition(p) for p in _split_top(value.strip()[1:-1])]
+    if negate:
+        return lambda row: not combine(p(row) for p in parts)
+    return lambda row: combine(p(row) for p in parts)
+
+
+def _parse_condition(item: str) -> Callable[[dict], bool]:
+    for key in ("not.and", "not.or", "and", "or"):
+        if item.startswith(key + "("):
+            return _parse_logic(key, item[len(key):])
+    column, _, spec = item.partition(".")
+    return _predicate(*_parse_filter(column, spec))
+
+
+def _split_top(text: str) -> list[str]:
+    """Split on commas outside parentheses."""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _in_values(value: str) -> list[str]:
+    return [v.strip().strip('"') for v in _split_top(value.strip()[1:-1]) if v.strip()]
+
+
+def _predicate(column: str, op: str, negate: bool, literal: str) -> Callable[[dict], bool]:
+    if op == "is":
+        target = {"null": None, "true": True, "false": False}[literal.lower()]
+        test = lambda row: row.get(column) is target  # noqa: E731
+    elif op == "in":
+        values = _in_values(literal)
+        test = lambda row: row.get(column) is not None and any(  # noqa: E731
+            a == b for a, b in (_compare(row[column], v) for v in values)
+        )
+    else:
+        compare = {
+            "eq": lambda a, b: a == b,
+            "neq": lambda a, b: a != b,
+            "gt": lambda a, b: a > b,
+            "gte": lambda a, b: a >= b,
+            "lt": lambda a, b: a < b,
+            "lte": lambda a, b: a <= b,
+        }.get(op)
+        if compare is None:
+            raise PostgRESTError(400, "PGRST100", f"Unsupported operator {op}")
+
+        def test(row):
+            # SQL comparisons with NULL are never true
+            if row.get(column) is None:
+                return False
+            return compare(*_compare(row[column], literal))
+
+    if not negate:
+        return test
+    if op == "is":
+        return lambda row: not test(row)
+    return lambda row: row.get(column) is not None and not test(row)
+
+
+def _compare(value: Any, literal: str) -> tuple[Any, Any]:
+    """Coerce a row value and a filter literal to comparable types."""
+    if isinstance(value, bool):
+        return value, literal.lower() == "true"
+    if isinstance(value, (int, float)):
+        try:
+            return value, float(literal)
+        except ValueError:
+            return str(value), literal
+    if isinstance(value, str) and _TIMESTAMP_RE.match(value) and _TIMESTAMP_RE.match(literal):
+        try:
+            return _ts(value), _ts(literal)
+        except ValueError:
+            pass
+    return str(value), literal
+
+
+def _order(rows: list[dict], spec: str) -> list[dict]:
+    # Stable sorts applied last key first
+    for term in reversed(spec.split(",")):
+        column, *mods = term.split(".")
+        descending = "desc" in mods
+        nulls_first = "nullsfirst" in mods or (descending and "nullslast" not in mods)
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: _sort_value(r[column]), reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def _sort_value(value: Any) -> Any:
+    if isinstance(value, str) and _TIMESTAMP_RE.match(value):
+        try:
+            return _ts(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _project(rows: list[dict], select: str) -> list[dict]:
+    if select == "*":
+        return [dict(r) for r in rows]
+    columns = [c.strip() for c in select.split(",") if c.strip()]
+    return [{c: r.get(c) for c in columns} for r in rows]
+
+
+@lru_cache(maxsize=262144)
+def _ts(value: str) -> datetime:
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _truncate(ts: datetime, granularity: str) -> datetime:
+    ts = ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0) if granularity == "day" else ts
+
+
+def _key(value: Any) -> Any:
+    return json.dumps(value, sort_keys=True) if isinstance(value, (dict, list)) else str(value)
+
+
+def _copy(value: Any) -> Any:
+    return json.loads(json.dumps(value)) if isinstance(value, (dict, list)) else value
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def stage_counts(db: LocalSupabase) -> dict[str, int]:
+    counts = Counter(r["pipeline_stage"] for r in db.rows("crm_contacts"))
+    return {stage: counts.get(stage, 0) for stage in PIPELINE_STAGES}
+
+
+_local: LocalSupabase | None = None
+
+
+def get_local_supabase() -> LocalSupabase:
+    """The process-wide stand-in used by create_http_client()."""
+    global _local
+    if _local is None:
+        _local = LocalSupabase(latency_ms=LOCAL_SUPABASE_LATENCY_MS, jitter_ms=LOCAL_SUPABASE_JITTER_MS)
+    return _local
@@ -0,0 +1,385 @@
+"""Benchmark: orchestrator cycles and agents against local stand-ins.
+
+Seeds the in-memory PostgREST stand-in (local_supabase) with a synthetic
+pipeline of N contacts spread over every stage, mounts it alongside the
+simulated Safari / Market Research / Claude / Telegram services
+(services), and measures:
+
+  agents  — each agent run once, in cycle order, on one seeded pipeline
+  cycle   — AcquisitionOrchestrator.run_cycle on a freshly seeded pipeline
+
+For each run it reports wall time, Supabase requests (total and per
+route), upstream service requests, LLM calls and tokens, stage
+transitions and contacts advanced per minute. Each scale also reports
+the process's peak RSS; it only grows, so run one scale per process
+when comparing memory.
+
+Usage:
+    python -m acquisition.benchmarks.pipeline --contacts 1000 10000 100000
+    python -m acquisition.benchmarks.pipeline --contacts 10000 --output baseline.json
+    python -m acquisition.benchmarks.pipeline --contacts 10000 --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import httpx
+
+from ..config import DEFAULT_ICP_CRITERIA, SAFARI_PORTS, SUPABASE_URL
+from ..discovery_agent import run_discovery
+from ..followup_agent import check_replies, send_followups
+from ..content_scanner import scan_content
+from ..niche_cache import get_niche_cache
+from ..orchestrator import AcquisitionOrchestrator
+from ..outreach_agent import run_outreach
+from ..promotion_agent import promote_warmed_contacts
+from ..reentry_agent import sweep_reentries
+from ..scoring_agent import run_scoring
+from ..state_machine import COOLDOWN
+from ..warmup_agent import execute_warmups, schedule_warmups
+from .local_supabase import LocalSupabase, stage_counts
+from .services import SafariDMService, ServiceSimulator
+
+SCALES = (1_000, 10_000, 100_000)
+
+# Share of seeded contacts per stage
+STAGE_MIX = {
+    "new": 0.40,
+    "qualified": 0.10,
+    "warming": 0.15,
+    "ready_for_dm": 0.10,
+    "contacted": 0.15,
+    "replied": 0.03,
+    "call_booked": 0.01,
+    "archived": 0.06,
+}
+
+NICHES = [
+    {"niche_id": "bench-ai", "name": "AI builders", "platforms": ["twitter", "linkedin"],
+     "keywords": ["ai agents", "automation"]},
+    {"niche_id": "bench-saas", "name": "SaaS founders", "platforms": ["twitter", "instagram"],
+     "keywords": ["saas", "bootstrapped"]},
+    {"niche_id": "bench-creators", "name": "Creators", "platforms": ["instagram", "tiktok"],
+     "keywords": ["creator economy", "content"]},
+]
+
+DM_PLATFORMS = sorted(p for p, ports in SAFARI_PORTS.items() if "dm" in ports)
+
+
+def generate_pipeline(count: int, *, seed: int = 7) -> dict[str, list[dict]]:
+    """Rows per table for a pipeline of `count` contacts.
+
+    Warming contacts get one pending warmup (half due and filled, half
+    upcoming and unfilled); contacted contacts have a sent first DM and
+    every third a due follow-up; half the archived contacts are past
+    their cooldown.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    stages = list(STAGE_MIX)
+    weights = list(STAGE_MIX.values())
+    contacts, warmups, outreach = [], [], []
+
+    for i in range(count):
+        stage = rng.choices(stages, weights)[0]
+        niche = NICHES[i % len(NICHES)]
+        platform = rng.choice(DM_PLATFORMS)
+        username = f"bench_{i}"
+        contact = {
+            "id": f"00000000-0000-4000-8000-{i:012d}",
+            "platform": platform,
+            "platform_id": f"{platform}:{username}",
+            "name": f"Bench Contact {i}",
+            "username": username,
+            "bio": f"Founder working on {rng.choice(niche['keywords'])}",
+            "followers": rng.randrange(500, 200_000),
+            "pipeline_stage": stage,
+            "niche_id": niche["niche_id"],
+            "source": "benchmark",
+            "icp_score": None if stage == "new" else rng.randrange(60, 100),
+        }
+        if stage == "warming":
+            contact["warmup_comments_sent"] = rng.randrange(0, 4)
+            due = rng.random() < 0.5
+            warmups.append({
+                "contact_id": contact["id"],
+                "platform": platform,
+                "post_url": f"https://{platform}.example/{username}/post/1" if due else "",
+                "comment_text": "Great point, thanks for sharing." if due else None,
+                "scheduled_at": (now + timedelta(hours=-1 if due else 2)).isoformat(),
+            })
+        elif stage == "contacted":
+            sent_at = now - timedelta(days=rng.randrange(1, 6))
+            outreach.append({
+                "contact_id": contact["id"],
+                "platform": platform,
+                "message_text": "Hi! Loved what you're building.",
+                "sent_at": sent_at.isoformat(),
+                "status": "sent",
+            })
+            if i % 3 == 0:
+                outreach.append({
+                    "contact_id": contact["id"],
+                    "platform": platform,
+                    "sequence_step": 2,
+                    "message_text": "Just bumping this in case it got buried.",
+                    "scheduled_at": (now - timedelta(hours=1)).isoformat(),
+                })
+        elif stage == "archived":
+            age = COOLDOWN + timedelta(days=1) if rng.random() < 0.5 else timedelta(days=1)
+            contact["archived_at"] = (now - age).isoformat()
+        contacts.append(contact)
+
+    niches = [
+        {**niche, "icp_criteria": DEFAULT_ICP_CRITERIA, "daily_dm_limit": 20}
+        for niche in NICHES
+    ]
+    return {
+        "acq_niche_configs": niches,
+        "crm_contacts": contacts,
+        "acq_warmup_schedules": warmups,
+        "acq_outreach_sequences": outreach,
+    }
+
+
+def seed(db: LocalSupabase, simulator: ServiceSimulator, tables: dict[str, list[dict]]):
+    """Load the tables and give contacted contacts a DM history to reply to."""
+    for table, rows in tables.items():
+        db.load(table, rows)
+    inboxes = {
+        s.platform: s for s in simulator.services.values() if isinstance(s, SafariDMService)
+    }
+    for row in tables["acq_outreach_sequences"]:
+        if row.get("status") == "sent":
+            contact = db.table("crm_contacts").rows[row["contact_id"]]
+            inboxes[row["platform"]].sent.setdefault(contact["username"], []).append(
+                row["message_text"]
+            )
+
+
+class Probe:
+    """Counters at one instant, diffed into a run's metrics."""
+
+    def __init__(self, db: LocalSupabase, simulator: ServiceSimulator):
+        self.db = db
+        self.simulator = simulator
+        self.started = time.perf_counter()
+        self.db_stats = Counter(db.stats)
+        self.service_requests = self._service_requests()
+        self.llm_calls = simulator.llm_calls
+        self.tokens = Counter(simulator.claude.tokens)
+        self.events = len(db.table("acq_funnel_events").rows)
+
+    def _service_requests(self) -> Counter:
+        return Counter({
+            s.name: s.stats["requests"] for s in self.simulator.services.values()
+        })
+
+    def finish(self) -> dict:
+        wall = time.perf_counter() - self.started
+        db_stats = Counter(self.db.stats)
+        db_stats.subtract(self.db_stats)
+        services = self._service_requests()
+        services.subtract(self.service_requests)
+        tokens = Counter(self.simulator.claude.tokens)
+        tokens.subtract(self.tokens)
+
+        new_events = list(self.db.table("acq_funnel_events").rows.values())[self.events:]
+        discovered = sum(1 for e in new_events if e["from_stage"] == "none")
+        transitions = len(new_events) - discovered
+        return {
+            "wall_seconds": round(wall, 3),
+            "supabase_requests": db_stats.pop("requests", 0),
+            "supabase_routes": dict(sorted((k, v) for k, v in db_stats.items() if v)),
+            "service_requests": dict(sorted((k, v) for k, v in services.items() if v)),
+            "llm_calls": self.simulator.llm_calls - self.llm_calls,
+            "llm_tokens": {"input": tokens["input"], "output": tokens["output"]},
+            "contacts_discovered": discovered,
+            "transitions": transitions,
+            "contacts_advanced_per_minute": round(transitions / wall * 60, 1) if wall else 0.0,
+        }
+
+
+def _agents(client: httpx.AsyncClient) -> list[tuple[str, Callable[[], Awaitable]]]:
+    """The cycle's agents in order, as the orchestrator calls them."""
+
+    async def discover():
+        cache = await get_niche_cache(client)
+        return [
+            await run_discovery(client, niche.row, platform, matcher=niche.matcher)
+            for niche in cache.active()
+            for platform in niche.row.get("platforms", [])
+        ]
+
+    async def schedule():
+        niches = (await get_niche_cache(client)).configs()
+        return await schedule_warmups(client, niches=niches)
+
+    async def promote():
+        niches = (await get_niche_cache(client)).configs()
+        return await promote_warmed_contacts(client, niches=niches)
+
+    return [
+        ("reentry", lambda: sweep_reentries(client)),
+        ("discovery", discover),
+        ("scoring", lambda: run_scoring(client)),
+        ("warmup_schedule", schedule),
+        ("content_scan", lambda: scan_content(client)),
+        ("warmup_execute", lambda: execute_warmups(client)),
+        ("outreach", lambda: run_outreach(client)),
+        ("promotion", promote),
+        ("replies", lambda: check_replies(client)),
+        ("followups", lambda: send_followups(client)),
+    ]
+
+
+def _stand_ins(args) -> tuple[LocalSupabase, ServiceSimulator, httpx.AsyncClient]:
+    db = LocalSupabase(
+        latency_ms=args.supabase_latency_ms,
+        jitter_ms=args.supabase_jitter_ms,
+        seed=args.seed,
+    )
+    simulator = ServiceSimulator(
+        seed=args.seed,
+        latency_scale=args.service_latency_scale,
+        failure_rate=args.failure_rate,
+    )
+    mounts = {SUPABASE_URL: httpx.ASGITransport(app=db), **simulator.mounts()}
+    return db, simulator, httpx.AsyncClient(timeout=60.0, mounts=mounts)
+
+
+async def _run_agents(tables: dict[str, list[dict]], args) -> dict:
+    db, simulator, client = _stand_ins(args)
+    seed(db, simulator, tables)
+    results = {}
+    async with client:
+        await get_niche_cache(client, force=True)
+        for name, run_agent in _agents(client):
+            probe = Probe(db, simulator)
+            error = None
+            try:
+                await run_agent()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            results[name] = {**probe.finish(), **({"error": error} if error else {})}
+    return results
+
+
+async def _run_cycle(tables: dict[str, list[dict]], args) -> dict:
+    db, simulator, client = _stand_ins(args)
+    seed(db, simulator, tables)
+    before = stage_counts(db)
+    async with client:
+        await get_niche_cache(client, force=True)
+        orchestrator = AcquisitionOrchestrator(pacing=False)
+        orchestrator._client = client
+        probe = Probe(db, simulator)
+        result = await orchestrator.run_cycle()
+        metrics = probe.finish()
+    metrics["error"] = result.get("error")
+    metrics["stages_before"] = before
+    metrics["stages_after"] = stage_counts(db)
+    metrics["services"] = simulator.metrics()
+    return metrics
+
+
+async def run_scale(count: int, args) -> dict:
+    started = time.perf_counter()
+    tables = generate_pipeline(count, seed=args.seed)
+    scenario = {
+        "contacts": count,
+        "generate_seconds": round(time.perf_counter() - started, 3),
+    }
+    if not args.cycle_only:
+        scenario["agents"] = await _run_agents(tables, args)
+    scenario["cycle"] = await _run_cycle(tables, args)
+    scenario["peak_rss_mb"] = _peak_rss_mb()
+    return scenario
+
+
+async def run(args) -> dict:
+    return {
+        "benchmark": "pipeline",
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "settings": {
+            "supabase_latency_ms": args.supabase_latency_ms,
+            "supabase_jitter_ms": args.supabase_jitter_ms,
+            "service_latency_scale": args.service_latency_scale,
+            "failure_rate": args.failure_rate,
+            "seed": args.seed,
+        },
+        "scenarios": [await run_scale(count, args) for count in args.contacts],
+    }
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+SUMMARY_METRICS = ("wall_seconds", "supabase_requests", "llm_calls", "contacts_advanced_per_minute")
+
+
+def summarize(report: dict, baseline: dict | None = None) -> str:
+    """One line per scale and agent, with changes against a baseline report."""
+    previous = {s["contacts"]: s for s in (baseline or {}).get("scenarios", [])}
+    lines = []
+    for scenario in report["scenarios"]:
+        base = previous.get(scenario["contacts"], {})
+        runs = {"cycle": scenario["cycle"], **scenario.get("agents", {})}
+        base_runs = {"cycle": base.get("cycle", {}), **base.get("agents", {})}
+        lines.append(f"{scenario['contacts']:,} contacts (peak RSS {scenario['peak_rss_mb']} MB)")
+        for name, metrics in runs.items():
+            cells = []
+            for key in SUMMARY_METRICS:
+                cell = f"{key}={metrics[key]}"
+                old = base_runs.get(name, {}).get(key)
+                if old:
+                    cell += f" ({(metrics[key] - old) / old:+.0%})"
+                cells.append(cell)
+            lines.append(f"  {name:<16} " + "  ".join(cells))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acquisition pipeline benchmark")
+    parser.add_argument("--contacts", type=int, nargs="+", default=list(SCALES), help="Pipeline sizes")
+    parser.add_argument("--supabase-latency-ms", type=float, default=2, help="Per-request PostgREST latency")
+    parser.add_argument("--supabase-jitter-ms", type=float, default=1, help="Uniform jitter on top")
+    parser.add_argument("--service-latency-scale", type=float, default=0.01,
+                        help="Multiplier on the simulated services' production latencies")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Simulated service failure rate")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--cycle-only", action="store_true", help="Skip the per-agent runs")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="A previous JSON report to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(summarize(report, baseline), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
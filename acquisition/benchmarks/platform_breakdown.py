@@ -0,0 +1,188 @@
+"""Benchmark: platform breakdown via RPC vs paginated streaming vs one GET.
+
+Generates a synthetic acq_funnel_events dataset and serves it through an
+in-process PostgREST emulation with a max-rows limit, then compares:
+
+  legacy  — single unpaginated GET, counted in Python (truncates at max-rows)
+  stream  — keyset-paginated reads via iter_funnel_events
+  rpc     — server-side GROUP BY via acq_platform_breakdown
+
+Usage:
+    python -m acquisition.benchmarks.platform_breakdown --events 100000
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import random
+import re
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+
+from .. import reporting_agent
+from ..config import PIPELINE_STAGES, SAFARI_PORTS, SUPABASE_URL, get_supabase_headers
+
+POSTGREST_MAX_ROWS = 1000
+
+KEYSET_RE = re.compile(
+    r"\(created_at\.gt\.(?P<created_at>[^,]+),"
+    r"and\(created_at\.eq\.[^,]+,id\.gt\.(?P<id>[^)]+)\)\)"
+)
+
+
+def generate_events(count: int, since: datetime, *, seed: int = 7) -> list[dict]:
+    """Synthetic funnel events spread evenly over the week after `since`."""
+    rng = random.Random(seed)
+    platforms = list(SAFARI_PORTS)
+    stages = PIPELINE_STAGES[1:]
+    span = timedelta(days=7).total_seconds()
+    events = []
+    for i in range(count):
+        created = since + timedelta(seconds=span * i / max(count, 1))
+        events.append({
+            "id": f"{i:012d}",
+            "contact_id": f"c{rng.randrange(count // 4 + 1)}",
+            "from_stage": "new",
+            "to_stage": rng.choice(stages),
+            "metadata": {"platform": rng.choice(platforms), "niche_id": "bench"},
+            "created_at": created.isoformat(),
+        })
+    return events
+
+
+class FakePostgREST:
+    """Just enough of PostgREST to serve acq_funnel_events reads and the RPC."""
+
+    def __init__(self, events: list[dict], *, latency_ms: float = 0):
+        self.events = sorted(events, key=lambda e: (e["created_at"], e["id"]))
+        self._times = [_parse_ts(e["created_at"]) for e in self.events]
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self.bytes_sent = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = request.url.path
+        if path.endswith("/rpc/acq_platform_breakdown"):
+            body = json.loads(request.content)
+            rows = self._filter(body["since"], body.get("until"))
+            counts = Counter(
+                (e["metadata"].get("platform", "unknown"), e["to_stage"]) for e in rows
+            )
+            payload = [
+                {"platform": p, "to_stage": s, "count": n} for (p, s), n in counts.items()
+            ]
+        elif path.endswith("/acq_funnel_events"):
+            payload = self._select(request.url.params)
+        else:
+            return httpx.Response(404)
+        content = json.dumps(payload).encode()
+        self.bytes_sent += len(content)
+        return httpx.Response(200, content=content, headers={"content-type": "application/json"})
+
+    def _filter(self, since: str, until: str | None) -> list[dict]:
+        lo = bisect.bisect_left(self._times, _parse_ts(since))
+        hi = bisect.bisect_left(self._times, _parse_ts(until)) if until else len(self.events)
+        return self.events[lo:hi]
+
+    def _select(self, params: httpx.QueryParams) -> list[dict]:
+        if "and" in params:
+            parts = params["and"].strip("()").split(",")
+            since = parts[0].split(".gte.", 1)[1]
+            until = parts[1].split(".lt.", 1)[1]
+            rows = self._filter(since, until)
+        else:
+            rows = self._filter(params["created_at"].removeprefix("gte."), None)
+        if "or" in params:
+            # Keyset: or=(created_at.gt.X,and(created_at.eq.X,id.gt.Y))
+            match = KEYSET_RE.match(params["or"])
+            after = (_parse_ts(match["created_at"]), match["id"])
+            rows = [e for e in rows if (_parse_ts(e["created_at"]), e["id"]) > after]
+        limit = min(int(params.get("limit", POSTGREST_MAX_ROWS)), POSTGREST_MAX_ROWS)
+        columns = params.get("select", "*")
+        page = rows[:limit]
+        if columns == "*":
+            return page
+        keep = columns.split(",")
+        return [{k: e[k] for k in keep} for e in page]
+
+
+def _parse_ts(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+async def _legacy_breakdown(client: httpx.AsyncClient, since: date) -> dict[str, dict]:
+    """The pre-RPC implementation: one unpaginated GET."""
+    resp = await client.get(
+        f"{SUPABASE_URL}/rest/v1/acq_funnel_events",
+        headers=get_supabase_headers(),
+        params={"created_at": f"gte.{since.isoformat()}", "select": "to_stage,metadata"},
+    )
+    resp.raise_for_status()
+    breakdown: dict[str, dict[str, int]] = {}
+    for event in resp.json():
+        platform = event.get("metadata", {}).get("platform", "unknown")
+        stage = event.get("to_stage", "unknown")
+        breakdown.setdefault(platform, {})
+        breakdown[platform][stage] = breakdown[platform].get(stage, 0) + 1
+    return breakdown
+
+
+async def _run_strategy(name: str, events: list[dict], since: date, latency_ms: float) -> dict:
+    server = FakePostgREST(events, latency_ms=latency_ms)
+    if name == "stream":
+        # Hide the RPC so get_platform_breakdown takes its streaming fallback
+        async def handler(request):
+            if "/rpc/" in request.url.path:
+                server.requests += 1
+                return httpx.Response(404)
+            return await server(request)
+    else:
+        handler = server
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        start = time.perf_counter()
+        if name == "legacy":
+            breakdown = await _legacy_breakdown(client, since)
+        else:
+            breakdown = await reporting_agent.get_platform_breakdown(client, since)
+        elapsed = time.perf_counter() - start
+
+    counted = sum(n for stages in breakdown.values() for n in stages.values())
+    return {
+        "strategy": name,
+        "wall_seconds": round(elapsed, 4),
+        "requests": server.requests,
+        "response_bytes": server.bytes_sent,
+        "events_counted": counted,
+        "complete": counted == len(events),
+    }
+
+
+async def run(events: int, latency_ms: float) -> dict:
+    since = date.today() - timedelta(days=7)
+    dataset = generate_events(events, datetime.combine(since, datetime.min.time(), tzinfo=timezone.utc))
+    results = [
+        await _run_strategy(name, dataset, since, latency_ms)
+        for name in ("legacy", "stream", "rpc")
+    ]
+    return {"events": events, "latency_ms": latency_ms, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Platform breakdown benchmark")
+    parser.add_argument("--events", type=int, default=20000, help="Synthetic funnel events")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Injected per-request latency")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.events, args.latency_ms)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""Simulated upstream services for end-to-end throughput tests.
+
+Stand-ins for everything the agents call besides Supabase:
+
+  SafariDMService       /api/dm/send, /api/dm/inbox          (SAFARI_PORTS[*]["dm"])
+  SafariCommentService  /api/comment and the recent-post endpoints
+                        in content_scanner.POST_ENDPOINTS   (SAFARI_PORTS[*]["comments"])
+  MarketResearchService /api/research/{platform}/search     (MARKET_RESEARCH_PORT)
+  SimulatedClaude       /v1/messages on api.anthropic.com
+  SimulatedTelegram     /api/telegram/send on port 3434
+
+Each is an ASGI app. Safari services model a single browser: requests
+are served one at a time and the rest queue, as with the real services.
+Response times are drawn from a log-normal fitted to a median and p95,
+and a failure_rate fraction of requests fail with a 500. All randomness
+comes from one seed, so runs are reproducible.
+
+ServiceSimulator builds the whole set and returns httpx mounts for it;
+ACQ_SERVICE_BACKEND=simulated makes create_http_client use them.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import parse_qsl
+
+import httpx
+
+from ..config import (
+    MARKET_RESEARCH_PORT,
+    SAFARI_PORTS,
+    SIMULATED_FAILURE_RATE,
+    SIMULATED_LATENCY_SCALE,
+    SIMULATED_SEED,
+)
+
+ANTHROPIC_URL = "https://api.anthropic.com"
+TELEGRAM_URL = "http://localhost:3434"
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Lee", "Patel", "Garcia", "Kim", "Nguyen", "Smith", "Chen", "Rossi", "Okafor", "Silva"]
+ROLES = ["founder", "CEO", "CTO", "indie hacker", "consultant", "designer", "engineer", "marketer"]
+TOPICS = ["AI", "automation", "SaaS", "software", "startups", "fitness", "travel", "photography"]
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """Log-normal response time with the given median and p95 (ms)."""
+
+    median_ms: float
+    p95_ms: float
+
+    def sample(self, rng: random.Random, scale: float = 1.0) -> float:
+        """One response time in seconds."""
+        if self.median_ms <= 0 or scale <= 0:
+            return 0.0
+        sigma = math.log(max(self.p95_ms, self.median_ms) / self.median_ms) / 1.645
+        return self.median_ms * math.exp(sigma * rng.gauss(0, 1)) * scale / 1000
+
+
+class SimulatedService:
+    """ASGI base: latency, failure injection and optional serialization."""
+
+    serialized = False
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        latency: dict[str, LatencyModel],
+        failure_rate: float = SIMULATED_FAILURE_RATE,
+        latency_scale: float = SIMULATED_LATENCY_SCALE,
+        rng: random.Random | None = None,
+    ):
+        self.name = name
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.latency_scale = latency_scale
+        self.rng = rng or random.Random(SIMULATED_SEED)
+        self.stats: Counter = Counter()
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_queue = 0
+        self._browser = asyncio.Lock()
+        self._queued = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        query = dict(parse_qsl(scope.get("query_string", b"").decode(), keep_blank_values=True))
+        status, payload = await self.serve(
+            scope["method"], scope["path"], query, json.loads(body) if body else {}
+        )
+        content = json.dumps(payload).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": content})
+
+    async def serve(self, method: str, path: str, query: dict, body: Any) -> tuple[int, Any]:
+        route = self.route(method, path)
+        if route is None:
+            self.stats["not_found"] += 1
+            return 404, {"error": f"No route {method} {path}"}
+        self.stats[route] += 1
+        self.stats["requests"] += 1
+
+        if not self.serialized:
+            return await self._work(route, path, query, body)
+        queued_at = time.monotonic()
+        self._queued += 1
+        self.max_queue = max(self.max_queue, self._queued)
+        async with self._browser:
+            self._queued -= 1
+            self.wait_seconds += time.monotonic() - queued_at
+            return await self._work(route, path, query, body)
+
+    async def _work(self, route: str, path: str, query: dict, body: Any) -> tuple[int, Any]:
+        model = self.latency.get(route) or self.latency.get("default")
+        delay = model.sample(self.rng, self.latency_scale) if model else 0.0
+        started = time.monotonic()
+        if delay:
+            await asyncio.sleep(delay)
+        self.busy_seconds += time.monotonic() - started
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            self.stats["failures"] += 1
+            return 500, {"error": "simulated failure"}
+        return 200, self.respond(route, path, query, body)
+
+    def route(self, method: str, path: str) -> str | None:
+        raise NotImplementedError
+
+    def respond(self, route: str, path: str, query: dict, body: Any) -> Any:
+        raise NotImplementedError
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "queue_wait_seconds": round(self.wait_seconds, 3),
+            "max_queue": self.max_queue,
+        }
+
+
+class SafariDMService(SimulatedService):
+    """A platform's DM browser. Recipients reply with probability reply_rate."""
+
+    serialized = True
+
+    def __init__(self, platform: str, *, reply_rate: float = 0.15, **kwargs):
+        kwargs.setdefault("latency", {
+            "send": LatencyModel(2500, 6000),
+            "inbox": LatencyModel(1200, 3000),
+        })
+        super().__init__(f"{platform}-dm", **kwargs)
+        self.platform = platform
+        self.reply_rate = reply_rate
+        self.sent: dict[str, list[str]] = {}
+
+    def route(self, method, path):
+        if method == "POST" and path == "/api/dm/send":
+            return "send"
+        if method == "GET" and path == "/api/dm/inbox":
+            return "inbox"
+        return None
+
+    def respond(self, route, path, query, body):
+        if route == "send":
+            self.sent.setdefault(body.get("recipient", ""), []).append(body.get("message", ""))
+            return {"success": True, "messageId": f"m{self.stats['send']}"}
+
+        username = query.get("username", "")
+        messages = [
+            {"from": "me", "is_inbound": False, "text": text} for text in self.sent.get(username, [])
+        ]
+        if messages and _fraction(self.platform, username, "reply") < self.reply_rate:
+            messages.append({
+                "from": username,
+                "is_inbound": True,
+                "text": "Thanks for reaching out! Happy to chat, what did you have in mind?",
+            })
+        return {"messages": messages}
+
+
+class SafariCommentService(SimulatedService):
+    """A platform's comment browser: posts comments and lists recent posts."""
+
+    serialized = True
+    POST_PATH = re.compile(r"^/api/profile/(?P<handle>[^/]+)/(posts|videos)$")
+
+    def __init__(self, platform: str, *, posts_per_profile: int = 6, **kwargs):
+        kwargs.setdefault("latency", {
+            "comment": LatencyModel(2000, 5000),
+            "posts": LatencyModel(1500, 4000),
+        })
+        super().__init__(f"{platform}-comments", **kwargs)
+        self.platform = platform
+        self.posts_per_profile = posts_per_profile
+
+    def route(self, method, path):
+        if method == "POST" and path == "/api/comment":
+            return "comment"
+        if method == "GET" and (self.POST_PATH.match(path) or path == "/api/search"):
+            return "posts"
+        return None
+
+    def respond(self, route, path, query, body):
+        if route == "comment":
+            return {"success": True, "commentId": f"c{self.stats['comment']}"}
+        match = self.POST_PATH.match(path)
+        handle = match.group("handle") if match else query.get("author", "")
+        posts = [
+            {
+                "url": f"https://{self.platform}.example/{handle}/post/{i}",
+                "text": f"Thoughts on {TOPICS[(_index(handle) + i) % len(TOPICS)]} this week, part {i}",
+            }
+            for i in range(self.posts_per_profile)
+        ]
+        return {"videos" if path.endswith("/videos") else "posts": posts}
+
+
+class MarketResearchService(SimulatedService):
+    """Prospect search returning synthetic profiles.
+
+    Repeated searches for a keyword return a fresh page each time, with
+    `overlap` of each page reusing profiles from earlier pages, so
+    discovery sees a realistic mix of new and known contacts.
+    """
+
+    def __init__(self, *, overlap: float = 0.2, icp_fraction: float = 0.5, **kwargs):
+        kwargs.setdefault("latency", {"search": LatencyModel(800, 2500)})
+        super().__init__("market-research", **kwargs)
+        self.overlap = overlap
+        self.icp_fraction = icp_fraction
+        self._pages: Counter = Counter()
+
+    def route(self, method, path):
+        if method == "POST" and re.match(r"^/api/research/[^/]+/search$", path):
+            return "search"
+        return None
+
+    def respond(self, route, path, query, body):
+        platform = path.split("/")[3]
+        keyword = body.get("query", "")
+        limit = int(body.get("limit", 50))
+        page = self._pages[(platform, keyword)]
+        self._pages[(platform, keyword)] += 1
+
+        results = []
+        for i in range(limit):
+            reuse = page > 0 and _fraction(platform, keyword, page, i) < self.overlap
+            n = self.rng.randrange(page * limit) if reuse else page * limit + i
+            results.append(self.profile(platform, keyword, n))
+        return {"results": results}
+
+    def profile(self, platform: str, keyword: str, n: int) -> dict:
+        seed = _index(platform, keyword, n)
+        first, last = FIRST_NAMES[seed % 10], LAST_NAMES[(seed // 10) % 10]
+        slug = hashlib.sha1(f"{platform}:{keyword}:{n}".encode()).hexdigest()[:10]
+        fits = _fraction(platform, keyword, n, "icp") < self.icp_fraction
+        role = ROLES[seed % 3] if fits else ROLES[3 + seed % 5]
+        topic = keyword if fits else TOPICS[4 + seed % 4]
+        return {
+            "platform": platform,
+            "platform_id": slug,
+            "username": f"{first.lower()}_{slug[:6]}",
+            "name": f"{first} {last}",
+            "bio": f"{role.capitalize()} building in {topic}",
+            "followers": int(math.exp(7 + 2.5 * _fraction(slug, "followers"))),
+            "metadata": {"simulated": True},
+        }
+
+
+class SimulatedClaude(SimulatedService):
+    """Messages API returning answers in the shapes the agents parse."""
+
+    ARRAY_SIZE = re.compile(r"JSON array of (\d+) strings")
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("latency", {"messages": LatencyModel(600, 1500)})
+        super().__init__("claude", **kwargs)
+        self.tokens: Counter = Counter()
+
+    def route(self, method, path):
+        return "messages" if method == "POST" and path == "/v1/messages" else None
+
+    def respond(self, route, path, query, body):
+        prompt = " ".join(
+            m["content"] for m in body.get("messages", []) if isinstance(m.get("content"), str)
+        )
+        if "Return ONLY a number" in prompt:
+            text = str(int(100 * _fraction(prompt, "score")))
+        elif match := self.ARRAY_SIZE.search(prompt):
+            text = json.dumps([
+                f"Interesting point in post {i}. What made you look at it this way?"
+                for i in range(int(match.group(1)))
+            ])
+        else:
+            text = "Hi! Loved what you're building. What's the biggest bottleneck for you right now?"
+        self.tokens["input"] += len(prompt) // 4
+        self.tokens["output"] += len(text) // 4
+        return {
+            "content": [{"type": "text", "text": text}],
+            "model": body.get("model"),
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+        }
+
+    def metrics(self) -> dict:
+        return {**super().metrics(), "input_tokens": self.tokens["input"], "output_tokens": self.tokens["output"]}
+
+
+class SimulatedTelegram(SimulatedService):
+    def __init__(self, **kwargs):
+        kwargs.setdefault("latency", {"send": LatencyModel(50, 150)})
+        super().__init__("telegram", **kwargs)
+
+    def route(self, method, path):
+        return "send" if method == "POST" and path == "/api/telegram/send" else None
+
+    def respond(self, route, path, query, body):
+        return {"ok": True}
+
+
+class ServiceSimulator:
+    """Every simulated upstream, with one shared seed and settings."""
+
+    def __init__(
+        self,
+        *,
+        seed: int = SIMULATED_SEED,
+        latency_scale: float = SIMULATED_LATENCY_SCALE,
+        failure_rate: float = SIMULATED_FAILURE_RATE,
+        reply_rate: float = 0.15,
+    ):
+        def options(offset: int) -> dict:
+            return {
+                "latency_scale": latency_scale,
+                "failure_rate": failure_rate,
+                "rng": random.Random(seed + offset),
+            }
+
+        self.services: dict[str, SimulatedService] = {}
+        for i, (platform, ports) in enumerate(sorted(SAFARI_PORTS.items())):
+            if "dm" in ports:
+                self.services[f"http://localhost:{ports['dm']}"] = SafariDMService(
+                    platform, reply_rate=reply_rate, **options(2 * i)
+                )
+            if "comments" in ports:
+                self.services[f"http://localhost:{ports['comments']}"] = SafariCommentService(
+                    platform, **options(2 * i + 1)
+                )
+        self.market_research = MarketResearchService(**options(100))
+        self.claude = SimulatedClaude(**options(101))
+        self.services[f"http://localhost:{MARKET_RESEARCH_PORT}"] = self.market_research
+        self.services[ANTHROPIC_URL] = self.claude
+        self.services[TELEGRAM_URL] = SimulatedTelegram(**options(102))
+
+    def mounts(self) -> dict[str, httpx.AsyncBaseTransport]:
+        return {url: httpx.ASGITransport(app=service) for url, service in self.services.items()}
+
+    def metrics(self) -> dict:
+        return {service.name: service.metrics() for service in self.services.values()}
+
+    @property
+    def llm_calls(self) -> int:
+        return self.claude.stats["messages"]
+
+
+def _fraction(*parts) -> float:
+    """Deterministic value in [0, 1) from the parts."""
+    digest = hashlib.sha1(":".join(map(str, parts)).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+def _index(*parts) -> int:
+    return int(_fraction(*parts) * 2**32)
+
+
+_simulator: ServiceSimulator | None = None
+
+
+def get_service_simulator() -> ServiceSimulator:
+    """The process-wide simulator used by create_http_client()."""
+    global _simulator
+    if _simulator is None:
+        _simulator = ServiceSimulator()
+    return _simulator
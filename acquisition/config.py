@@ -32,6 +32,7 @@ PIPELINE_STAGES = [
 
 SCORING_MODEL = "claude-3-haiku-20240307"
 DM_GENERATION_MODEL = "claude-3-5-sonnet-20241022"
+COMMENT_GENERATION_MODEL = "claude-3-haiku-20240307"
 
 ARCHIVE_COOLDOWN_DAYS = 180
 
@@ -51,6 +52,11 @@ class NicheConfig:
     warmup_interval_hours: int = 24
     enabled: bool = True
 
+    @classmethod
+    def from_row(cls, row: dict) -> "NicheConfig":
+        """Build from an acq_niche_configs row, ignoring extra columns."""
+        return cls(**{k: row[k] for k in cls.__dataclass_fields__ if row.get(k) is not None})
+
 
 @dataclass
 class DailyCapConfig:
@@ -82,6 +88,60 @@ DEFAULT_ICP_CRITERIA = {
 ACTIVE_HOURS_START = int(os.getenv("ACQ_ACTIVE_HOURS_START", "8"))
 ACTIVE_HOURS_END = int(os.getenv("ACQ_ACTIVE_HOURS_END", "20"))
 
+# Seconds a cached funnel snapshot may be served to dashboard polls (0 disables)
+FUNNEL_CACHE_TTL = float(os.getenv("ACQ_FUNNEL_CACHE_TTL", "15"))
+
+# Local columnar mirror for offline analytics (see snapshot.py).
+# ACQ_REPORTING_SOURCE=snapshot makes reporting read it instead of Supabase.
+SNAPSHOT_DIR = os.getenv("ACQ_SNAPSHOT_DIR", os.path.expanduser("~/.acquisition/snapshot"))
+REPORTING_SOURCE = os.getenv("ACQ_REPORTING_SOURCE", "live")
+
+# Transitions the outbox could not deliver before closing wait here for the next run
+OUTBOX_SPOOL_DIR = os.getenv("ACQ_OUTBOX_SPOOL_DIR", os.path.expanduser("~/.acquisition/outbox"))
+
+# Coalesce reply_received notifications arriving within this many seconds
+# into one digest message (0 sends each one; call_booked always bypasses)
+NOTIFY_DIGEST_SECONDS = float(os.getenv("ACQ_NOTIFY_DIGEST_SECONDS", "0"))
+
+# Content scanner fills warmup rows falling due within this many hours
+WARMUP_LOOKAHEAD_HOURS = float(os.getenv("ACQ_WARMUP_LOOKAHEAD_HOURS", "24"))
+# Rows still without a post this many hours past due are marked skipped
+WARMUP_FILL_GRACE_HOURS = float(os.getenv("ACQ_WARMUP_FILL_GRACE_HOURS", "24"))
+
+# Background API jobs (?background=true) run at most this many at a time;
+# finished jobs are kept for polling up to ACQ_JOB_RETAIN
+JOB_MAX_CONCURRENT = int(os.getenv("ACQ_JOB_MAX_CONCURRENT", "2"))
+JOB_RETAIN = int(os.getenv("ACQ_JOB_RETAIN", "200"))
+
+# Cross-process run locks for orchestrator phases: "local" guards only
+# this process; "postgres" also takes a lease in acq_run_locks
+RUN_LOCK_BACKEND = os.getenv("ACQ_RUN_LOCK", "local")
+RUN_LOCK_TTL_SECONDS = int(os.getenv("ACQ_RUN_LOCK_TTL", "300"))
+
+# Seconds /api/orchestrator/status and /api/health responses are cached
+# for polling dashboards (0 disables)
+RESPONSE_CACHE_TTL = float(os.getenv("ACQ_RESPONSE_CACHE_TTL", "5"))
+
+# "local" serves every Supabase call from the in-memory PostgREST stand-in
+# in benchmarks/local_supabase.py, with this much injected latency
+SUPABASE_BACKEND = os.getenv("ACQ_SUPABASE_BACKEND", "live")
+LOCAL_SUPABASE_LATENCY_MS = float(os.getenv("ACQ_LOCAL_SUPABASE_LATENCY_MS", "0"))
+LOCAL_SUPABASE_JITTER_MS = float(os.getenv("ACQ_LOCAL_SUPABASE_JITTER_MS", "0"))
+
+# "simulated" serves the Safari, Market Research, Claude and Telegram
+# calls from benchmarks/services.py. Latencies are multiplied by the scale.
+SERVICE_BACKEND = os.getenv("ACQ_SERVICE_BACKEND", "live")
+SIMULATED_LATENCY_SCALE = float(os.getenv("ACQ_SIM_LATENCY_SCALE", "1.0"))
+SIMULATED_FAILURE_RATE = float(os.getenv("ACQ_SIM_FAILURE_RATE", "0"))
+SIMULATED_SEED = int(os.getenv("ACQ_SIM_SEED", "7"))
+
+# Record the shared client's upstream exchanges to a gzipped NDJSON file
+# ("{pid}" is replaced), or answer from one instead of the network. Replay
+# waits each recorded latency divided by the speed (0 doesn't wait).
+HTTP_RECORD_PATH = os.getenv("ACQ_HTTP_RECORD", "")
+HTTP_REPLAY_PATH = os.getenv("ACQ_HTTP_REPLAY", "")
+HTTP_REPLAY_SPEED = float(os.getenv("ACQ_HTTP_REPLAY_SPEED", "1.0"))
+
 
 def get_supabase_headers() -> dict[str, str]:
     return {
@@ -0,0 +1,251 @@
+"""Content scanner: fills warmup rows ahead of time.
+
+schedule_warmups creates acq_warmup_schedules rows with an empty
+post_url and comment_text. Before those rows fall due, this stage:
+
+  1. marks rows still unfilled WARMUP_FILL_GRACE_HOURS past due as
+     skipped, then reads unfilled pending rows due within the lookahead
+  2. fetches recent posts for their contacts from the platform comment
+     services (serialized per browser through ServiceWorkerPool)
+  3. writes comments for many posts per Claude call
+  4. fills every row in one upsert
+
+so execute_warmups only has to post.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+
+import httpx
+
+from .config import (
+    ANTHROPIC_API_KEY,
+    COMMENT_GENERATION_MODEL,
+    WARMUP_FILL_GRACE_HOURS,
+    WARMUP_LOOKAHEAD_HOURS,
+)
+from .db.queries import (
+    fill_warmups,
+    get_contacts_by_ids,
+    get_unfilled_warmups,
+    get_used_warmup_posts,
+    skip_unfilled_warmups,
+)
+from .worker_pool import get_worker_pool, service_port
+
+logger = logging.getLogger(__name__)
+
+# Recent-post endpoints on each platform's comment service
+POST_ENDPOINTS = {
+    "instagram": "/api/profile/{handle}/posts",
+    "twitter": "/api/search?author={handle}&limit=20",
+    "tiktok": "/api/profile/{handle}/videos",
+    "threads": "/api/profile/{handle}/posts",
+}
+
+COMMENT_BATCH_SIZE = 10
+
+COMMENT_SYSTEM_PROMPT = """You write short comments on social media posts.
+Rules:
+- One or two sentences
+- Respond to something specific in the post
+- Add a thought or ask a genuine question; no praise-only comments
+- No links, no hashtags, no selling"""
+
+
+async def scan_content(
+    client: httpx.AsyncClient,
+    *,
+    lookahead_hours: float = WARMUP_LOOKAHEAD_HOURS,
+    limit: int = 200,
+    dry_run: bool = False,
+) -> dict:
+    """Fill post_url/comment_text for warmups due within the lookahead."""
+    now = datetime.now(timezone.utc)
+    expired = 0
+    if not dry_run:
+        expired = len(await skip_unfilled_warmups(
+            client, now - timedelta(hours=WARMUP_FILL_GRACE_HOURS)
+        ))
+        if expired:
+            logger.info(f"[content] Skipped {expired} warmups left unfilled past due")
+
+    warmups = await get_unfilled_warmups(client, now + timedelta(hours=lookahead_hours), limit=limit)
+    if not warmups:
+        return {
+            "unfilled": 0, "filled": 0, "expired": expired,
+            "posts_fetched": 0, "llm_calls": 0, "errors": [],
+        }
+
+    by_contact: dict[str, list[dict]] = {}
+    for w in warmups:
+        by_contact.setdefault(w["contact_id"], []).append(w)
+    contacts = {
+        c["id"]: c
+        for c in await get_contacts_by_ids(
+            client, list(by_contact), select="id,platform,username,name,bio"
+        )
+    }
+
+    posts, errors = await _fetch_all_posts(client, contacts.values())
+    used = await get_used_warmup_posts(client, list(posts))
+
+    # Give each of a contact's warmups a different post it hasn't been
+    # given on an earlier scan, soonest warmup first; rows left over wait
+    # for the next scan to find new posts.
+    assigned: list[tuple[dict, dict, dict]] = []
+    for contact_id, rows in by_contact.items():
+        contact = contacts.get(contact_id)
+        if contact is None:
+            continue
+        fresh = [p for p in posts.get(contact_id, []) if p["url"] not in used.get(contact_id, ())]
+        for row, post in zip(rows, fresh):
+            assigned.append((row, contact, post))
+
+    comments, llm_calls = await _generate_comments(client, [(c, p) for _, c, p in assigned])
+
+    filled = [
+        {
+            "id": row["id"],
+            "contact_id": row["contact_id"],
+            "platform": row["platform"],
+            "scheduled_at": row["scheduled_at"],
+            "post_url": post["url"],
+            "comment_text": comment,
+        }
+        for (row, _, post), comment in zip(assigned, comments)
+        if comment
+    ]
+    if dry_run:
+        logger.info(f"[content] Would fill {len(filled)}/{len(warmups)} warmups")
+    else:
+        await fill_warmups(client, filled)
+
+    return {
+        "unfilled": len(warmups),
+        "filled": len(filled),
+        "expired": expired,
+        "posts_fetched": sum(len(p) for p in posts.values()),
+        "llm_calls": llm_calls,
+        "errors": errors,
+    }
+
+
+async def _fetch_all_posts(
+    client: httpx.AsyncClient,
+    contacts,
+) -> tuple[dict[str, list[dict]], list[str]]:
+    """Recent posts per contact id, one request per contact."""
+    posts: dict[str, list[dict]] = {}
+    errors: list[str] = []
+
+    async def fetch(contact: dict, port: int):
+        try:
+            posts[contact["id"]] = await _fetch_posts(client, contact, port)
+        except Exception as e:
+            logger.warning(f"[content] Post fetch failed for {contact.get('username')}: {e}")
+            errors.append(f"{contact.get('username')}: {e}")
+
+    jobs = []
+    pool = get_worker_pool()
+    for contact in contacts:
+        platform = contact.get("platform", "")
+        port = service_port(platform, "comment")
+        if not port or platform not in POST_ENDPOINTS or not contact.get("username"):
+            continue
+        jobs.append(pool.submit(
+            platform, "comment", lambda c=contact, p=port: fetch(c, p)
+        ))
+    await asyncio.gather(*jobs, return_exceptions=True)
+    return posts, errors
+
+
+async def _fetch_posts(client: httpx.AsyncClient, contact: dict, port: int) -> list[dict]:
+    path = POST_ENDPOINTS[contact["platform"]].format(handle=quote(contact["username"]))
+    resp = await client.get(f"http://localhost:{port}{path}", timeout=45.0)
+    resp.raise_for_status()
+    data = resp.json()
+    if isinstance(data, dict):
+        data = data.get("posts") or data.get("videos") or data.get("results") or data.get("data") or []
+
+    posts = []
+    for item in data:
+        url = item.get("url") or item.get("postUrl") or item.get("link")
+        if url:
+            posts.append({
+                "url": url,
+                "text": item.get("text") or item.get("caption") or item.get("description") or "",
+            })
+    return posts
+
+
+async def _generate_comments(
+    client: httpx.AsyncClient,
+    items: list[tuple[dict, dict]],
+) -> tuple[list[str], int]:
+    """Comments for (contact, post) pairs, COMMENT_BATCH_SIZE per Claude call.
+
+    Returns the comments in input order and the number of calls made.
+    """
+    comments: list[str] = []
+    calls = 0
+    for start in range(0, len(items), COMMENT_BATCH_SIZE):
+        batch = items[start:start + COMMENT_BATCH_SIZE]
+        generated: list[str] = []
+        try:
+            calls += 1
+            generated = await _generate_comment_batch(client, batch)
+        except Exception as e:
+            logger.warning(f"Claude comment generation failed, using templates: {e}")
+        comments.extend(
+            generated[i] if i < len(generated) and generated[i] else _template_comment(post)
+            for i, (_, post) in enumerate(batch)
+        )
+    return comments, calls
+
+
+async def _generate_comment_batch(
+    client: httpx.AsyncClient,
+    batch: list[tuple[dict, dict]],
+) -> list[str]:
+    posts = "\n\n".join(
+        f"[{i}] {contact.get('name') or contact.get('username')} on {contact.get('platform')}:\n"
+        f"{post['text'][:600] or '(no caption)'}"
+        for i, (contact, post) in enumerate(batch)
+    )
+    prompt = f"""Write one comment for each post below.
+
+{posts}
+
+Return ONLY a JSON array of {len(batch)} strings, comment [i] for post [i]."""
+
+    resp = await client.post(
+        "https://api.anthropic.com/v1/messages",
+        headers={
+            "x-api-key": ANTHROPIC_API_KEY,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        },
+        json={
+            "model": COMMENT_GENERATION_MODEL,
+            "max_tokens": 120 * len(batch),
+            "system": COMMENT_SYSTEM_PROMPT,
+            "messages": [{"role": "user", "content": prompt}],
+        },
+        timeout=30.0,
+    )
+    resp.raise_for_status()
+    text = resp.json()["content"][0]["text"]
+    start, end = text.find("["), text.rfind("]")
+    parsed = json.loads(text[start:end + 1]) if start != -1 and end > start else []
+    return [str(c).strip() if c else "" for c in parsed]
+
+
+def _template_comment(post: dict) -> str:
+    """Fallback when Claude is unavailable."""
+    if post.get("text"):
+        return "Really interesting take. What got you thinking about this?"
+    return "Love this. What's the story behind it?"
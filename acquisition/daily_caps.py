@@ -90,3 +90,79 @@ async def increment_cap(
     )
     resp.raise_for_status()
     return new_count
+
+
+class CapLedger:
+    """In-memory view of today's caps for one run.
+
+    Loads every platform/action count in one request, then reserves
+    sends locally so concurrent workers can't overshoot a cap between a
+    check and its increment. commit() persists a send with the atomic
+    acq_increment_cap RPC; release() hands back a reservation whose send
+    didn't happen.
+    """
+
+    def __init__(self, counts: dict[tuple[str, str], int] | None = None, *, day: date | None = None):
+        self.day = day or date.today()
+        self.caps = DEFAULT_DAILY_CAPS
+        self._counts = dict(counts or {})
+        self._reserved: dict[tuple[str, str], int] = {}
+
+    @classmethod
+    async def load(cls, client: httpx.AsyncClient, day: date | None = None) -> "CapLedger":
+        day = day or date.today()
+        resp = await client.get(
+            f"{SUPABASE_URL}/rest/v1/acq_daily_caps",
+            headers=get_supabase_headers(),
+            params={
+                "cap_date": f"eq.{day.isoformat()}",
+                "select": "platform,action,current_count",
+            },
+        )
+        resp.raise_for_status()
+        return cls({(r["platform"], r["action"]): r["current_count"] for r in resp.json()}, day=day)
+
+    def limit(self, platform: str, action: str) -> int:
+        return self.caps.get(platform, {}).get(action, 0)
+
+    def used(self, platform: str, action: str) -> int:
+        key = (platform, action)
+        return self._counts.get(key, 0) + self._reserved.get(key, 0)
+
+    def reserve(self, platform: str, action: str) -> tuple[bool, int, int]:
+        """Claim one send. Returns (allowed, used_before, daily_limit)."""
+        used, limit = self.used(platform, action), self.limit(platform, action)
+        if used >= limit:
+            return False, used, limit
+        key = (platform, action)
+        self._reserved[key] = self._reserved.get(key, 0) + 1
+        return True, used, limit
+
+    def release(self, platform: str, action: str):
+        key = (platform, action)
+        if self._reserved.get(key, 0) > 0:
+            self._reserved[key] -= 1
+
+    async def commit(self, client: httpx.AsyncClient, platform: str, action: str) -> int:
+        """Persist one reserved send. Returns the stored count."""
+        key = (platform, action)
+        resp = await client.post(
+            f"{SUPABASE_URL}/rest/v1/rpc/acq_increment_cap",
+            headers=get_supabase_headers(),
+            json={
+                "platform": platform,
+                "action": action,
+                "cap_date": self.day.isoformat(),
+                "daily_limit": self.limit(platform, action),
+            },
+        )
+        if resp.status_code == 404:
+            # RPC not deployed
+            count = await increment_cap(client, platform, action)
+        else:
+            resp.raise_for_status()
+            count = resp.json()
+        self.release(platform, action)
+        # Take the stored value: it includes other processes' sends
+        self._counts[key] = max(int(count), self._counts.get(key, 0) + 1)
+        return self._counts[key]
@@ -0,0 +1,12 @@
+-- Funnel snapshot in one round trip: all stage counts from a single GROUP BY
+
+CREATE INDEX IF NOT EXISTS idx_crm_contacts_pipeline_stage ON crm_contacts(pipeline_stage);
+
+CREATE OR REPLACE FUNCTION acq_funnel_stage_counts()
+RETURNS TABLE (pipeline_stage TEXT, count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT c.pipeline_stage, COUNT(*)::BIGINT
+    FROM crm_contacts c
+    GROUP BY c.pipeline_stage;
+$$;
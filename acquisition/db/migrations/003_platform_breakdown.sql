@@ -0,0 +1,21 @@
+-- Per-platform funnel activity aggregated server-side instead of shipping
+-- every acq_funnel_events row to the client
+
+CREATE INDEX IF NOT EXISTS idx_funnel_events_created_id ON acq_funnel_events(created_at, id);
+
+CREATE OR REPLACE FUNCTION acq_platform_breakdown(
+    since TIMESTAMPTZ,
+    until TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE (platform TEXT, to_stage TEXT, count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        COALESCE(e.metadata->>'platform', 'unknown') AS platform,
+        e.to_stage,
+        COUNT(*)::BIGINT
+    FROM acq_funnel_events e
+    WHERE e.created_at >= since
+      AND (until IS NULL OR e.created_at < until)
+    GROUP BY 1, 2;
+$$;
@@ -0,0 +1,145 @@
+-- Hourly and daily funnel rollups maintained incrementally from
+-- acq_funnel_events, so reports read a few pre-aggregated rows instead of
+-- rescanning raw history. Buckets are UTC.
+
+CREATE TABLE IF NOT EXISTS acq_funnel_rollup_hourly (
+    bucket TIMESTAMPTZ NOT NULL,
+    niche_id TEXT NOT NULL DEFAULT '',
+    platform TEXT NOT NULL DEFAULT 'unknown',
+    from_stage TEXT NOT NULL,
+    to_stage TEXT NOT NULL,
+    event_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, niche_id, platform, from_stage, to_stage)
+);
+
+CREATE TABLE IF NOT EXISTS acq_funnel_rollup_daily (
+    bucket DATE NOT NULL,
+    niche_id TEXT NOT NULL DEFAULT '',
+    platform TEXT NOT NULL DEFAULT 'unknown',
+    from_stage TEXT NOT NULL,
+    to_stage TEXT NOT NULL,
+    event_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, niche_id, platform, from_stage, to_stage)
+);
+
+-- Statement-level trigger: one upsert per statement, grouped over the
+-- inserted rows, so bulk event inserts cost a single rollup write.
+CREATE OR REPLACE FUNCTION acq_funnel_rollup_apply()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO acq_funnel_rollup_hourly AS r
+        (bucket, niche_id, platform, from_stage, to_stage, event_count)
+    SELECT
+        date_trunc('hour', n.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+        COALESCE(n.metadata->>'niche_id', c.niche_id, ''),
+        COALESCE(n.metadata->>'platform', c.platform, 'unknown'),
+        n.from_stage,
+        n.to_stage,
+        COUNT(*)
+    FROM new_rows n
+    LEFT JOIN crm_contacts c ON c.id = n.contact_id
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (bucket, niche_id, platform, from_stage, to_stage)
+    DO UPDATE SET event_count = r.event_count + EXCLUDED.event_count;
+
+    INSERT INTO acq_funnel_rollup_daily AS r
+        (bucket, niche_id, platform, from_stage, to_stage, event_count)
+    SELECT
+        (n.created_at AT TIME ZONE 'UTC')::DATE,
+        COALESCE(n.metadata->>'niche_id', c.niche_id, ''),
+        COALESCE(n.metadata->>'platform', c.platform, 'unknown'),
+        n.from_stage,
+        n.to_stage,
+        COUNT(*)
+    FROM new_rows n
+    LEFT JOIN crm_contacts c ON c.id = n.contact_id
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (bucket, niche_id, platform, from_stage, to_stage)
+    DO UPDATE SET event_count = r.event_count + EXCLUDED.event_count;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_acq_funnel_rollup ON acq_funnel_events;
+CREATE TRIGGER trg_acq_funnel_rollup
+    AFTER INSERT ON acq_funnel_events
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION acq_funnel_rollup_apply();
+
+-- Backfill from existing history (idempotent: rebuilds both tables)
+TRUNCATE acq_funnel_rollup_hourly, acq_funnel_rollup_daily;
+
+INSERT INTO acq_funnel_rollup_hourly (bucket, niche_id, platform, from_stage, to_stage, event_count)
+SELECT
+    date_trunc('hour', e.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    COALESCE(e.metadata->>'niche_id', c.niche_id, ''),
+    COALESCE(e.metadata->>'platform', c.platform, 'unknown'),
+    e.from_stage,
+    e.to_stage,
+    COUNT(*)
+FROM acq_funnel_events e
+LEFT JOIN crm_contacts c ON c.id = e.contact_id
+GROUP BY 1, 2, 3, 4, 5;
+
+INSERT INTO acq_funnel_rollup_daily (bucket, niche_id, platform, from_stage, to_stage, event_count)
+SELECT (bucket AT TIME ZONE 'UTC')::DATE, niche_id, platform, from_stage, to_stage, SUM(event_count)
+FROM acq_funnel_rollup_hourly
+GROUP BY 1, 2, 3, 4, 5;
+
+-- Ad-hoc time-range query over the rollups. Whole-day ranges read the
+-- daily table; anything else reads hourly buckets.
+CREATE OR REPLACE FUNCTION acq_funnel_rollups(
+    since TIMESTAMPTZ,
+    until TIMESTAMPTZ DEFAULT NULL,
+    granularity TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    bucket TIMESTAMPTZ,
+    niche_id TEXT,
+    platform TEXT,
+    from_stage TEXT,
+    to_stage TEXT,
+    count BIGINT
+)
+LANGUAGE plpgsql STABLE
+AS $$
+DECLARE
+    use_daily BOOLEAN;
+BEGIN
+    use_daily := COALESCE(granularity = 'day',
+        date_trunc('day', since AT TIME ZONE 'UTC') = since AT TIME ZONE 'UTC'
+        AND (until IS NULL OR date_trunc('day', until AT TIME ZONE 'UTC') = until AT TIME ZONE 'UTC'));
+
+    IF use_daily THEN
+        RETURN QUERY
+        SELECT d.bucket::TIMESTAMP AT TIME ZONE 'UTC', d.niche_id, d.platform,
+               d.from_stage, d.to_stage, d.event_count
+        FROM acq_funnel_rollup_daily d
+        WHERE d.bucket >= (since AT TIME ZONE 'UTC')::DATE
+          AND (until IS NULL OR d.bucket < (until AT TIME ZONE 'UTC')::DATE);
+    ELSE
+        RETURN QUERY
+        SELECT h.bucket, h.niche_id, h.platform, h.from_stage, h.to_stage, h.event_count
+        FROM acq_funnel_rollup_hourly h
+        WHERE h.bucket >= date_trunc('hour', since AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+          AND (until IS NULL OR h.bucket < until);
+    END IF;
+END;
+$$;
+
+-- Platform breakdown now reads the rollups instead of raw events
+CREATE OR REPLACE FUNCTION acq_platform_breakdown(
+    since TIMESTAMPTZ,
+    until TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE (platform TEXT, to_stage TEXT, count BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT r.platform, r.to_stage, SUM(r.count)::BIGINT
+    FROM acq_funnel_rollups(since, until) r
+    GROUP BY 1, 2;
+$$;
@@ -0,0 +1,37 @@
+-- Bulk pipeline stage transitions: stage patches and funnel events for a
+-- whole batch in one transaction. A transition only applies if the
+-- contact is still in its from_stage, so a concurrent move makes that row
+-- "stale" instead of overwriting it.
+
+CREATE OR REPLACE FUNCTION acq_bulk_transition(transitions JSONB)
+RETURNS TABLE (contact_id UUID, from_stage TEXT, to_stage TEXT, status TEXT)
+LANGUAGE sql
+AS $$
+    WITH input AS (
+        SELECT *
+        FROM jsonb_to_recordset(transitions)
+            AS t(contact_id UUID, from_stage TEXT, to_stage TEXT, triggered_by TEXT, metadata JSONB)
+    ),
+    updated AS (
+        UPDATE crm_contacts c
+        SET pipeline_stage = i.to_stage,
+            updated_at = NOW(),
+            archived_at = CASE WHEN i.to_stage = 'archived' THEN NOW() ELSE c.archived_at END
+        FROM input i
+        WHERE c.id = i.contact_id
+          AND c.pipeline_stage = i.from_stage
+        RETURNING c.id
+    ),
+    logged AS (
+        INSERT INTO acq_funnel_events (contact_id, from_stage, to_stage, triggered_by, metadata)
+        SELECT i.contact_id, i.from_stage, i.to_stage,
+               COALESCE(i.triggered_by, 'automation'), COALESCE(i.metadata, '{}'::JSONB)
+        FROM input i
+        JOIN updated u ON u.id = i.contact_id
+        RETURNING 1
+    )
+    SELECT i.contact_id, i.from_stage, i.to_stage,
+           CASE WHEN u.id IS NOT NULL THEN 'applied' ELSE 'stale' END
+    FROM input i
+    LEFT JOIN updated u ON u.id = i.contact_id;
+$$;
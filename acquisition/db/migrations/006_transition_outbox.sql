@@ -0,0 +1,82 @@
+-- Atomic contact writes: stage changes and their funnel events never
+-- land separately.
+--
+-- acq_transition_contact: one transition (stage patch + event) in one
+-- statement; batches go through acq_bulk_transition (005).
+-- acq_seed_contact: upsert a discovered contact on (platform,
+-- platform_id) and log its → 'new' event together, returning the row so
+-- callers get the real id.
+
+CREATE OR REPLACE FUNCTION acq_transition_contact(
+    contact_id UUID,
+    from_stage TEXT,
+    to_stage TEXT,
+    triggered_by TEXT DEFAULT 'automation',
+    metadata JSONB DEFAULT '{}'
+)
+RETURNS TEXT
+LANGUAGE sql
+AS $$
+    SELECT t.status
+    FROM acq_bulk_transition(jsonb_build_array(jsonb_build_object(
+        'contact_id', contact_id,
+        'from_stage', from_stage,
+        'to_stage', to_stage,
+        'triggered_by', triggered_by,
+        'metadata', metadata
+    ))) t;
+$$;
+
+CREATE OR REPLACE FUNCTION acq_seed_contact(
+    contact JSONB,
+    triggered_by TEXT DEFAULT 'automation',
+    event_metadata JSONB DEFAULT '{}'
+)
+RETURNS SETOF crm_contacts
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    payload JSONB;
+    cols TEXT;
+    updates TEXT;
+    previous TEXT;
+    seeded crm_contacts;
+BEGIN
+    -- Same semantics as the merge-duplicates upsert it replaces: only the
+    -- keys the caller sent are written, on insert and on conflict alike.
+    payload := jsonb_build_object('source', triggered_by)
+        || jsonb_strip_nulls(contact)
+        || jsonb_build_object('pipeline_stage', 'new', 'updated_at', now());
+
+    SELECT string_agg(quote_ident(a.attname), ', '),
+           string_agg(format('%1$I = EXCLUDED.%1$I', a.attname), ', ')
+    INTO cols, updates
+    FROM pg_attribute a
+    WHERE a.attrelid = 'crm_contacts'::regclass
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+      AND payload ? a.attname;
+
+    -- A re-seeded archived contact logs archived → new, not none → new
+    SELECT c.pipeline_stage INTO previous
+    FROM crm_contacts c
+    WHERE c.platform = payload->>'platform'
+      AND c.platform_id = payload->>'platform_id'
+    FOR UPDATE;
+
+    EXECUTE format(
+        'INSERT INTO crm_contacts (%1$s) '
+        'SELECT %1$s FROM jsonb_populate_record(NULL::crm_contacts, $1) '
+        'ON CONFLICT (platform, platform_id) DO UPDATE SET %2$s '
+        'RETURNING *',
+        cols, updates
+    )
+    INTO seeded
+    USING payload;
+
+    INSERT INTO acq_funnel_events (contact_id, from_stage, to_stage, triggered_by, metadata)
+    VALUES (seeded.id, COALESCE(previous, 'none'), 'new', triggered_by, COALESCE(event_metadata, '{}'::JSONB));
+
+    RETURN NEXT seeded;
+END;
+$$;
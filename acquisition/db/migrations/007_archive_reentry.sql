@@ -0,0 +1,7 @@
+-- Archive re-entry sweep: partial index over archived contacts only,
+-- ordered for keyset paging by (archived_at, id), so finding contacts
+-- whose cooldown expired is a range scan however large the CRM grows.
+
+CREATE INDEX IF NOT EXISTS idx_crm_contacts_archived_reentry
+    ON crm_contacts(archived_at, id)
+    WHERE pipeline_stage = 'archived';
@@ -0,0 +1,76 @@
+-- Incremental warmup counters for warming → ready_for_dm promotion.
+-- crm_contacts.warmup_comments_sent is bumped in the same statement that
+-- marks a warmup sent, so promotion reads one indexed column instead of
+-- re-counting acq_warmup_schedules.
+
+ALTER TABLE crm_contacts ADD COLUMN IF NOT EXISTS warmup_comments_sent INT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_crm_contacts_warming_progress
+    ON crm_contacts(niche_id, warmup_comments_sent)
+    WHERE pipeline_stage = 'warming';
+
+-- Backfill from sent warmups of contacts currently warming
+UPDATE crm_contacts c
+SET warmup_comments_sent = s.sent
+FROM (
+    SELECT contact_id, COUNT(*)::INT AS sent
+    FROM acq_warmup_schedules
+    WHERE status = 'sent'
+    GROUP BY contact_id
+) s
+WHERE c.id = s.contact_id
+  AND c.pipeline_stage = 'warming';
+
+CREATE OR REPLACE FUNCTION acq_record_warmup_sent(warmup_id UUID)
+RETURNS TABLE (contact_id UUID, warmup_comments_sent INT)
+LANGUAGE sql
+AS $$
+    WITH sent AS (
+        UPDATE acq_warmup_schedules w
+        SET status = 'sent', sent_at = NOW()
+        WHERE w.id = warmup_id
+          AND w.status <> 'sent'
+        RETURNING w.contact_id
+    )
+    UPDATE crm_contacts c
+    SET warmup_comments_sent = c.warmup_comments_sent + 1
+    FROM sent
+    WHERE c.id = sent.contact_id
+    RETURNING c.id, c.warmup_comments_sent;
+$$;
+
+-- Entering warming starts a fresh count (re-entered contacts keep the
+-- column from their previous pass otherwise).
+CREATE OR REPLACE FUNCTION acq_bulk_transition(transitions JSONB)
+RETURNS TABLE (contact_id UUID, from_stage TEXT, to_stage TEXT, status TEXT)
+LANGUAGE sql
+AS $$
+    WITH input AS (
+        SELECT *
+        FROM jsonb_to_recordset(transitions)
+            AS t(contact_id UUID, from_stage TEXT, to_stage TEXT, triggered_by TEXT, metadata JSONB)
+    ),
+    updated AS (
+        UPDATE crm_contacts c
+        SET pipeline_stage = i.to_stage,
+            updated_at = NOW(),
+            archived_at = CASE WHEN i.to_stage = 'archived' THEN NOW() ELSE c.archived_at END,
+            warmup_comments_sent = CASE WHEN i.to_stage = 'warming' THEN 0 ELSE c.warmup_comments_sent END
+        FROM input i
+        WHERE c.id = i.contact_id
+          AND c.pipeline_stage = i.from_stage
+        RETURNING c.id
+    ),
+    logged AS (
+        INSERT INTO acq_funnel_events (contact_id, from_stage, to_stage, triggered_by, metadata)
+        SELECT i.contact_id, i.from_stage, i.to_stage,
+               COALESCE(i.triggered_by, 'automation'), COALESCE(i.metadata, '{}'::JSONB)
+        FROM input i
+        JOIN updated u ON u.id = i.contact_id
+        RETURNING 1
+    )
+    SELECT i.contact_id, i.from_stage, i.to_stage,
+           CASE WHEN u.id IS NOT NULL THEN 'applied' ELSE 'stale' END
+    FROM input i
+    LEFT JOIN updated u ON u.id = i.contact_id;
+$$;
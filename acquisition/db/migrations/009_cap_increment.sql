@@ -0,0 +1,20 @@
+-- Atomic daily cap increment: one upsert instead of read-then-write, so
+-- concurrent senders can't lose increments.
+
+CREATE OR REPLACE FUNCTION acq_increment_cap(
+    platform TEXT,
+    action TEXT,
+    cap_date DATE,
+    daily_limit INT,
+    amount INT DEFAULT 1
+)
+RETURNS INT
+LANGUAGE sql
+AS $$
+    INSERT INTO acq_daily_caps AS c (platform, action, cap_date, daily_limit, current_count)
+    VALUES (platform, action, cap_date, daily_limit, amount)
+    ON CONFLICT (platform, action, cap_date)
+    DO UPDATE SET current_count = c.current_count + EXCLUDED.current_count,
+                  updated_at = NOW()
+    RETURNING current_count;
+$$;
@@ -0,0 +1,21 @@
+-- Niche config change tracking for NicheCache's high-water-mark poll:
+-- every update bumps updated_at, and the poll reads rows past the mark
+-- off an index.
+
+CREATE INDEX IF NOT EXISTS idx_niche_configs_updated ON acq_niche_configs(updated_at);
+
+CREATE OR REPLACE FUNCTION acq_touch_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_acq_niche_configs_touch ON acq_niche_configs;
+CREATE TRIGGER trg_acq_niche_configs_touch
+    BEFORE UPDATE ON acq_niche_configs
+    FOR EACH ROW
+    EXECUTE FUNCTION acq_touch_updated_at();
@@ -0,0 +1,54 @@
+-- Cross-process run locks for single-flight orchestrator phases.
+--
+-- PostgREST runs each call in its own transaction, so a session advisory
+-- lock can't be held for the length of a phase. Instead a lease row is
+-- taken under a transaction-scoped advisory lock and renewed while the
+-- phase runs; an expired lease (crashed holder) can be taken over.
+
+CREATE TABLE IF NOT EXISTS acq_run_locks (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    acquired_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Take or renew a lease. Returns the holder after the call: lock_holder
+-- if the lease is ours, otherwise whoever still holds it.
+CREATE OR REPLACE FUNCTION acq_try_run_lock(
+    lock_name TEXT,
+    lock_holder TEXT,
+    ttl_seconds INT
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    current_holder TEXT;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('acq_run_lock:' || lock_name));
+
+    INSERT INTO acq_run_locks AS l (name, holder, acquired_at, expires_at)
+    VALUES (lock_name, lock_holder, NOW(), NOW() + make_interval(secs => ttl_seconds))
+    ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder,
+            acquired_at = CASE WHEN l.holder = EXCLUDED.holder THEN l.acquired_at ELSE NOW() END,
+            expires_at = EXCLUDED.expires_at
+        WHERE l.holder = EXCLUDED.holder OR l.expires_at < NOW();
+
+    SELECT holder INTO current_holder FROM acq_run_locks WHERE name = lock_name;
+    RETURN current_holder;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION acq_release_run_lock(
+    lock_name TEXT,
+    lock_holder TEXT
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM acq_run_locks WHERE name = lock_name AND holder = lock_holder;
+    RETURN FOUND;
+END;
+$$;
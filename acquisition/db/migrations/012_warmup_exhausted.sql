@@ -0,0 +1,32 @@
+-- Warming contacts with no pending warmups left.
+--
+-- Warmups that fail or are skipped never reach warmup_comments_sent, so a
+-- contact whose rows have all run out would otherwise stay in warming.
+-- Contacts that entered warming within settle_seconds are left alone:
+-- their schedule rows are inserted right after the transition.
+
+CREATE INDEX IF NOT EXISTS idx_warmup_schedules_contact_pending
+    ON acq_warmup_schedules(contact_id)
+    WHERE status = 'pending';
+
+CREATE OR REPLACE FUNCTION acq_exhausted_warming_contacts(
+    settle_seconds INT DEFAULT 600,
+    max_rows INT DEFAULT 500
+)
+RETURNS TABLE (id UUID, niche_id TEXT, platform TEXT, warmup_comments_sent INT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.id, c.niche_id, c.platform, c.warmup_comments_sent
+    FROM crm_contacts c
+    WHERE c.pipeline_stage = 'warming'
+      AND c.updated_at < NOW() - make_interval(secs => settle_seconds)
+      AND NOT EXISTS (
+          SELECT 1
+          FROM acq_warmup_schedules w
+          WHERE w.contact_id = c.id
+            AND w.status = 'pending'
+      )
+    ORDER BY c.updated_at, c.id
+    LIMIT max_rows;
+$$;
@@ -1,7 +1,7 @@
 """Typed SQL query functions for the Acquisition Agent."""
 
 from datetime import date, datetime, timezone
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 import httpx
 
@@ -29,6 +29,22 @@ async def _request(
     return resp.json()
 
 
+async def _rpc(
+    client: httpx.AsyncClient,
+    function: str,
+    payload: dict | None = None,
+) -> Any:
+    resp = await client.post(
+        f"{SUPABASE_URL}/rest/v1/rpc/{function}",
+        headers=get_supabase_headers(),
+        json=payload or {},
+    )
+    resp.raise_for_status()
+    if resp.status_code == 204:
+        return []
+    return resp.json()
+
+
 # --- crm_contacts ---
 
 async def get_contacts_by_stage(
@@ -49,7 +65,13 @@ async def update_contact_stage(
     contact_id: str,
     new_stage: str,
     triggered_by: str = "automation",
+    *,
+    from_stage: str | None = None,
 ) -> list[dict]:
+    """Set a contact's stage; with from_stage, only if it is still there.
+
+    Returns the updated rows (empty when from_stage no longer matched).
+    """
     now = datetime.now(timezone.utc).isoformat()
     update_data: dict[str, Any] = {
         "pipeline_stage": new_stage,
@@ -58,10 +80,72 @@ async def update_contact_stage(
     if new_stage == "archived":
         update_data["archived_at"] = now
 
-    result = await _request(client, "PATCH", "crm_contacts", params={
-        "id": f"eq.{contact_id}",
-    }, json=update_data)
-    return result
+    params = {"id": f"eq.{contact_id}", "select": "id"}
+    if from_stage is not None:
+        params["pipeline_stage"] = f"eq.{from_stage}"
+    return await _request(client, "PATCH", "crm_contacts", params=params, json=update_data)
+
+
+async def bulk_transition(
+    client: httpx.AsyncClient,
+    transitions: list[dict],
+) -> list[dict]:
+    """Apply stage patches + funnel events in one transaction.
+
+    Each row: contact_id, from_stage, to_stage, triggered_by, metadata.
+    Returns one {contact_id, from_stage, to_stage, status} per row, with
+    status "applied" or "stale" (contact no longer in from_stage).
+    """
+    return await _rpc(client, "acq_bulk_transition", {"transitions": transitions})
+
+
+async def get_stage_counts(
+    client: httpx.AsyncClient,
+) -> dict[str, int]:
+    """Contact count per pipeline_stage via the acq_funnel_stage_counts RPC."""
+    rows = await _rpc(client, "acq_funnel_stage_counts")
+    return {row["pipeline_stage"]: int(row["count"]) for row in rows}
+
+
+async def get_reentry_candidates(
+    client: httpx.AsyncClient,
+    cutoff: datetime,
+    *,
+    after: tuple[str, str] | None = None,
+    limit: int = 500,
+) -> list[dict]:
+    """Archived contacts with archived_at <= cutoff, in (archived_at, id) order.
+
+    `after` is the (archived_at, id) of the last row of the previous page
+    (keyset paging over idx_crm_contacts_archived_reentry).
+    """
+    params = {
+        "pipeline_stage": "eq.archived",
+        "archived_at": f"lte.{cutoff.isoformat()}",
+        "select": "id,archived_at,platform,niche_id",
+        "order": "archived_at.asc,id.asc",
+        "limit": str(limit),
+    }
+    if after is not None:
+        archived_at, contact_id = after
+        params["or"] = (
+            f"(archived_at.gt.{archived_at},"
+            f"and(archived_at.eq.{archived_at},id.gt.{contact_id}))"
+        )
+    return await _request(client, "GET", "crm_contacts", params=params)
+
+
+async def get_contacts_by_ids(
+    client: httpx.AsyncClient,
+    contact_ids: list[str],
+    select: str = "*",
+) -> list[dict]:
+    if not contact_ids:
+        return []
+    return await _request(client, "GET", "crm_contacts", params={
+        "id": f"in.({','.join(contact_ids)})",
+        "select": select,
+    })
 
 
 async def check_contact_exists(
@@ -87,12 +171,53 @@ async def upsert_contact(
     resp = await client.post(
         f"{SUPABASE_URL}/rest/v1/crm_contacts",
         headers=headers,
+        params={"on_conflict": "platform,platform_id"},
         json=contact_data,
     )
     resp.raise_for_status()
     return resp.json()
 
 
+async def seed_contact(
+    client: httpx.AsyncClient,
+    contact_data: dict,
+    triggered_by: str = "automation",
+    metadata: dict | None = None,
+) -> dict:
+    """Upsert a contact as 'new' and log its → 'new' event atomically.
+
+    Conflicts on (platform, platform_id) merge into the existing row,
+    like upsert_contact. Returns the crm_contacts row (with its real id).
+    """
+    rows = await _rpc(client, "acq_seed_contact", {
+        "contact": contact_data,
+        "triggered_by": triggered_by,
+        "event_metadata": metadata or {},
+    })
+    return rows[0] if isinstance(rows, list) else rows
+
+
+async def transition_contact(
+    client: httpx.AsyncClient,
+    contact_id: str,
+    from_stage: str,
+    to_stage: str,
+    triggered_by: str = "automation",
+    metadata: dict | None = None,
+) -> str:
+    """Apply one stage change + funnel event atomically.
+
+    Returns "applied", or "stale" if the contact is no longer in from_stage.
+    """
+    return await _rpc(client, "acq_transition_contact", {
+        "contact_id": contact_id,
+        "from_stage": from_stage,
+        "to_stage": to_stage,
+        "triggered_by": triggered_by,
+        "metadata": metadata or {},
+    })
+
+
 # --- acq_funnel_events ---
 
 async def log_funnel_event(
@@ -112,6 +237,100 @@ async def log_funnel_event(
     })
 
 
+async def get_platform_stage_counts(
+    client: httpx.AsyncClient,
+    since: datetime,
+    until: datetime | None = None,
+) -> list[dict]:
+    """Funnel event counts grouped by metadata->>platform and to_stage."""
+    return await _rpc(client, "acq_platform_breakdown", {
+        "since": since.isoformat(),
+        "until": until.isoformat() if until else None,
+    })
+
+
+async def get_funnel_rollups(
+    client: httpx.AsyncClient,
+    since: datetime,
+    until: datetime | None = None,
+    granularity: str | None = None,
+) -> list[dict]:
+    """Rollup rows (bucket, niche_id, platform, from_stage, to_stage, count).
+
+    granularity is "hour" or "day"; by default whole-day ranges read the
+    daily rollup and anything else the hourly one. Buckets are whole: a
+    since inside a bucket includes that entire bucket, so pass aligned
+    bounds (reporting_agent.get_funnel_activity reads partial edges from
+    raw events).
+    """
+    return await _rpc(client, "acq_funnel_rollups", {
+        "since": since.isoformat(),
+        "until": until.isoformat() if until else None,
+        "granularity": granularity,
+    })
+
+
+async def iter_funnel_events(
+    client: httpx.AsyncClient,
+    since: datetime,
+    until: datetime | None = None,
+    *,
+    select: str = "*",
+    page_size: int = 1000,
+) -> AsyncIterator[list[dict]]:
+    """Yield acq_funnel_events pages in (created_at, id) order.
+
+    Pages stay under the PostgREST max-rows limit, so large windows are
+    read in full instead of being silently truncated.
+    """
+    until = until or datetime.now(timezone.utc)
+    async for page in iter_rows(
+        client,
+        "acq_funnel_events",
+        params={
+            "and": f"(created_at.gte.{since.isoformat()},created_at.lt.{until.isoformat()})",
+            "select": select,
+        },
+        cursor="created_at",
+        page_size=page_size,
+    ):
+        yield page
+
+
+async def iter_rows(
+    client: httpx.AsyncClient,
+    table: str,
+    *,
+    params: dict,
+    cursor: str,
+    page_size: int = 1000,
+) -> AsyncIterator[list[dict]]:
+    """Yield pages of any table in (cursor, id) order, keyset-paged.
+
+    Each page starts after the last (cursor, id) seen, so reads stay an
+    index range scan however deep they go, and rows inserted meanwhile
+    don't shift later pages. `cursor` and id are added to a narrowed
+    select; params must not set "order" or "or".
+    """
+    select = params.get("select", "*")
+    if select != "*":
+        columns = select.split(",")
+        select = ",".join(columns + [c for c in (cursor, "id") if c not in columns])
+    base = {**params, "select": select, "order": f"{cursor}.asc,id.asc", "limit": str(page_size)}
+    after: tuple[str, str] | None = None
+    while True:
+        page_params = dict(base)
+        if after is not None:
+            value, row_id = after
+            page_params["or"] = f"({cursor}.gt.{value},and({cursor}.eq.{value},id.gt.{row_id}))"
+        page = await _request(client, "GET", table, params=page_params)
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after = (page[-1][cursor], page[-1]["id"])
+
+
 # --- acq_discovery_runs ---
 
 async def log_discovery_run(
@@ -143,17 +362,123 @@ async def log_discovery_run(
 async def get_pending_warmups(
     client: httpx.AsyncClient,
     limit: int = 20,
+    *,
+    after: tuple[str, str] | None = None,
 ) -> list[dict]:
+    """Due, filled pending warmups in (scheduled_at, id) order.
+
+    `after` is the (scheduled_at, id) of the last row of the previous
+    page; rows left pending (capped, paced) don't come back on later pages.
+    """
     now = datetime.now(timezone.utc).isoformat()
-    return await _request(client, "GET", "acq_warmup_schedules", params={
+    params = {
         "status": "eq.pending",
         "scheduled_at": f"lte.{now}",
+        # Rows the content scanner has not filled yet aren't sendable
+        "post_url": "neq.",
         "select": "*",
         "limit": str(limit),
+        "order": "scheduled_at.asc,id.asc",
+    }
+    if after is not None:
+        scheduled_at, warmup_id = after
+        params["or"] = (
+            f"(scheduled_at.gt.{scheduled_at},"
+            f"and(scheduled_at.eq.{scheduled_at},id.gt.{warmup_id}))"
+        )
+    return await _request(client, "GET", "acq_warmup_schedules", params=params)
+
+
+async def get_warmups_by_ids(
+    client: httpx.AsyncClient,
+    warmup_ids: list[str],
+    select: str = "*",
+) -> list[dict]:
+    if not warmup_ids:
+        return []
+    return await _request(client, "GET", "acq_warmup_schedules", params={
+        "id": f"in.({','.join(warmup_ids)})",
+        "select": select,
+    })
+
+
+async def get_unfilled_warmups(
+    client: httpx.AsyncClient,
+    until: datetime,
+    limit: int = 200,
+) -> list[dict]:
+    """Pending warmups without a post/comment yet, due by `until`."""
+    return await _request(client, "GET", "acq_warmup_schedules", params={
+        "status": "eq.pending",
+        "post_url": "eq.",
+        "scheduled_at": f"lte.{until.isoformat()}",
+        "select": "id,contact_id,platform,scheduled_at",
+        "limit": str(limit),
         "order": "scheduled_at.asc",
     })
 
 
+async def skip_unfilled_warmups(
+    client: httpx.AsyncClient,
+    before: datetime,
+) -> list[dict]:
+    """Mark pending warmups still without a post by `before` as skipped.
+
+    Left pending, rows the scanner never finds a post for would keep
+    the head of get_unfilled_warmups (soonest first) and starve newer rows.
+    """
+    return await _request(client, "PATCH", "acq_warmup_schedules", params={
+        "status": "eq.pending",
+        "post_url": "eq.",
+        "scheduled_at": f"lt.{before.isoformat()}",
+        "select": "id,contact_id",
+    }, json={
+        "status": "skipped",
+        "error": "No post found before the warmup was due",
+    })
+
+
+async def get_used_warmup_posts(
+    client: httpx.AsyncClient,
+    contact_ids: list[str],
+) -> dict[str, set[str]]:
+    """post_urls already on each contact's warmup rows, any status."""
+    used: dict[str, set[str]] = {}
+    if not contact_ids:
+        return used
+    async for page in iter_rows(client, "acq_warmup_schedules", params={
+        "contact_id": f"in.({','.join(contact_ids)})",
+        "post_url": "neq.",
+        "select": "contact_id,post_url",
+    }, cursor="scheduled_at"):
+        for row in page:
+            used.setdefault(str(row["contact_id"]), set()).add(row["post_url"])
+    return used
+
+
+async def fill_warmups(
+    client: httpx.AsyncClient,
+    rows: list[dict],
+) -> list[dict]:
+    """Write post_url/comment_text for many warmup rows in one upsert.
+
+    Rows must carry id plus the NOT NULL columns (contact_id, platform,
+    scheduled_at) so the upsert's insert half is valid.
+    """
+    if not rows:
+        return []
+    headers = get_supabase_headers()
+    headers["Prefer"] = "return=minimal,resolution=merge-duplicates"
+    resp = await client.post(
+        f"{SUPABASE_URL}/rest/v1/acq_warmup_schedules",
+        headers=headers,
+        params={"on_conflict": "id"},
+        json=rows,
+    )
+    resp.raise_for_status()
+    return []
+
+
 async def create_warmup_schedule(
     client: httpx.AsyncClient,
     contact_id: str,
@@ -171,6 +496,16 @@ async def create_warmup_schedule(
     })
 
 
+async def create_warmup_schedules(
+    client: httpx.AsyncClient,
+    rows: list[dict],
+) -> list[dict]:
+    """Insert many acq_warmup_schedules rows in one array POST."""
+    if not rows:
+        return []
+    return await _request(client, "POST", "acq_warmup_schedules", json=rows)
+
+
 async def mark_warmup_sent(
     client: httpx.AsyncClient,
     warmup_id: str,
@@ -183,6 +518,104 @@ async def mark_warmup_sent(
     })
 
 
+async def record_warmup_sent(
+    client: httpx.AsyncClient,
+    warmup_id: str,
+) -> dict | None:
+    """Mark a warmup sent and bump its contact's warmup_comments_sent.
+
+    Returns {contact_id, warmup_comments_sent}, or None if the warmup
+    was already marked sent.
+    """
+    rows = await _rpc(client, "acq_record_warmup_sent", {"warmup_id": warmup_id})
+    return rows[0] if rows else None
+
+
+async def try_run_lock(
+    client: httpx.AsyncClient,
+    name: str,
+    holder: str,
+    ttl_seconds: int,
+) -> str:
+    """Take or renew the run lease `name`. Returns the current holder."""
+    return await _rpc(client, "acq_try_run_lock", {
+        "lock_name": name,
+        "lock_holder": holder,
+        "ttl_seconds": ttl_seconds,
+    })
+
+
+async def release_run_lock(
+    client: httpx.AsyncClient,
+    name: str,
+    holder: str,
+) -> bool:
+    return await _rpc(client, "acq_release_run_lock", {
+        "lock_name": name,
+        "lock_holder": holder,
+    })
+
+
+async def get_promotable_contacts(
+    client: httpx.AsyncClient,
+    min_comments: int,
+    *,
+    niche_id: str | None = None,
+    exclude_niches: list[str] | None = None,
+    limit: int = 500,
+) -> list[dict]:
+    """Warming contacts with at least min_comments warmups sent.
+
+    niche_id=None with exclude_niches selects contacts outside those niches.
+    """
+    params = {
+        "pipeline_stage": "eq.warming",
+        "warmup_comments_sent": f"gte.{min_comments}",
+        "select": "id,niche_id,platform,warmup_comments_sent",
+        "order": "id.asc",
+        "limit": str(limit),
+    }
+    if niche_id is not None:
+        params["niche_id"] = f"eq.{niche_id}"
+    elif exclude_niches:
+        params["or"] = f"(niche_id.is.null,niche_id.not.in.({','.join(exclude_niches)}))"
+    return await _request(client, "GET", "crm_contacts", params=params)
+
+
+async def get_exhausted_warming_contacts(
+    client: httpx.AsyncClient,
+    *,
+    settle_seconds: int = 600,
+    limit: int = 500,
+) -> list[dict]:
+    """Warming contacts with no pending warmups left.
+
+    Skips contacts that entered warming within settle_seconds, whose
+    schedule rows may not be inserted yet.
+    """
+    return await _rpc(client, "acq_exhausted_warming_contacts", {
+        "settle_seconds": settle_seconds,
+        "max_rows": limit,
+    })
+
+
+async def get_pending_warmup_contact_ids(
+    client: httpx.AsyncClient,
+    contact_ids: list[str],
+) -> set[str]:
+    """Which of these contacts still have a pending warmup."""
+    pending: set[str] = set()
+    if not contact_ids:
+        return pending
+    async for page in iter_rows(client, "acq_warmup_schedules", params={
+        "contact_id": f"in.({','.join(contact_ids)})",
+        "status": "eq.pending",
+        "select": "contact_id",
+    }, cursor="scheduled_at"):
+        pending.update(str(row["contact_id"]) for row in page)
+    return pending
+
+
 async def mark_warmup_failed(
     client: httpx.AsyncClient,
     warmup_id: str,
@@ -258,6 +691,17 @@ async def get_active_niches(
     })
 
 
+async def get_niche_configs_since(
+    client: httpx.AsyncClient,
+    since: str | None = None,
+) -> list[dict]:
+    """Niche configs (enabled or not) with updated_at >= since, oldest first."""
+    params = {"select": "*", "order": "updated_at.asc"}
+    if since:
+        params["updated_at"] = f"gte.{since}"
+    return await _request(client, "GET", "acq_niche_configs", params=params)
+
+
 async def upsert_niche_config(
     client: httpx.AsyncClient,
     config: dict,
@@ -362,3 +806,17 @@ async def log_notification(
     if subject:
         data["subject"] = subject
     return await _request(client, "POST", "acq_human_notifications", json=data)
+
+
+async def log_notifications(
+    client: httpx.AsyncClient,
+    rows: list[dict],
+) -> list[dict]:
+    """Insert several acq_human_notifications rows in one request."""
+    if not rows:
+        return []
+    # PostgREST bulk inserts need every row to carry the same keys
+    keys = {k for row in rows for k in row}
+    return await _request(client, "POST", "acq_human_notifications", json=[
+        {k: row.get(k) for k in keys} for row in rows
+    ])
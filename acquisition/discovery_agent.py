@@ -15,17 +15,19 @@ from .config import (
     MARKET_RESEARCH_PORT,
     SCORING_MODEL,
     ARCHIVE_COOLDOWN_DAYS,
-    NicheConfig,
 )
 from .daily_caps import check_cap
 from .db.queries import (
     check_contact_exists,
     get_active_niches,
     log_discovery_run,
+    seed_contact,
     upsert_contact,
     log_funnel_event,
 )
+from .niche_cache import IcpMatcher
 from .state_machine import CooldownViolationError
+from .transitions import notify_pipeline_changed
 
 logger = logging.getLogger(__name__)
 
@@ -39,13 +41,18 @@ async def run_discovery(
     *,
     max_results: int = 50,
     dry_run: bool = False,
+    matcher: IcpMatcher | None = None,
 ) -> dict:
     """Run a single discovery cycle for a niche on a platform.
 
+    `matcher` is the niche's compiled ICP criteria (see niche_cache); it
+    is built from the niche row when not given.
+
     Returns a summary dict with contacts_found, contacts_new, contacts_skipped.
     """
     start = time.monotonic()
     niche_id = niche["niche_id"]
+    matcher = matcher or IcpMatcher.from_criteria(niche.get("icp_criteria") or {})
     keywords = niche.get("keywords", [])
     errors: list[str] = []
     contacts_found = 0
@@ -81,7 +88,7 @@ async def run_discovery(
                     logger.info(f"[dry-run] Would seed: {platform_id}")
                     continue
 
-                icp_score = await _score_prospect(client, prospect, niche)
+                icp_score = await _score_prospect(client, prospect, matcher)
 
                 contact_data = {
                     "platform": platform,
@@ -96,14 +103,10 @@ async def run_discovery(
                     "source": "discovery_agent",
                     "metadata": prospect.get("metadata", {}),
                 }
-                await upsert_contact(client, contact_data)
-                await log_funnel_event(
+                await _seed_contact(
                     client,
-                    contact_id="pending",
-                    from_stage="none",
-                    to_stage="new",
-                    triggered_by="discovery_agent",
-                    metadata={"niche_id": niche_id, "platform": platform, "keyword": keyword},
+                    contact_data,
+                    {"niche_id": niche_id, "platform": platform, "keyword": keyword},
                 )
                 contacts_new += 1
 
@@ -125,6 +128,8 @@ async def run_discovery(
             duration_ms=duration_ms,
             error="; ".join(errors) if errors else None,
         )
+        if contacts_new:
+            notify_pipeline_changed()
 
     return {
         "niche_id": niche_id,
@@ -137,6 +142,32 @@ async def run_discovery(
     }
 
 
+async def _seed_contact(
+    client: httpx.AsyncClient,
+    contact_data: dict,
+    metadata: dict,
+) -> dict:
+    """Insert a contact with its 'none' → 'new' funnel event, atomically."""
+    try:
+        return await seed_contact(client, contact_data, "discovery_agent", metadata)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+    # acq_seed_contact not deployed: two writes, but with the real id
+    rows = await upsert_contact(client, contact_data)
+    contact = rows[0] if rows else {}
+    if contact.get("id"):
+        await log_funnel_event(
+            client,
+            contact_id=contact["id"],
+            from_stage="none",
+            to_stage="new",
+            triggered_by="discovery_agent",
+            metadata=metadata,
+        )
+    return contact
+
+
 async def _search_platform(
     client: httpx.AsyncClient,
     platform: str,
@@ -157,15 +188,13 @@ async def _search_platform(
 async def _score_prospect(
     client: httpx.AsyncClient,
     prospect: dict,
-    niche: dict,
+    matcher: IcpMatcher,
 ) -> float:
     """Score a prospect against ICP criteria using Claude."""
-    icp_criteria = niche.get("icp_criteria", {})
-
     prompt = f"""Score this prospect from 0-100 on how well they match the Ideal Customer Profile.
 
 ICP Criteria:
-{icp_criteria}
+{matcher.prompt_criteria}
 
 Prospect:
 - Name: {prospect.get('name', 'Unknown')}
@@ -196,32 +225,9 @@ Return ONLY a number from 0-100. No explanation."""
         return min(max(score, 0), 100)
     except Exception as e:
         logger.warning(f"Claude scoring failed, using heuristic: {e}")
-        return _heuristic_score(prospect, icp_criteria)
+        return matcher.score(prospect)
 
 
 def _heuristic_score(prospect: dict, icp_criteria: dict) -> float:
     """Fallback scoring when Claude is unavailable."""
-    score = 50.0
-    bio = (prospect.get("bio") or "").lower()
-    followers = prospect.get("followers", 0)
-
-    min_followers = icp_criteria.get("min_followers", 1000)
-    max_followers = icp_criteria.get("max_followers", 100000)
-    if min_followers <= followers <= max_followers:
-        score += 15
-    elif followers < min_followers:
-        score -= 20
-    elif followers > max_followers:
-        score -= 10
-
-    business_signals = icp_criteria.get("business_signals", [])
-    for signal in business_signals:
-        if signal.lower() in bio:
-            score += 5
-
-    topics = icp_criteria.get("content_topics", [])
-    for topic in topics:
-        if topic.lower() in bio:
-            score += 3
-
-    return min(max(score, 0), 100)
+    return IcpMatcher.from_criteria(icp_criteria).score(prospect)
@@ -3,6 +3,7 @@
 Detects replies to outreach DMs and manages follow-up sequences.
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 
@@ -13,11 +14,10 @@ from .db.queries import (
     get_contacts_by_stage,
     get_pending_outreach,
     create_outreach_sequence,
-    update_contact_stage,
-    log_funnel_event,
 )
 from .notification_client import notify_reply_received
-from .state_machine import validate_transition
+from .transitions import Transition, transition_one
+from .worker_pool import get_worker_pool
 
 logger = logging.getLogger(__name__)
 
@@ -30,20 +30,21 @@ async def check_replies(
     *,
     dry_run: bool = False,
 ) -> dict:
-    """Check for replies from contacted prospects."""
+    """Check for replies from contacted prospects.
+
+    Inbox reads are sharded per DM service, serial within a platform and
+    parallel across platforms.
+    """
     contacts = await get_contacts_by_stage(client, "contacted", limit=50)
     replies_found = 0
     errors = []
 
-    for contact in contacts:
+    async def check_one(contact: dict, dm_port: int):
+        nonlocal replies_found
         contact_id = contact["id"]
         platform = contact.get("platform", "")
         username = contact.get("username", "")
 
-        dm_port = SAFARI_PORTS.get(platform, {}).get("dm")
-        if not dm_port:
-            continue
-
         try:
             resp = await client.get(
                 f"http://localhost:{dm_port}/api/dm/inbox",
@@ -62,18 +63,16 @@ async def check_replies(
                 if dry_run:
                     logger.info(f"[dry-run] Reply detected from {username}")
                     replies_found += 1
-                    continue
+                    return
 
-                validate_transition("contacted", "replied")
-                await update_contact_stage(client, contact_id, "replied")
-                await log_funnel_event(
+                status = await transition_one(
                     client,
-                    contact_id=contact_id,
-                    from_stage="contacted",
-                    to_stage="replied",
+                    Transition(contact_id, "contacted", "replied", {"platform": platform}),
                     triggered_by="followup_agent",
-                    metadata={"platform": platform},
                 )
+                if status != "applied":
+                    logger.info(f"[followup] {username} already moved on, not notifying")
+                    return
 
                 reply_text = next(
                     (m.get("text", "") for m in messages if m.get("from") == username),
@@ -86,6 +85,18 @@ async def check_replies(
             logger.error(f"[followup] Error checking replies for {username}: {e}")
             errors.append(f"{username}: {e}")
 
+    jobs = []
+    pool = get_worker_pool()
+    for contact in contacts:
+        platform = contact.get("platform", "")
+        dm_port = SAFARI_PORTS.get(platform, {}).get("dm")
+        if not dm_port:
+            continue
+        jobs.append(pool.submit(
+            platform, "inbox", lambda c=contact, p=dm_port: check_one(c, p)
+        ))
+    await asyncio.gather(*jobs, return_exceptions=True)
+
     return {
         "contacts_checked": len(contacts),
         "replies_found": replies_found,
@@ -0,0 +1,48 @@
+"""The shared httpx client used by the orchestrator and API server.
+
+Everything the package calls goes through one AsyncClient, so swapping
+its transports redirects the whole pipeline: ACQ_SUPABASE_BACKEND=local
+mounts the in-memory PostgREST stand-in over SUPABASE_URL, and
+ACQ_SERVICE_BACKEND=simulated mounts the simulated Safari, Market
+Research, Claude and Telegram services. ACQ_HTTP_RECORD records every
+exchange to a file and ACQ_HTTP_REPLAY answers from one (see recording).
+"""
+
+import httpx
+
+from .config import (
+    HTTP_RECORD_PATH,
+    HTTP_REPLAY_PATH,
+    HTTP_REPLAY_SPEED,
+    SERVICE_BACKEND,
+    SUPABASE_BACKEND,
+    SUPABASE_URL,
+)
+
+DEFAULT_TIMEOUT = 60.0
+
+
+def create_http_client(*, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> httpx.AsyncClient:
+    mounts = dict(kwargs.pop("mounts", None) or {})
+    if HTTP_REPLAY_PATH:
+        from .recording import get_replay
+
+        kwargs["transport"] = get_replay(HTTP_REPLAY_PATH, speed=HTTP_REPLAY_SPEED)
+        return httpx.AsyncClient(timeout=timeout, **kwargs)
+
+    if SUPABASE_BACKEND == "local":
+        from .benchmarks.local_supabase import get_local_supabase
+
+        mounts.setdefault(SUPABASE_URL, httpx.ASGITransport(app=get_local_supabase()))
+    if SERVICE_BACKEND == "simulated":
+        from .benchmarks.services import get_service_simulator
+
+        for url, transport in get_service_simulator().mounts().items():
+            mounts.setdefault(url, transport)
+    if HTTP_RECORD_PATH:
+        from .recording import get_recorder
+
+        recorder = get_recorder(HTTP_RECORD_PATH)
+        kwargs["transport"] = recorder.wrap(kwargs.get("transport") or httpx.AsyncHTTPTransport())
+        mounts = {url: recorder.wrap(transport) for url, transport in mounts.items()}
+    return httpx.AsyncClient(timeout=timeout, mounts=mounts or None, **kwargs)
@@ -0,0 +1,150 @@
+"""Background jobs for long-running API operations.
+
+A full cycle can take many minutes, longer than clients and proxies will
+hold a request open. JobManager runs such work in the background, at
+most `max_concurrent` at a time, and keeps each job's status, progress
+events and result for polling (GET /api/jobs/{id}) or streaming
+(GET /api/jobs/{id}/events).
+
+Work is an async callable taking a `progress` callback; whatever dict it
+passes to progress becomes an event on the job. Work that reports an
+"error" in its result dict instead of raising (run_cycle does) fails
+the job, with the result kept.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[dict], None]
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict = field(default_factory=dict)
+    status: str = "queued"  # queued → running → succeeded | failed | cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: Any = None
+    error: str | None = None
+    events: list[dict] = field(default_factory=list)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    _task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def emit(self, event: dict):
+        self.events.append({"seq": len(self.events), "at": time.time(), **event})
+        # Wake current waiters; the next wait() gets a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self, timeout: float | None = None):
+        """Wait for the next event or status change."""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def summary(self, *, include_events: bool = True) -> dict:
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.events[-1] if self.events else None,
+            "result": self.result,
+            "error": self.error,
+        }
+        if include_events:
+            data["events"] = self.events
+        return data
+
+
+class JobManager:
+    """Runs submitted jobs in the background, max_concurrent at a time.
+
+    Finished jobs are kept (oldest evicted first) up to `retain`.
+    """
+
+    def __init__(self, *, max_concurrent: int = 2, retain: int = 200):
+        self.max_concurrent = max_concurrent
+        self.retain = retain
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+
+    def submit(
+        self,
+        kind: str,
+        work: Callable[[ProgressCallback], Awaitable[Any]],
+        params: dict | None = None,
+    ) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=params or {})
+        self._jobs[job.id] = job
+        self._evict()
+        job.emit({"status": "queued"})
+        job._task = asyncio.create_task(self._run(job, work))
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def recent(self, *, kind: str | None = None) -> list[Job]:
+        return [j for j in reversed(self._jobs.values()) if kind is None or j.kind == kind]
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.done or job._task is None:
+            return False
+        job._task.cancel()
+        return True
+
+    async def shutdown(self):
+        """Cancel unfinished jobs and wait for them to stop."""
+        tasks = [j._task for j in self._jobs.values() if j._task and not j.done]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: Job, work: Callable[[ProgressCallback], Awaitable[Any]]):
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = time.time()
+                job.emit({"status": "running"})
+                job.result = await work(job.emit)
+            if isinstance(job.result, dict) and job.result.get("error"):
+                logger.error(f"[jobs] {job.kind} {job.id} failed: {job.result['error']}")
+                job.status = "failed"
+                job.error = str(job.result["error"])
+            else:
+                job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            logger.error(f"[jobs] {job.kind} {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = time.time()
+        job.emit({"status": job.status})
+
+    def _evict(self):
+        finished = [j.id for j in self._jobs.values() if j.done]
+        for job_id in finished[:max(0, len(self._jobs) - self.retain)]:
+            del self._jobs[job_id]
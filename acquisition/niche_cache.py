@@ -0,0 +1,159 @@
+"""In-process niche config cache.
+
+Niche configs change rarely but are read every cycle and on every
+discovery request. NicheCache keeps them keyed by niche_id, with the
+parsed NicheConfig and a compiled ICP matcher built once per config
+version (its updated_at).
+
+refresh() polls only rows whose updated_at is at or past the high-water
+mark, fetching disabled rows too so a disable evicts the niche. Deleted
+rows can't show up in that poll, so a full reload runs every
+full_refresh_interval. apply() takes rows from any source, so a Supabase
+realtime subscription can push changes into the same cache.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from .config import NicheConfig
+from .db.queries import get_niche_configs_since
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IcpMatcher:
+    """ICP criteria pre-processed for repeated heuristic scoring."""
+
+    min_followers: int
+    max_followers: int
+    business_signals: tuple[str, ...]
+    content_topics: tuple[str, ...]
+    prompt_criteria: str
+
+    @classmethod
+    def from_criteria(cls, icp_criteria: dict) -> "IcpMatcher":
+        return cls(
+            min_followers=icp_criteria.get("min_followers", 1000),
+            max_followers=icp_criteria.get("max_followers", 100000),
+            business_signals=tuple(s.lower() for s in icp_criteria.get("business_signals", [])),
+            content_topics=tuple(t.lower() for t in icp_criteria.get("content_topics", [])),
+            prompt_criteria=str(icp_criteria),
+        )
+
+    def score(self, prospect: dict) -> float:
+        """Heuristic 0-100 ICP score (fallback when Claude is unavailable)."""
+        score = 50.0
+        bio = (prospect.get("bio") or "").lower()
+        followers = prospect.get("followers", 0)
+
+        if self.min_followers <= followers <= self.max_followers:
+            score += 15
+        elif followers < self.min_followers:
+            score -= 20
+        elif followers > self.max_followers:
+            score -= 10
+
+        score += 5 * sum(1 for signal in self.business_signals if signal in bio)
+        score += 3 * sum(1 for topic in self.content_topics if topic in bio)
+        return min(max(score, 0), 100)
+
+
+@dataclass(frozen=True)
+class CachedNiche:
+    row: dict
+    config: NicheConfig
+    matcher: IcpMatcher
+    version: str
+
+
+class NicheCache:
+    """Enabled niche configs keyed by niche_id."""
+
+    def __init__(self, *, poll_interval: float = 30.0, full_refresh_interval: float = 3600.0):
+        self.poll_interval = poll_interval
+        self.full_refresh_interval = full_refresh_interval
+        self._niches: dict[str, CachedNiche] = {}
+        self._high_water: str | None = None
+        self._polled_at = float("-inf")
+        self._full_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self.version = 0
+
+    async def refresh(self, client: httpx.AsyncClient, *, force: bool = False) -> bool:
+        """Poll for changed configs. Returns True if the cache changed.
+
+        Calls within poll_interval of the last poll return immediately;
+        concurrent callers share one poll.
+        """
+        if not force and time.monotonic() - self._polled_at < self.poll_interval:
+            return False
+        async with self._lock:
+            now = time.monotonic()
+            if not force and now - self._polled_at < self.poll_interval:
+                return False
+            full = force or now - self._full_at >= self.full_refresh_interval
+            rows = await get_niche_configs_since(client, None if full else self._high_water)
+            if full:
+                self._full_at = now
+            self._polled_at = now
+            return self.apply(rows, replace=full)
+
+    def apply(self, rows: list[dict], *, replace: bool = False) -> bool:
+        """Merge changed acq_niche_configs rows into the cache.
+
+        With replace, niches missing from rows are dropped (full reload).
+        """
+        changed = False
+        seen: set[str] = set()
+        for row in rows:
+            niche_id = row["niche_id"]
+            seen.add(niche_id)
+            version = str(row.get("updated_at") or "")
+            if version and (self._high_water is None or version > self._high_water):
+                self._high_water = version
+
+            if not row.get("enabled", True):
+                changed |= self._niches.pop(niche_id, None) is not None
+                continue
+            current = self._niches.get(niche_id)
+            if current is not None and current.version == version and version:
+                continue
+            self._niches[niche_id] = CachedNiche(
+                row=row,
+                config=NicheConfig.from_row(row),
+                matcher=IcpMatcher.from_criteria(row.get("icp_criteria") or {}),
+                version=version,
+            )
+            changed = True
+
+        if replace:
+            for niche_id in set(self._niches) - seen:
+                del self._niches[niche_id]
+                changed = True
+        if changed:
+            self.version += 1
+            logger.info(f"[niches] {len(self._niches)} active niches (version {self.version})")
+        return changed
+
+    def get(self, niche_id: str) -> CachedNiche | None:
+        return self._niches.get(niche_id)
+
+    def active(self) -> list[CachedNiche]:
+        return list(self._niches.values())
+
+    def configs(self) -> dict[str, NicheConfig]:
+        return {niche_id: n.config for niche_id, n in self._niches.items()}
+
+
+_cache = NicheCache()
+
+
+async def get_niche_cache(client: httpx.AsyncClient, *, force: bool = False) -> NicheCache:
+    """The process-wide NicheCache, refreshed if its poll interval passed."""
+    await _cache.refresh(client, force=force)
+    return _cache
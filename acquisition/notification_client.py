@@ -7,6 +7,7 @@ import httpx
 
 from .config import SUPABASE_URL, get_supabase_headers
 from .db.queries import log_notification
+from .notification_outbox import Notification, get_outbox
 
 logger = logging.getLogger(__name__)
 
@@ -25,19 +26,23 @@ async def notify_human(
     """Send a notification to the human operator and log it.
 
     Channels: telegram (default), push, email.
-    Returns True if notification was delivered.
+    With an installed NotificationOutbox the notification is queued for
+    background delivery and True means "accepted". Otherwise it is sent
+    inline and True means delivered.
     """
-    try:
-        delivered = False
+    outbox = get_outbox()
+    if outbox is not None:
+        outbox.enqueue(Notification(
+            notification_type=notification_type,
+            body=body,
+            contact_id=contact_id,
+            subject=subject,
+            channel=channel,
+        ))
+        return True
 
-        if channel == "telegram":
-            delivered = await _send_telegram(client, body)
-        elif channel == "push":
-            delivered = await _send_push(client, subject or notification_type, body)
-        elif channel == "email":
-            delivered = await _send_email(client, subject or notification_type, body)
-        else:
-            logger.warning(f"Unknown notification channel: {channel}")
+    try:
+        delivered = await send_via_channel(client, channel, subject or notification_type, body)
 
         await log_notification(
             client,
@@ -55,6 +60,23 @@ async def notify_human(
         return False
 
 
+async def send_via_channel(
+    client: httpx.AsyncClient,
+    channel: str,
+    subject: str,
+    body: str,
+) -> bool:
+    """Deliver one message over a channel. Returns True if delivered."""
+    if channel == "telegram":
+        return await _send_telegram(client, body)
+    if channel == "push":
+        return await _send_push(client, subject, body)
+    if channel == "email":
+        return await _send_email(client, subject, body)
+    logger.warning(f"Unknown notification channel: {channel}")
+    return False
+
+
 async def _send_telegram(client: httpx.AsyncClient, message: str) -> bool:
     try:
         resp = await client.post(
@@ -0,0 +1,321 @@
+"""Async notification outbox.
+
+notify_human enqueues into the installed outbox instead of sending
+inline. Delivery runs in the background:
+
+  - Priority lanes: call_booked (high), reply_received (normal) and
+    everything else (low) each get their own queue and worker, so a flood
+    of low-priority messages or a send stuck in retries never sits in
+    front of a booked call.
+  - Each channel has a token bucket so sends stay under its rate limit
+    (notably the Telegram bot on 3434). When a bucket runs low the last
+    token is held back for the high lane.
+  - A failed delivery falls back across channels: telegram → push → email.
+  - With a digest window, bursts of digestible notifications
+    (reply_received) are coalesced into one message.
+  - acq_human_notifications rows are written in batches.
+
+metrics() reports queue depth per lane, delivery latency, per-channel
+counts and time spent waiting on rate limits.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import httpx
+
+from .db.queries import log_notifications
+
+logger = logging.getLogger(__name__)
+
+LANES = ("high", "normal", "low")
+NOTIFICATION_PRIORITIES = {"call_booked": 0, "reply_received": 1}
+DEFAULT_PRIORITY = 2
+DIGEST_TYPES = ("reply_received",)
+
+CHANNEL_FALLBACK = ("telegram", "push", "email")
+# channel → (tokens per second, burst capacity)
+CHANNEL_RATE_LIMITS: dict[str, tuple[float, int]] = {
+    "telegram": (0.5, 5),
+    "push": (2.0, 10),
+    "email": (0.2, 5),
+}
+
+LATENCY_SAMPLES = 500
+
+
+@dataclass
+class Notification:
+    notification_type: str
+    body: str
+    contact_id: str | None = None
+    subject: str | None = None
+    channel: str = "telegram"
+    enqueued_at: float = field(default_factory=time.monotonic)
+    digest_of: list["Notification"] | None = None
+
+    @property
+    def priority(self) -> int:
+        return NOTIFICATION_PRIORITIES.get(self.notification_type, DEFAULT_PRIORITY)
+
+    def log_rows(self, channel: str | None = None) -> list[dict]:
+        """Log rows for this notification; a digest logs each original."""
+        if self.digest_of:
+            return [row for n in self.digest_of for row in n.log_rows(channel)]
+        row = {
+            "notification_type": self.notification_type,
+            "channel": channel or self.channel,
+            "body": self.body,
+        }
+        if self.contact_id:
+            row["contact_id"] = self.contact_id
+        if self.subject:
+            row["subject"] = self.subject
+        return [row]
+
+
+class TokenBucket:
+    """Token-bucket rate limiter that keeps a reserve for priority 0."""
+
+    def __init__(self, rate: float, capacity: int, *, reserve: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = min(reserve, capacity - 1) if capacity > 1 else 0
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = DEFAULT_PRIORITY) -> float:
+        """Take one token, sleeping until one is free. Returns seconds waited."""
+        floor = 1.0 if priority == 0 else 1.0 + self.reserve
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= floor:
+                self.tokens -= 1
+                return waited
+            delay = (floor - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+
+class NotificationOutbox:
+    """Background delivery for human notifications."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        *,
+        digest_window: float = 0,
+        max_attempts: int = 3,
+        retry_backoff: float = 2.0,
+        log_batch_size: int = 20,
+        log_flush_interval: float = 5.0,
+        rate_limits: dict[str, tuple[float, int]] | None = None,
+        fallback: tuple[str, ...] = CHANNEL_FALLBACK,
+    ):
+        self.client = client
+        self.digest_window = digest_window
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.log_batch_size = log_batch_size
+        self.log_flush_interval = log_flush_interval
+        self.fallback = fallback
+        limits = CHANNEL_RATE_LIMITS if rate_limits is None else rate_limits
+        self._buckets = {ch: TokenBucket(rate, cap) for ch, (rate, cap) in limits.items()}
+
+        self._lanes = [asyncio.Queue() for _ in LANES]
+        self._digest: list[Notification] = []
+        self._digest_deadline: float | None = None
+        self._log_buffer: list[dict] = []
+        self._log_deadline: float | None = None
+        self._wake = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+        self.delivered = 0
+        self.failed = 0
+        self._fallbacks = 0
+        self._by_channel: dict[str, int] = {}
+        self._rate_limited: dict[str, float] = {}
+        self._latency = [deque(maxlen=LATENCY_SAMPLES) for _ in LANES]
+
+    def enqueue(self, notification: Notification):
+        if self.digest_window > 0 and notification.notification_type in DIGEST_TYPES:
+            self._digest.append(notification)
+            if self._digest_deadline is None:
+                self._digest_deadline = time.monotonic() + self.digest_window
+                self._wake.set()
+            return
+        self._lanes[notification.priority].put_nowait(notification)
+
+    @property
+    def pending(self) -> int:
+        return sum(q.qsize() for q in self._lanes) + len(self._digest)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._lane_worker(i)) for i in range(len(LANES))]
+        self._tasks.append(asyncio.create_task(self._housekeeping()))
+
+    async def stop(self):
+        """Send any open digest, drain every lane, flush logs."""
+        if not self._tasks:
+            return
+        self._flush_digest()
+        await asyncio.gather(*(q.join() for q in self._lanes))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._flush_logs()
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": {lane: q.qsize() for lane, q in zip(LANES, self._lanes)},
+            "digest_pending": len(self._digest),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "fallbacks": self._fallbacks,
+            "delivered_by_channel": dict(self._by_channel),
+            "rate_limited_seconds": {ch: round(s, 2) for ch, s in self._rate_limited.items()},
+            "latency": {
+                lane: _latency_summary(samples) for lane, samples in zip(LANES, self._latency)
+            },
+        }
+
+    async def _lane_worker(self, lane: int):
+        queue = self._lanes[lane]
+        while True:
+            notification = await queue.get()
+            try:
+                await self._deliver(notification)
+            except Exception as e:
+                logger.error(f"[outbox] {LANES[lane]} lane error: {e}")
+            finally:
+                queue.task_done()
+
+    async def _housekeeping(self):
+        """Close digest windows and flush the log buffer on time."""
+        while True:
+            self._wake.clear()
+            deadlines = [d for d in (self._digest_deadline, self._log_deadline) if d is not None]
+            timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            now = time.monotonic()
+            if self._digest_deadline is not None and now >= self._digest_deadline:
+                self._flush_digest()
+            if self._log_buffer and (
+                len(self._log_buffer) >= self.log_batch_size
+                or (self._log_deadline is not None and now >= self._log_deadline)
+            ):
+                await self._flush_logs()
+
+    def _flush_digest(self):
+        """Move the open digest onto its lane as one notification."""
+        batch, self._digest, self._digest_deadline = self._digest, [], None
+        if not batch:
+            return
+        head = batch[0]
+        if len(batch) > 1:
+            head = Notification(
+                notification_type=head.notification_type,
+                subject=f"{len(batch)} {head.notification_type.replace('_', ' ')} notifications",
+                body="\n".join(f"• {n.body}" for n in batch),
+                channel=head.channel,
+                enqueued_at=head.enqueued_at,
+                digest_of=batch,
+            )
+        self._lanes[head.priority].put_nowait(head)
+
+    async def _deliver(self, notification: Notification):
+        """Send on the preferred channel, falling back down the chain."""
+        # Imported here: notification_client routes notify_human through us
+        from .notification_client import send_via_channel
+
+        chain = [notification.channel] + [c for c in self.fallback if c != notification.channel]
+        subject = notification.subject or notification.notification_type
+        delivered_on = None
+
+        for attempt in range(self.max_attempts):
+            for channel in chain:
+                bucket = self._buckets.get(channel)
+                if bucket is not None:
+                    waited = await bucket.acquire(notification.priority)
+                    if waited:
+                        self._rate_limited[channel] = self._rate_limited.get(channel, 0) + waited
+                try:
+                    ok = await send_via_channel(self.client, channel, subject, notification.body)
+                except Exception as e:
+                    logger.error(f"[outbox] {channel} delivery error: {e}")
+                    ok = False
+                if ok:
+                    delivered_on = channel
+                    break
+            if delivered_on or attempt + 1 == self.max_attempts:
+                break
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+        count = len(notification.digest_of or [notification])
+        if delivered_on:
+            self.delivered += count
+            self._by_channel[delivered_on] = self._by_channel.get(delivered_on, 0) + count
+            if delivered_on != notification.channel:
+                self._fallbacks += 1
+                logger.info(f"[outbox] {notification.notification_type} fell back to {delivered_on}")
+            self._latency[notification.priority].append(
+                (time.monotonic() - notification.enqueued_at) * 1000
+            )
+        else:
+            self.failed += count
+            logger.error(f"[outbox] Gave up on {count} {notification.notification_type} notification(s)")
+
+        self._log_buffer.extend(notification.log_rows(delivered_on))
+        if self._log_deadline is None:
+            self._log_deadline = time.monotonic() + self.log_flush_interval
+        self._wake.set()
+
+    async def _flush_logs(self):
+        rows, self._log_buffer, self._log_deadline = self._log_buffer, [], None
+        if not rows:
+            return
+        try:
+            await log_notifications(self.client, rows)
+        except Exception as e:
+            logger.error(f"[outbox] Failed to log {len(rows)} notifications: {e}")
+
+
+def _latency_summary(samples: deque) -> dict:
+    if not samples:
+        return {"samples": 0}
+    ordered = sorted(samples)
+    return {
+        "samples": len(ordered),
+        "p50_ms": round(ordered[len(ordered) // 2], 1),
+        "p95_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+
+
+_outbox: NotificationOutbox | None = None
+
+
+def install_outbox(outbox: NotificationOutbox | None):
+    """Route notify_human through an outbox (None restores inline sends)."""
+    global _outbox
+    _outbox = outbox
+
+
+def get_outbox() -> NotificationOutbox | None:
+    return _outbox
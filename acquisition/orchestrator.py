@@ -1,7 +1,7 @@
 """PRD-025: DAG coordination, cron, state machine.
 
 Orchestrates the full acquisition pipeline:
-discovery → scoring → warmup → outreach → followup → reporting.
+re-entry → discovery → scoring → warmup → outreach → followup → reporting.
 """
 
 import asyncio
@@ -9,17 +9,25 @@ import logging
 import signal
 import sys
 from datetime import datetime, timezone
+from typing import Awaitable, Callable
 
 import httpx
 
-from .config import ACTIVE_HOURS_START, ACTIVE_HOURS_END
+from .config import ACTIVE_HOURS_START, ACTIVE_HOURS_END, NOTIFY_DIGEST_SECONDS
 from .discovery_agent import run_discovery
+from .http_client import create_http_client
+from .niche_cache import get_niche_cache
+from .reentry_agent import sweep_reentries
 from .scoring_agent import run_scoring
 from .warmup_agent import execute_warmups, schedule_warmups
+from .content_scanner import scan_content
 from .outreach_agent import run_outreach
+from .pacing import PacingScheduler
+from .promotion_agent import promote_warmed_contacts
 from .followup_agent import check_replies, send_followups
+from .notification_outbox import NotificationOutbox, get_outbox, install_outbox
 from .reporting_agent import generate_weekly_report
-from .db.queries import get_active_niches
+from .single_flight import RunLockedError, get_single_flight, phase_key
 
 logger = logging.getLogger(__name__)
 
@@ -27,27 +35,50 @@ logger = logging.getLogger(__name__)
 class AcquisitionOrchestrator:
     """Main orchestrator for the acquisition pipeline."""
 
-    def __init__(self, *, dry_run: bool = False, cycle_interval: int = 3600):
+    def __init__(
+        self,
+        *,
+        dry_run: bool = False,
+        cycle_interval: int = 3600,
+        pacing: bool = True,
+    ):
         self.dry_run = dry_run
         self.cycle_interval = cycle_interval
         self.running = False
         self._client: httpx.AsyncClient | None = None
+        # Spread DMs/comments over the cycle instead of bursting the cap
+        self.pacer = PacingScheduler(horizon_seconds=cycle_interval) if pacing else None
 
     async def start(self):
         """Start the orchestrator loop."""
         self.running = True
-        self._client = httpx.AsyncClient(timeout=60.0)
-        logger.info(f"[orchestrator] Starting (dry_run={self.dry_run}, interval={self.cycle_interval}s)")
+        self._client = create_http_client()
+        # Deliver notifications in the background unless the host app already does
+        outbox = None
+        if get_outbox() is None:
+            outbox = NotificationOutbox(self._client, digest_window=NOTIFY_DIGEST_SECONDS)
+            outbox.start()
+            install_outbox(outbox)
+        logger.info(
+            f"[orchestrator] Starting (dry_run={self.dry_run}, interval={self.cycle_interval}s, "
+            f"pacing={self.pacer is not None})"
+        )
 
         try:
             while self.running:
+                started = asyncio.get_running_loop().time()
                 if self._is_active_hours():
                     await self.run_cycle()
                 else:
                     logger.info("[orchestrator] Outside active hours, sleeping")
 
-                await asyncio.sleep(self.cycle_interval)
+                # Paced cycles spend most of the interval dispatching
+                elapsed = asyncio.get_running_loop().time() - started
+                await asyncio.sleep(max(self.cycle_interval - elapsed, 0))
         finally:
+            if outbox is not None:
+                install_outbox(None)
+                await outbox.stop()
             await self._client.aclose()
 
     async def stop(self):
@@ -55,51 +86,105 @@ class AcquisitionOrchestrator:
         self.running = False
         logger.info("[orchestrator] Stopping")
 
-    async def run_cycle(self) -> dict:
-        """Run one full acquisition cycle."""
-        client = self._client or httpx.AsyncClient(timeout=60.0)
-        results = {}
-        cycle_start = datetime.now(timezone.utc)
+    async def run_cycle(self, on_progress: Callable[[dict], None] | None = None) -> dict:
+        """Run one full acquisition cycle.
 
-        logger.info(f"[orchestrator] Starting cycle at {cycle_start.isoformat()}")
+        `on_progress` is called with {"phase", "state"} as each phase
+        starts and finishes ("state": "completed" events carry the
+        phase's result).
 
+        Only one cycle (and one run of each phase) is in flight per
+        process: a call made while a cycle is running waits for that
+        cycle and returns its results, without progress callbacks.
+        """
+        client = self._client or create_http_client()
         try:
-            # Phase 1: Discovery
-            niches = await get_active_niches(client)
+            return await get_single_flight().run(
+                phase_key("cycle", self.dry_run),
+                lambda: self._run_cycle(client, on_progress),
+                client=client,
+            )
+        except RunLockedError as e:
+            logger.info(f"[orchestrator] Skipping cycle: {e}")
+            return {"skipped": str(e)}
+
+    async def _run_cycle(
+        self,
+        client: httpx.AsyncClient,
+        on_progress: Callable[[dict], None] | None,
+    ) -> dict:
+        results = {}
+        cycle_start = datetime.now(timezone.utc)
+        flights = get_single_flight()
+
+        def progress(phase: str, result=None):
+            if on_progress is None:
+                return
+            if result is None:
+                on_progress({"phase": phase, "state": "started"})
+            else:
+                on_progress({"phase": phase, "state": "completed", "result": result})
+
+        async def run_phase(name: str, fn: Callable[[], Awaitable]):
+            progress(name)
+            try:
+                results[name] = await flights.run(phase_key(name, self.dry_run), fn, client=client)
+            except RunLockedError as e:
+                logger.info(f"[orchestrator] Skipping {name}: {e}")
+                results[name] = {"skipped": str(e)}
+            progress(name, results[name])
+
+        async def discover() -> list[dict]:
             discovery_results = []
-            for niche in niches:
-                for platform in niche.get("platforms", []):
+            for niche in niche_cache.active():
+                for platform in niche.row.get("platforms", []):
                     result = await run_discovery(
-                        client, niche, platform, dry_run=self.dry_run
+                        client, niche.row, platform,
+                        dry_run=self.dry_run, matcher=niche.matcher,
                     )
                     discovery_results.append(result)
-            results["discovery"] = discovery_results
+            return discovery_results
 
-            # Phase 2: Scoring
-            results["scoring"] = await run_scoring(
-                client, dry_run=self.dry_run
-            )
+        logger.info(f"[orchestrator] Starting cycle at {cycle_start.isoformat()}")
 
-            # Phase 3: Warmup
-            results["warmup_schedule"] = await schedule_warmups(
-                client, dry_run=self.dry_run
-            )
-            results["warmup_execute"] = await execute_warmups(
-                client, dry_run=self.dry_run
-            )
+        try:
+            # Phase 0: Re-enter archived contacts whose cooldown expired
+            await run_phase("reentry", lambda: sweep_reentries(client, dry_run=self.dry_run))
+
+            # Phase 1: Discovery
+            niche_cache = await get_niche_cache(client)
+            await run_phase("discovery", discover)
 
-            # Phase 4: Outreach
-            results["outreach"] = await run_outreach(
-                client, dry_run=self.dry_run
+            # Phase 2: Scoring
+            await run_phase("scoring", lambda: run_scoring(client, dry_run=self.dry_run))
+
+            # Phase 3: Warmup scheduling
+            await run_phase("warmup_schedule", lambda: schedule_warmups(
+                client, niches=niche_cache.configs(), dry_run=self.dry_run
+            ))
+
+            # Phase 3b: Fill upcoming warmups with posts + comments
+            await run_phase("content_scan", lambda: scan_content(client, dry_run=self.dry_run))
+
+            # Phase 4: Warmup comments + outreach DMs. They use different
+            # Safari services, so paced dispatch of both overlaps.
+            await asyncio.gather(
+                run_phase("warmup_execute", lambda: execute_warmups(
+                    client, dry_run=self.dry_run, pacer=self.pacer
+                )),
+                run_phase("outreach", lambda: run_outreach(
+                    client, dry_run=self.dry_run, pacer=self.pacer
+                )),
             )
 
+            # Phase 4b: Promote contacts that finished warming up
+            await run_phase("promotion", lambda: promote_warmed_contacts(
+                client, niches=niche_cache.configs(), dry_run=self.dry_run
+            ))
+
             # Phase 5: Follow-up
-            results["replies"] = await check_replies(
-                client, dry_run=self.dry_run
-            )
-            results["followups"] = await send_followups(
-                client, dry_run=self.dry_run
-            )
+            await run_phase("replies", lambda: check_replies(client, dry_run=self.dry_run))
+            await run_phase("followups", lambda: send_followups(client, dry_run=self.dry_run))
 
         except Exception as e:
             logger.error(f"[orchestrator] Cycle error: {e}")
@@ -124,6 +209,7 @@ async def main():
     parser.add_argument("--dry-run", action="store_true", help="Log actions without executing")
     parser.add_argument("--once", action="store_true", help="Run one cycle and exit")
     parser.add_argument("--interval", type=int, default=3600, help="Cycle interval in seconds")
+    parser.add_argument("--no-pacing", action="store_true", help="Send without spreading caps over active hours")
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -134,10 +220,11 @@ async def main():
     orchestrator = AcquisitionOrchestrator(
         dry_run=args.dry_run,
         cycle_interval=args.interval,
+        pacing=not args.no_pacing and not args.once,
     )
 
     if args.once:
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with create_http_client() as client:
             orchestrator._client = client
             results = await orchestrator.run_cycle()
             logger.info(f"[orchestrator] Results: {results}")
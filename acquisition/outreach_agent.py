@@ -3,22 +3,25 @@
 Generates personalized DMs via Claude and sends through Safari DM services.
 """
 
+import asyncio
 import logging
 from datetime import datetime, timezone
+from pathlib import Path
 
 import httpx
 
-from .config import ANTHROPIC_API_KEY, DM_GENERATION_MODEL, SAFARI_PORTS
-from .daily_caps import check_cap, increment_cap
+from .config import ANTHROPIC_API_KEY, DM_GENERATION_MODEL, OUTBOX_SPOOL_DIR
+from .daily_caps import CapLedger
 from .db.queries import (
     create_outreach_sequence,
     get_active_variants,
+    get_contacts_by_ids,
     get_contacts_by_stage,
     mark_outreach_sent,
-    update_contact_stage,
-    log_funnel_event,
 )
-from .state_machine import validate_transition
+from .pacing import PacingScheduler
+from .transitions import Transition, TransitionOutbox
+from .worker_pool import get_worker_pool, service_port
 
 logger = logging.getLogger(__name__)
 
@@ -37,26 +40,75 @@ async def run_outreach(
     *,
     batch_size: int = 10,
     dry_run: bool = False,
+    pacer: PacingScheduler | None = None,
+    ledger: CapLedger | None = None,
+) -> dict:
+    """Send DMs to contacts in ready_for_dm stage.
+
+    Sends are sharded per DM service: each platform's browser sends one
+    DM at a time, while different platforms send in parallel. Caps are
+    reserved against a CapLedger loaded once per run and committed with
+    the atomic increment, so concurrent workers can't overshoot. With a
+    pacer, each send waits for its timetable slot and a platform stops
+    once it has no slot left within the pacer's horizon; contacts that
+    left ready_for_dm during the wait are skipped. Stage changes
+    are batched through a TransitionOutbox whose undelivered writes are
+    spooled, and the spool is replayed before contacts are read, so a
+    contact already DM'd is never picked up again as ready_for_dm.
+    """
+    transitions = TransitionOutbox(
+        client,
+        triggered_by="outreach_agent",
+        spool=None if dry_run else Path(OUTBOX_SPOOL_DIR) / "outreach_agent.jsonl",
+    )
+    async with transitions:
+        return await _send_ready(client, transitions, batch_size, dry_run, pacer, ledger)
+
+
+async def _send_ready(
+    client: httpx.AsyncClient,
+    transitions: TransitionOutbox,
+    batch_size: int,
+    dry_run: bool,
+    pacer: PacingScheduler | None,
+    ledger: CapLedger | None,
 ) -> dict:
-    """Send DMs to contacts in ready_for_dm stage."""
     contacts = await get_contacts_by_stage(client, "ready_for_dm", limit=batch_size)
+    if ledger is None:
+        ledger = await CapLedger.load(client)
     sent = 0
     skipped = 0
     errors = []
+    stopped: set[str] = set()
+    written: list[asyncio.Future] = []
 
-    for contact in contacts:
+    async def send_one(contact: dict):
+        nonlocal sent, skipped
         contact_id = contact["id"]
         platform = contact.get("platform", "")
         username = contact.get("username", "")
 
-        if "dm" not in SAFARI_PORTS.get(platform, {}):
-            skipped += 1
-            continue
+        if platform in stopped:
+            return
 
-        allowed, current, limit = await check_cap(client, platform, "dm")
+        allowed, current, limit = ledger.reserve(platform, "dm")
         if not allowed:
             logger.info(f"[outreach] Daily DM cap reached for {platform} ({current}/{limit})")
-            break
+            stopped.add(platform)
+            return
+
+        if pacer:
+            if not await pacer.wait_turn(platform, "dm", current):
+                logger.info(f"[outreach] No {platform} DM slot left this cycle ({current}/{limit})")
+                ledger.release(platform, "dm")
+                stopped.add(platform)
+                return
+            # The contact was read before a wait that can span the cycle
+            rows = await get_contacts_by_ids(client, [contact_id], select="id,pipeline_stage")
+            if not rows or rows[0].get("pipeline_stage") != "ready_for_dm":
+                ledger.release(platform, "dm")
+                skipped += 1
+                return
 
         try:
             message = await _generate_dm(client, contact)
@@ -64,16 +116,29 @@ async def run_outreach(
             if dry_run:
                 logger.info(f"[dry-run] Would DM {username} on {platform}: {message[:80]}...")
                 sent += 1
-                continue
+                return
 
-            dm_port = SAFARI_PORTS[platform]["dm"]
+            dm_port = service_port(platform, "dm")
             resp = await client.post(
                 f"http://localhost:{dm_port}/api/dm/send",
                 json={"recipient": username, "message": message},
                 timeout=30.0,
             )
             resp.raise_for_status()
-
+        except Exception as e:
+            logger.error(f"[outreach] Error sending DM to {username}: {e}")
+            ledger.release(platform, "dm")
+            errors.append(f"{username}: {e}")
+            return
+
+        # The DM is out: record it even if part of the bookkeeping fails
+        sent += 1
+        written.append(transitions.add(Transition(
+            contact_id, "ready_for_dm", "contacted",
+            metadata={"platform": platform, "message_length": len(message)},
+        )))
+        try:
+            await ledger.commit(client, platform, "dm")
             await create_outreach_sequence(
                 client,
                 contact_id=contact_id,
@@ -82,24 +147,29 @@ async def run_outreach(
                 message_text=message,
             )
             await mark_outreach_sent(client, contact_id)
-
-            validate_transition("ready_for_dm", "contacted")
-            await update_contact_stage(client, contact_id, "contacted")
-            await log_funnel_event(
-                client,
-                contact_id=contact_id,
-                from_stage="ready_for_dm",
-                to_stage="contacted",
-                triggered_by="outreach_agent",
-                metadata={"platform": platform, "message_length": len(message)},
-            )
-            await increment_cap(client, platform, "dm")
-            sent += 1
-
         except Exception as e:
-            logger.error(f"[outreach] Error sending DM to {username}: {e}")
+            logger.error(f"[outreach] Error recording DM to {username}: {e}")
             errors.append(f"{username}: {e}")
 
+    jobs = []
+    pool = get_worker_pool()
+    for contact in contacts:
+        platform = contact.get("platform", "")
+        if service_port(platform, "dm") is None:
+            skipped += 1
+            continue
+        jobs.append(pool.submit(platform, "dm", lambda c=contact: send_one(c)))
+
+    for outcome in await asyncio.gather(*jobs, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            logger.error(f"[outreach] Worker error: {outcome}")
+            errors.append(str(outcome))
+
+    await transitions.flush(final=True)
+    for outcome in await asyncio.gather(*written, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            errors.append(f"Stage transition failed: {outcome}")
+
     return {
         "total_ready": len(contacts),
         "sent": sent,
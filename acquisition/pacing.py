@@ -0,0 +1,146 @@
+"""Human-like pacing for Safari actions.
+
+Spreads each platform's daily cap across the active-hours window as a
+jittered timetable, so sends trickle out through the day instead of
+bursting through the cap at the top of the first cycle.
+
+Times are naive local datetimes, matching the orchestrator's
+active-hours check.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+from datetime import date, datetime, time, timedelta
+
+from .config import ACTIVE_HOURS_END, ACTIVE_HOURS_START, DEFAULT_DAILY_CAPS
+
+logger = logging.getLogger(__name__)
+
+
+class PacingScheduler:
+    """Per-platform jittered send timetables.
+
+    Slot i of a day is reserved for the (i+1)-th action on that
+    platform/action, so the daily cap counter doubles as the timetable
+    cursor and restarts resume where the day left off.
+    """
+
+    def __init__(
+        self,
+        caps: dict[str, dict[str, int]] | None = None,
+        *,
+        start_hour: int = ACTIVE_HOURS_START,
+        end_hour: int = ACTIVE_HOURS_END,
+        jitter: float = 0.6,
+        horizon_seconds: float = 3600,
+        min_gap_fraction: float = 0.25,
+        seed: str = "",
+    ):
+        if end_hour <= start_hour:
+            raise ValueError(f"Active hours must be increasing: {start_hour}-{end_hour}")
+        self.caps = caps if caps is not None else DEFAULT_DAILY_CAPS
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.horizon_seconds = horizon_seconds
+        self.min_gap_fraction = min_gap_fraction
+        self.seed = seed
+        self._timetables: dict[tuple[date, str, str], list[datetime]] = {}
+        self._last_dispatch: dict[tuple[str, str], datetime] = {}
+
+    def window(self, day: date) -> tuple[datetime, datetime]:
+        return (
+            datetime.combine(day, time(self.start_hour)),
+            datetime.combine(day, time(self.end_hour)),
+        )
+
+    def slot_interval(self, platform: str, action: str) -> timedelta:
+        """Average spacing between two slots for platform/action."""
+        limit = self.caps.get(platform, {}).get(action, 0)
+        span = timedelta(hours=self.end_hour - self.start_hour)
+        return span / limit if limit else span
+
+    def timetable(self, platform: str, action: str, day: date | None = None) -> list[datetime]:
+        """Return the day's send slots for platform/action, in order.
+
+        The window is cut into `daily_limit` equal slices and each slot is
+        placed at a random offset within its slice. Seeding by day makes the
+        timetable stable across cycles and restarts.
+        """
+        day = day or date.today()
+        key = (day, platform, action)
+        cached = self._timetables.get(key)
+        if cached is not None:
+            return cached
+
+        limit = self.caps.get(platform, {}).get(action, 0)
+        start, _ = self.window(day)
+        interval = self.slot_interval(platform, action)
+        digest = hashlib.sha256(f"{self.seed}:{day}:{platform}:{action}".encode()).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+
+        low = (1 - self.jitter) / 2
+        slots = [
+            start + interval * (i + low + rng.random() * self.jitter)
+            for i in range(limit)
+        ]
+
+        # Keep only the current day's tables around
+        for stale in [k for k in self._timetables if k[0] != day]:
+            del self._timetables[stale]
+        self._timetables[key] = slots
+        return slots
+
+    def next_slot(
+        self,
+        platform: str,
+        action: str,
+        sent_today: int,
+        now: datetime | None = None,
+    ) -> datetime | None:
+        """Return when the next action may be dispatched, or None.
+
+        None means the day's slots are used up, the active window has
+        closed, or the next slot lies beyond the scheduling horizon.
+        Overdue slots are released one at a time, at least a fraction of
+        the slot interval apart, so catch-up after downtime stays paced.
+        """
+        now = now or datetime.now()
+        slots = self.timetable(platform, action, now.date())
+        if sent_today >= len(slots):
+            return None
+        _, window_end = self.window(now.date())
+        if now >= window_end:
+            return None
+
+        at = slots[sent_today]
+        last = self._last_dispatch.get((platform, action))
+        if last is not None:
+            at = max(at, last + self.slot_interval(platform, action) * self.min_gap_fraction)
+        at = max(at, now)
+
+        if at >= window_end or at > now + timedelta(seconds=self.horizon_seconds):
+            return None
+        return at
+
+    async def wait_turn(
+        self,
+        platform: str,
+        action: str,
+        sent_today: int,
+    ) -> bool:
+        """Sleep until the next slot for platform/action.
+
+        Returns False without sleeping if there is no slot within the horizon.
+        """
+        at = self.next_slot(platform, action, sent_today)
+        if at is None:
+            return False
+        delay = (at - datetime.now()).total_seconds()
+        if delay > 0:
+            logger.info(f"[pacing] {platform}/{action} next slot at {at:%H:%M:%S} ({delay:.0f}s)")
+            await asyncio.sleep(delay)
+        self._last_dispatch[(platform, action)] = datetime.now()
+        return True
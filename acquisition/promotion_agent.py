@@ -0,0 +1,135 @@
+"""Warming → ready_for_dm promotion.
+
+Every sent warmup bumps crm_contacts.warmup_comments_sent (see
+acq_record_warmup_sent), so promotion is one indexed query per niche for
+contacts at or past the niche's warmup_comments_before_dm, followed by a
+single bulk transition.
+
+Contacts whose warmups have all run out (none pending) without reaching
+the threshold — failed sends, posts never found — would otherwise stay
+in warming for good. They are archived rather than cold-DM'd, and can
+come back through re-entry. Contacts that ran out at or past the
+threshold are promoted as usual.
+
+Requires migration 008 (crm_contacts.warmup_comments_sent).
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from .config import NicheConfig
+from .db.queries import (
+    get_active_niches,
+    get_exhausted_warming_contacts,
+    get_pending_warmup_contact_ids,
+    get_promotable_contacts,
+    iter_rows,
+)
+from .transitions import Transition, apply_transitions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMMENTS_BEFORE_DM = NicheConfig.__dataclass_fields__["warmup_comments_before_dm"].default
+
+# Schedule rows are inserted just after a contact enters warming
+EXHAUSTED_SETTLE_SECONDS = 600
+
+
+async def promote_warmed_contacts(
+    client: httpx.AsyncClient,
+    *,
+    niches: dict[str, NicheConfig] | None = None,
+    limit: int = 500,
+    dry_run: bool = False,
+) -> dict:
+    """Move warming contacts that finished their warmups to ready_for_dm.
+
+    `niches` maps niche_id → NicheConfig; it is loaded from
+    acq_niche_configs when not given. Contacts outside those niches use
+    the NicheConfig default threshold.
+    """
+    if niches is None:
+        niches = {row["niche_id"]: NicheConfig.from_row(row) for row in await get_active_niches(client)}
+
+    candidates: list[dict] = []
+    for niche_id, niche in niches.items():
+        candidates += await get_promotable_contacts(
+            client, max(niche.warmup_comments_before_dm, 0), niche_id=niche_id, limit=limit
+        )
+    candidates += await get_promotable_contacts(
+        client, DEFAULT_COMMENTS_BEFORE_DM, exclude_niches=list(niches), limit=limit
+    )
+    warmed = {str(c["id"]) for c in candidates}
+    archive: list[dict] = []
+    for c in await _get_exhausted_contacts(client, limit):
+        if str(c["id"]) in warmed:
+            continue
+        niche = niches.get(c.get("niche_id") or "")
+        threshold = niche.warmup_comments_before_dm if niche else DEFAULT_COMMENTS_BEFORE_DM
+        if (c.get("warmup_comments_sent") or 0) >= threshold:
+            candidates.append(c)
+        else:
+            archive.append(c)
+
+    transitions = [
+        Transition(c["id"], "warming", "ready_for_dm", metadata=_metadata(c))
+        for c in candidates
+    ] + [
+        Transition(
+            c["id"], "warming", "archived",
+            metadata={**_metadata(c), "reason": "warmups_exhausted"},
+        )
+        for c in archive
+    ]
+    results = await apply_transitions(
+        client, transitions, triggered_by="promotion_agent", dry_run=dry_run
+    )
+    moved = [r for r in results if r["status"] in ("applied", "dry_run")]
+    promoted = sum(1 for r in moved if r["to_stage"] == "ready_for_dm")
+    archived = len(moved) - promoted
+    if promoted:
+        logger.info(f"[promotion] Promoted {promoted} contacts to ready_for_dm")
+    if archived:
+        logger.info(f"[promotion] Archived {archived} contacts whose warmups ran out short")
+    return {
+        "candidates": len(candidates),
+        "promoted": promoted,
+        "exhausted": len(archive),
+        "archived": archived,
+    }
+
+
+def _metadata(contact: dict) -> dict:
+    return {
+        "warmup_comments_sent": contact.get("warmup_comments_sent"),
+        "niche_id": contact.get("niche_id"),
+        "platform": contact.get("platform"),
+    }
+
+
+async def _get_exhausted_contacts(client: httpx.AsyncClient, limit: int) -> list[dict]:
+    try:
+        return await get_exhausted_warming_contacts(
+            client, settle_seconds=EXHAUSTED_SETTLE_SECONDS, limit=limit
+        )
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+        logger.warning(
+            "[promotion] acq_exhausted_warming_contacts RPC missing, checking warmups per page"
+        )
+
+    settled = datetime.now(timezone.utc) - timedelta(seconds=EXHAUSTED_SETTLE_SECONDS)
+    exhausted: list[dict] = []
+    async for page in iter_rows(client, "crm_contacts", params={
+        "pipeline_stage": "eq.warming",
+        "updated_at": f"lt.{settled.isoformat()}",
+        "select": "id,niche_id,platform,warmup_comments_sent",
+    }, cursor="updated_at", page_size=200):
+        pending = await get_pending_warmup_contact_ids(client, [str(c["id"]) for c in page])
+        exhausted += [c for c in page if str(c["id"]) not in pending]
+        if len(exhausted) >= limit:
+            break
+    return exhausted[:limit]
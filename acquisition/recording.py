@@ -0,0 +1,318 @@
+"""Record and replay the shared client's upstream traffic.
+
+With ACQ_HTTP_RECORD=<path> every request the acquisition client makes
+(Supabase, Safari services, Market Research, Claude, Telegram) is
+written with its response and timing to a gzipped NDJSON file. With
+ACQ_HTTP_REPLAY=<path> the client sends nothing and answers from that
+recording instead, waiting each exchange's recorded latency divided by
+ACQ_HTTP_REPLAY_SPEED (0 answers immediately). A slow production cycle
+can then be re-run offline against candidate code and its request
+counts and wall time compared.
+
+Candidate code won't send byte-identical requests (timestamps in
+filters, changed queries), so replay matches each request in order of
+preference:
+
+  exact       method, URL and body
+  normalized  the same with timestamps and dates masked
+  route       method and URL path
+  reused      the last exchange that matched, once all are consumed
+
+and answers anything else with a 404, which RPC callers already treat
+as "not deployed" and fall back from.
+
+Inspect a recording with:
+    python -m acquisition.recording summary cycle.ndjson.gz
+"""
+
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, Iterator
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Never written to a recording
+REDACTED_HEADERS = {"authorization", "apikey", "x-api-key", "cookie", "set-cookie"}
+
+# Describe the original encoding, not the decoded body we record
+DROPPED_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+_TIMESTAMP = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+
+
+def _encode_body(content: bytes) -> dict:
+    if not content:
+        return {"body": None}
+    try:
+        return {"body": content.decode()}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(content).decode(), "body_encoding": "base64"}
+
+
+def _decode_body(record: dict) -> bytes:
+    body = record.get("body")
+    if body is None:
+        return b""
+    if record.get("body_encoding") == "base64":
+        return base64.b64decode(body)
+    return body.encode()
+
+
+def _headers(headers: httpx.Headers, dropped: set[str] = frozenset()) -> list[list[str]]:
+    return [
+        [k, v] for k, v in headers.multi_items()
+        if k.lower() not in REDACTED_HEADERS and k.lower() not in dropped
+    ]
+
+
+class Recorder:
+    """Appends exchanges from every wrapped transport to one file.
+
+    The file is truncated when first opened in a process and closed
+    when the last wrapping transport is.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.exchanges = 0
+        self._file = None
+        self._opened = False
+        self._users = 0
+        self._started = time.monotonic()
+
+    def wrap(self, transport: httpx.AsyncBaseTransport) -> "RecordingTransport":
+        self._users += 1
+        return RecordingTransport(transport, self)
+
+    def write(self, record: dict):
+        if self._file is None:
+            self._file = gzip.open(self.path, "at" if self._opened else "wt", encoding="utf-8")
+            if not self._opened:
+                self._write({
+                    "type": "session",
+                    "started_at": datetime.now(timezone.utc).isoformat(),
+                    "pid": os.getpid(),
+                })
+            self._opened = True
+        self.exchanges += 1
+        self._write({"type": "exchange", "seq": self.exchanges, **record})
+
+    def offset(self) -> float:
+        return time.monotonic() - self._started
+
+    def release(self):
+        self._users -= 1
+        if self._users <= 0 and self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(f"[recording] Wrote {self.exchanges} exchanges to {self.path}")
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests through to `inner`, recording each exchange."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, recorder: Recorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request_body = await request.aread()
+        record: dict[str, Any] = {
+            "at": round(self.recorder.offset(), 6),
+            "method": request.method,
+            "url": str(request.url),
+            "request": {"headers": _headers(request.headers), **_encode_body(request_body)},
+        }
+        started = time.perf_counter()
+        try:
+            response = await self.inner.handle_async_request(request)
+            content = await response.aread()
+            await response.aclose()
+        except httpx.TransportError as e:
+            record["elapsed"] = round(time.perf_counter() - started, 6)
+            record["error"] = {"type": type(e).__name__, "message": str(e)}
+            self.recorder.write(record)
+            raise
+        record["elapsed"] = round(time.perf_counter() - started, 6)
+        headers = _headers(response.headers, DROPPED_RESPONSE_HEADERS)
+        record.update(status=response.status_code, headers=headers, **_encode_body(content))
+        self.recorder.write(record)
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=content,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self.inner.aclose()
+        self.recorder.release()
+
+
+def read_recording(path: str) -> Iterator[dict]:
+    """The exchanges in a recording, in the order they were made."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("type") == "exchange":
+                    yield record
+
+
+def _normalize(text: str) -> str:
+    return _TIMESTAMP.sub("<ts>", unquote(text))
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers requests from a recording instead of the network."""
+
+    LEVELS = ("exact", "normalized", "route")
+
+    def __init__(self, path: str, *, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self.stats: Counter = Counter()
+        self._queues: dict[str, dict[tuple, deque]] = {
+            level: defaultdict(deque) for level in self.LEVELS
+        }
+        self._last: dict[tuple, dict] = {}
+        self._used: set[int] = set()
+        for record in read_recording(path):
+            keys = self._keys(record["method"], record["url"], record.get("request", {}))
+            for level, key in zip(self.LEVELS, keys):
+                self._queues[level][key].append(record)
+        logger.info(f"[recording] Replaying {path} at speed {speed or 'unthrottled'}")
+
+    @staticmethod
+    def _keys(method: str, url: str, request: dict) -> tuple[tuple, tuple, tuple]:
+        body = request.get("body") or ""
+        parts = urlsplit(url)
+        return (
+            (method, url, body),
+            (method, _normalize(url), _normalize(body)),
+            (method, f"{parts.scheme}://{parts.netloc}{parts.path}"),
+        )
+
+    def match(self, request: httpx.Request, body: bytes) -> tuple[str, dict | None]:
+        keys = self._keys(request.method, str(request.url), _encode_body(body))
+        for level, key in zip(self.LEVELS, keys):
+            queue = self._queues[level].get(key)
+            while queue:
+                record = queue.popleft()
+                if record["seq"] not in self._used:
+                    self._used.add(record["seq"])
+                    for k in keys:
+                        self._last[k] = record
+                    return level, record
+        # Repeated polls beyond what was recorded get the latest answer
+        for key in keys:
+            if key in self._last:
+                return "reused", self._last[key]
+        return "miss", None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        level, record = self.match(request, body)
+        self.stats["requests"] += 1
+        self.stats[level] += 1
+        if record is None:
+            logger.warning(f"[recording] No recorded exchange for {request.method} {request.url}")
+            return httpx.Response(
+                404, json={"code": "REPLAY404", "message": "Not in recording"}, request=request
+            )
+
+        if self.speed > 0 and record.get("elapsed"):
+            await asyncio.sleep(record["elapsed"] / self.speed)
+        if "error" in record:
+            error = getattr(httpx, record["error"]["type"], None)
+            if not (isinstance(error, type) and issubclass(error, httpx.TransportError)):
+                error = httpx.TransportError
+            raise error(record["error"]["message"], request=request)
+        return httpx.Response(
+            record["status"],
+            headers=record.get("headers") or [],
+            content=_decode_body(record),
+            request=request,
+        )
+
+    def metrics(self) -> dict:
+        return dict(self.stats)
+
+
+_recorders: dict[str, Recorder] = {}
+_replays: dict[str, ReplayTransport] = {}
+
+
+def get_recorder(path: str) -> Recorder:
+    """The process-wide recorder for `path`; "{pid}" in it is replaced."""
+    path = path.replace("{pid}", str(os.getpid()))
+    if path not in _recorders:
+        _recorders[path] = Recorder(path)
+    return _recorders[path]
+
+
+def get_replay(path: str, *, speed: float = 1.0) -> ReplayTransport:
+    """The process-wide replay of `path`, shared by every client."""
+    if path not in _replays:
+        _replays[path] = ReplayTransport(path, speed=speed)
+    return _replays[path]
+
+
+def summarize(path: str) -> dict:
+    """Request counts and upstream time per route in a recording."""
+    routes: Counter = Counter()
+    seconds: Counter = Counter()
+    statuses: Counter = Counter()
+    first, last = None, 0.0
+    for record in read_recording(path):
+        parts = urlsplit(record["url"])
+        route = f"{record['method']} {parts.netloc}{parts.path}"
+        routes[route] += 1
+        seconds[route] += record.get("elapsed", 0)
+        statuses[str(record.get("status", "error"))] += 1
+        first = record["at"] if first is None else first
+        last = max(last, record["at"] + record.get("elapsed", 0))
+    return {
+        "requests": sum(routes.values()),
+        "wall_seconds": round(last - (first or 0), 3),
+        "upstream_seconds": round(sum(seconds.values()), 3),
+        "statuses": dict(statuses),
+        "routes": {
+            route: {"requests": n, "seconds": round(seconds[route], 3)}
+            for route, n in routes.most_common()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect acquisition HTTP recordings")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="Request counts and timing per route")
+    summary.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    report = {path: summarize(path) for path in args.paths}
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
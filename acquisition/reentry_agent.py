@@ -0,0 +1,73 @@
+"""Archive re-entry sweeper.
+
+Moves archived contacts whose ARCHIVE_COOLDOWN_DAYS have passed back to
+'new', so they re-enter scoring without discovery having to find them
+again through platform searches. Candidates are read in keyset pages off
+the archived_at partial index and moved with bulk transitions.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+import httpx
+
+from .db.queries import get_reentry_candidates
+from .state_machine import COOLDOWN
+from .transitions import Transition, apply_transitions
+
+logger = logging.getLogger(__name__)
+
+
+async def sweep_reentries(
+    client: httpx.AsyncClient,
+    *,
+    page_size: int = 500,
+    max_contacts: int = 5000,
+    dry_run: bool = False,
+) -> dict:
+    """Re-enter archived contacts past their cooldown, up to max_contacts."""
+    cutoff = datetime.now(timezone.utc) - COOLDOWN
+    after: tuple[str, str] | None = None
+    scanned = 0
+    reentered = 0
+    errors: list[str] = []
+
+    while scanned < max_contacts:
+        page = await get_reentry_candidates(
+            client, cutoff, after=after, limit=min(page_size, max_contacts - scanned)
+        )
+        if not page:
+            break
+        scanned += len(page)
+        after = (page[-1]["archived_at"], page[-1]["id"])
+
+        results = await apply_transitions(
+            client,
+            [
+                Transition(
+                    c["id"], "archived", "new",
+                    metadata={
+                        "reentry": True,
+                        "archived_at": c["archived_at"],
+                        "platform": c.get("platform"),
+                        "niche_id": c.get("niche_id"),
+                    },
+                    archived_at=c["archived_at"],
+                )
+                for c in page
+            ],
+            triggered_by="reentry_sweeper",
+            dry_run=dry_run,
+        )
+        for result in results:
+            if result["status"] in ("applied", "dry_run"):
+                reentered += 1
+            elif result["error"]:
+                errors.append(f"{result['contact_id']}: {result['error']}")
+
+        if len(page) < page_size:
+            break
+
+    if reentered:
+        logger.info(f"[reentry] Re-entered {reentered}/{scanned} archived contacts")
+    return {"scanned": scanned, "reentered": reentered, "errors": errors}
@@ -3,19 +3,85 @@
 Generates funnel analytics and weekly performance reports.
 """
 
+import asyncio
 import logging
+import time
 from datetime import date, datetime, timedelta, timezone
 
 import httpx
 
+from .analytics import get_cohort_report
 from .config import PIPELINE_STAGES, SUPABASE_URL, get_supabase_headers
-from .db.queries import save_weekly_report
+from .db.queries import (
+    get_contacts_by_ids,
+    get_funnel_rollups,
+    get_platform_stage_counts,
+    get_stage_counts,
+    iter_funnel_events,
+    save_weekly_report,
+)
+from .snapshot import open_snapshot
+from .transitions import add_pipeline_listener
 
 logger = logging.getLogger(__name__)
 
+# Cohort analytics look back this far so time-in-stage spans several weeks
+COHORT_WINDOW_DAYS = 28
+# Segments smaller than this are too noisy to recommend on
+COHORT_MIN_CONTACTS = 20
 
-async def get_funnel_snapshot(client: httpx.AsyncClient) -> dict[str, int]:
-    """Get current count of contacts in each pipeline stage."""
+
+_funnel_cache: tuple[float, dict[str, int]] | None = None
+_funnel_lock = asyncio.Lock()
+
+
+async def get_funnel_snapshot(
+    client: httpx.AsyncClient,
+    *,
+    max_age: float = 0,
+) -> dict[str, int]:
+    """Get current count of contacts in each pipeline stage.
+
+    With max_age > 0, a snapshot younger than max_age seconds is served
+    from the in-process cache, and concurrent misses share one query.
+    """
+    if max_age <= 0:
+        return await _query_funnel_snapshot(client)
+
+    global _funnel_cache
+    async with _funnel_lock:
+        if _funnel_cache and time.monotonic() - _funnel_cache[0] < max_age:
+            return dict(_funnel_cache[1])
+        counts = await _query_funnel_snapshot(client)
+        _funnel_cache = (time.monotonic(), counts)
+        return dict(counts)
+
+
+def invalidate_funnel_snapshot():
+    """Drop the cached funnel snapshot."""
+    global _funnel_cache
+    _funnel_cache = None
+
+
+add_pipeline_listener(invalidate_funnel_snapshot)
+
+
+async def _query_funnel_snapshot(client: httpx.AsyncClient) -> dict[str, int]:
+    snapshot = open_snapshot()
+    if snapshot is not None:
+        return await asyncio.to_thread(snapshot.funnel_snapshot)
+    try:
+        grouped = await get_stage_counts(client)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+        logger.warning("[reporting] acq_funnel_stage_counts RPC missing, counting per stage")
+        return await _count_stages_individually(client)
+    return {stage: grouped.get(stage, 0) for stage in PIPELINE_STAGES}
+
+
+async def _count_stages_individually(client: httpx.AsyncClient) -> dict[str, int]:
+    """Fallback for databases without migration 002: one count per stage."""
     counts = {}
     for stage in PIPELINE_STAGES:
         resp = await client.get(
@@ -37,30 +103,199 @@ async def get_funnel_snapshot(client: httpx.AsyncClient) -> dict[str, int]:
 async def get_platform_breakdown(
     client: httpx.AsyncClient,
     since: date,
+    until: date | None = None,
 ) -> dict[str, dict]:
-    """Get per-platform activity counts since a given date."""
-    resp = await client.get(
-        f"{SUPABASE_URL}/rest/v1/acq_funnel_events",
-        headers=get_supabase_headers(),
-        params={
-            "created_at": f"gte.{since.isoformat()}",
-            "select": "to_stage,metadata",
-        },
-    )
-    resp.raise_for_status()
-    events = resp.json()
+    """Get per-platform activity counts since a given date.
+
+    Aggregated server-side by the acq_platform_breakdown RPC. Without the
+    RPC, events are streamed in pages and counted locally. With
+    ACQ_REPORTING_SOURCE=snapshot, counts come from the local snapshot.
+    """
+    start = _day_start(since)
+    end = _day_start(until) if until else None
+    snapshot = open_snapshot()
+    if snapshot is not None:
+        return await asyncio.to_thread(snapshot.platform_breakdown, start, end)
+    try:
+        rows = await get_platform_stage_counts(client, start, end)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+        logger.warning("[reporting] acq_platform_breakdown RPC missing, streaming events")
+        return await _stream_platform_breakdown(client, start, end)
 
     breakdown: dict[str, dict[str, int]] = {}
-    for event in events:
-        platform = event.get("metadata", {}).get("platform", "unknown")
-        stage = event.get("to_stage", "unknown")
-        if platform not in breakdown:
-            breakdown[platform] = {}
-        breakdown[platform][stage] = breakdown[platform].get(stage, 0) + 1
+    for row in rows:
+        platform = row.get("platform") or "unknown"
+        stage = row.get("to_stage") or "unknown"
+        breakdown.setdefault(platform, {})[stage] = int(row["count"])
+    return breakdown
+
 
+async def _stream_platform_breakdown(
+    client: httpx.AsyncClient,
+    since: datetime,
+    until: datetime | None = None,
+) -> dict[str, dict]:
+    breakdown: dict[str, dict[str, int]] = {}
+    async for page in iter_funnel_events(client, since, until, select="to_stage,metadata"):
+        for event in page:
+            platform = (event.get("metadata") or {}).get("platform", "unknown")
+            stage = event.get("to_stage", "unknown")
+            if platform not in breakdown:
+                breakdown[platform] = {}
+            breakdown[platform][stage] = breakdown[platform].get(stage, 0) + 1
     return breakdown
 
 
+ROLLUP_DIMENSIONS = ("bucket", "niche_id", "platform", "from_stage", "to_stage")
+ROLLUP_GRANULARITIES = ("hour", "day")
+# Contacts per id=in.(...) lookup, to keep URLs short
+CONTACT_LOOKUP_CHUNK = 200
+
+
+async def get_funnel_activity(
+    client: httpx.AsyncClient,
+    since: datetime,
+    until: datetime | None = None,
+    *,
+    group_by: tuple[str, ...] = ("platform", "to_stage"),
+    granularity: str | None = None,
+) -> list[dict]:
+    """Ad-hoc funnel event counts over a time range, read from the rollups.
+
+    group_by picks any of ROLLUP_DIMENSIONS; rows come back as dicts of
+    those keys plus "count", largest first.
+    """
+    unknown = set(group_by) - set(ROLLUP_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown rollup dimensions: {sorted(unknown)}")
+    if granularity is not None and granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"Granularity must be one of {list(ROLLUP_GRANULARITIES)}")
+
+    until = until or datetime.now(timezone.utc)
+    totals: dict[tuple, int] = {}
+    for row in await _activity_rows(client, since, until, granularity):
+        key = tuple(row.get(dim) for dim in group_by)
+        totals[key] = totals.get(key, 0) + int(row["count"])
+
+    activity = [{**dict(zip(group_by, key)), "count": n} for key, n in totals.items()]
+    activity.sort(key=lambda r: r["count"], reverse=True)
+    return activity
+
+
+async def _activity_rows(
+    client: httpx.AsyncClient,
+    since: datetime,
+    until: datetime,
+    granularity: str | None,
+) -> list[dict]:
+    """Rollup rows covering exactly [since, until).
+
+    Rollup buckets are whole hours (or days), so the RPC only reads the
+    aligned middle of the range and any partial bucket at either end is
+    counted from raw events. Without the RPC (migration 004 not
+    applied) the whole range is counted from raw events.
+    """
+    unit = _bucket_unit(since, until, granularity)
+    first, last = _ceil(since, unit), _floor(until, unit)
+    if first >= last:
+        return await _count_events(client, since, until, unit)
+    try:
+        rows = await get_funnel_rollups(client, first, last, granularity)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+        logger.warning("[reporting] acq_funnel_rollups RPC missing, streaming events")
+        return await _count_events(client, since, until, unit)
+    if since < first:
+        rows += await _count_events(client, since, first, unit)
+    if last < until:
+        rows += await _count_events(client, last, until, unit)
+    return rows
+
+
+async def _count_events(
+    client: httpx.AsyncClient,
+    since: datetime,
+    until: datetime,
+    unit: str,
+) -> list[dict]:
+    """Rollup-shaped rows counted from raw acq_funnel_events.
+
+    Attribution matches the rollup trigger (migration 004): niche and
+    platform come from the event metadata, else from the contact.
+    """
+    counts: dict[tuple, int] = {}
+    contacts: dict[str, dict] = {}
+    async for page in iter_funnel_events(
+        client, since, until, select="contact_id,from_stage,to_stage,metadata,created_at"
+    ):
+        await _load_event_contacts(client, page, contacts)
+        for event in page:
+            metadata = event.get("metadata") or {}
+            contact = contacts.get(str(event.get("contact_id")), {})
+            key = (
+                _floor(_parse_ts(event["created_at"]), unit).isoformat(),
+                metadata.get("niche_id") or contact.get("niche_id") or "",
+                metadata.get("platform") or contact.get("platform") or "unknown",
+                event.get("from_stage"),
+                event.get("to_stage"),
+            )
+            counts[key] = counts.get(key, 0) + 1
+    return [{**dict(zip(ROLLUP_DIMENSIONS, key)), "count": n} for key, n in counts.items()]
+
+
+async def _load_event_contacts(
+    client: httpx.AsyncClient,
+    events: list[dict],
+    contacts: dict[str, dict],
+):
+    """Add the niche and platform of contacts whose events lack them."""
+    missing = list({
+        str(e["contact_id"]) for e in events
+        if e.get("contact_id") and str(e["contact_id"]) not in contacts
+        and not all((e.get("metadata") or {}).get(k) for k in ("niche_id", "platform"))
+    })
+    for i in range(0, len(missing), CONTACT_LOOKUP_CHUNK):
+        chunk = missing[i:i + CONTACT_LOOKUP_CHUNK]
+        rows = await get_contacts_by_ids(client, chunk, select="id,niche_id,platform")
+        contacts.update({str(c["id"]): c for c in rows})
+        # Deleted contacts: don't look them up again
+        contacts.update({cid: {} for cid in chunk if cid not in contacts})
+
+
+def _bucket_unit(since: datetime, until: datetime, granularity: str | None) -> str:
+    """The bucket size acq_funnel_rollups would use for this range."""
+    if granularity:
+        return granularity
+    aligned = all(_floor(t, "day") == t for t in (since, until))
+    return "day" if aligned else "hour"
+
+
+def _floor(ts: datetime, unit: str) -> datetime:
+    ts = ts.astimezone(timezone.utc)
+    if unit == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _ceil(ts: datetime, unit: str) -> datetime:
+    floor = _floor(ts, unit)
+    if floor == ts:
+        return floor
+    return floor + (timedelta(days=1) if unit == "day" else timedelta(hours=1))
+
+
+def _parse_ts(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+
+
 async def generate_weekly_report(
     client: httpx.AsyncClient,
     *,
@@ -79,13 +314,27 @@ async def generate_weekly_report(
     ]
 
     platform_breakdown = await get_platform_breakdown(client, week_start)
+    transitions = await get_funnel_activity(
+        client,
+        _day_start(week_start),
+        _day_start(week_end + timedelta(days=1)),
+        group_by=("niche_id", "from_stage", "to_stage"),
+    )
+
+    cohorts = await get_cohort_report(
+        client,
+        _day_start(today - timedelta(days=COHORT_WINDOW_DAYS)),
+        snapshot=open_snapshot(),
+    )
 
-    recommendations = _generate_recommendations(funnel, platform_breakdown)
+    recommendations = _generate_recommendations(funnel, platform_breakdown, cohorts)
 
     report_data = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "funnel_snapshot": funnel,
         "total_contacts": total,
+        "transitions": transitions,
+        "cohorts": cohorts,
     }
 
     if not dry_run:
@@ -110,8 +359,9 @@ async def generate_weekly_report(
 def _generate_recommendations(
     funnel: dict[str, int],
     platforms: dict[str, dict],
+    cohorts: dict | None = None,
 ) -> list[str]:
-    """Generate actionable recommendations from funnel data."""
+    """Generate actionable recommendations from funnel and cohort data."""
     recs = []
 
     new_count = funnel.get("new", 0)
@@ -132,7 +382,52 @@ def _generate_recommendations(
     if not platforms:
         recs.append("No platform activity this week — check Safari service connectivity")
 
+    if cohorts:
+        recs.extend(_cohort_recommendations(cohorts))
+
     if not recs:
         recs.append("Pipeline healthy — continue current cadence")
 
     return recs
+
+
+def _cohort_recommendations(cohorts: dict) -> list[str]:
+    """Recommendations from conversion rates and time-in-stage."""
+    recs = []
+    overall = cohorts["overall"]["stages"]
+
+    # Stage losing the largest share of the contacts that reach it
+    leaky = [
+        (stats["dropped"] / stats["reached"], stage)
+        for stage, stats in overall.items()
+        if stats["reached"] >= COHORT_MIN_CONTACTS
+    ]
+    if leaky:
+        rate, stage = max(leaky)
+        if rate >= 0.25:
+            recs.append(f"Largest drop-off at {stage}: {rate:.0%} of contacts archived there")
+
+    warming_p90 = overall["warming"]["p90_hours"]
+    if warming_p90 is not None and warming_p90 > 24 * 7:
+        recs.append(
+            f"Slow warmup — p90 time in warming is {warming_p90 / 24:.1f} days; "
+            f"check warmup execution and promotion"
+        )
+
+    # Segments whose reply rate trails the overall rate by half or more
+    baseline = overall["contacted"]["conversion_rate"]
+    if baseline:
+        for segment in cohorts["segments"]:
+            stats = segment["stages"]["contacted"]
+            if stats["reached"] < COHORT_MIN_CONTACTS or stats["conversion_rate"] is None:
+                continue
+            if stats["conversion_rate"] < baseline / 2:
+                label = "/".join(
+                    str(segment[d]) for d in cohorts["dimensions"] if segment.get(d)
+                ) or "unattributed"
+                recs.append(
+                    f"Reply rate for {label} is {stats['conversion_rate']:.0%} vs "
+                    f"{baseline:.0%} overall — review DM variant and targeting"
+                )
+
+    return recs
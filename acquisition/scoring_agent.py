@@ -8,8 +8,8 @@ import logging
 import httpx
 
 from .config import ANTHROPIC_API_KEY, SCORING_MODEL
-from .db.queries import get_contacts_by_stage, update_contact_stage, log_funnel_event
-from .state_machine import validate_transition
+from .db.queries import get_contacts_by_stage
+from .transitions import Transition, apply_transitions
 
 logger = logging.getLogger(__name__)
 
@@ -23,40 +23,51 @@ async def run_scoring(
     batch_size: int = 50,
     dry_run: bool = False,
 ) -> dict:
-    """Score all 'new' contacts and advance qualified ones."""
+    """Score all 'new' contacts and advance qualified ones.
+
+    A contact with an unusable score, or a failed transition write, is
+    reported in "errors" without failing the rest of the batch.
+    """
     contacts = await get_contacts_by_stage(client, "new", limit=batch_size)
-    qualified = 0
     skipped = 0
-    errors = []
+    errors: list[str] = []
+    candidates: list[Transition] = []
 
     for contact in contacts:
-        contact_id = contact["id"]
         icp_score = contact.get("icp_score")
-
         if icp_score is None:
             skipped += 1
             continue
-
         try:
-            if float(icp_score) >= threshold:
-                validate_transition("new", "qualified")
-                if not dry_run:
-                    await update_contact_stage(client, contact_id, "qualified")
-                    await log_funnel_event(
-                        client,
-                        contact_id=contact_id,
-                        from_stage="new",
-                        to_stage="qualified",
-                        triggered_by="scoring_agent",
-                        metadata={"icp_score": float(icp_score), "threshold": threshold},
-                    )
-                qualified += 1
-                logger.info(f"[scoring] Qualified: {contact_id} (score={icp_score})")
-            else:
-                skipped += 1
-        except Exception as e:
-            logger.error(f"[scoring] Error processing {contact_id}: {e}")
-            errors.append(str(e))
+            score = float(icp_score)
+        except (TypeError, ValueError):
+            logger.error(f"[scoring] Invalid icp_score for {contact['id']}: {icp_score!r}")
+            errors.append(f"Invalid icp_score {icp_score!r} for {contact['id']}")
+            continue
+        if not score >= threshold:  # NaN never qualifies
+            skipped += 1
+            continue
+        candidates.append(Transition(
+            contact["id"], "new", "qualified",
+            metadata={"icp_score": score, "threshold": threshold},
+        ))
+
+    try:
+        results = await apply_transitions(
+            client, candidates, triggered_by="scoring_agent", dry_run=dry_run
+        )
+    except httpx.HTTPError as e:
+        logger.error(f"[scoring] Failed to qualify {len(candidates)} contacts: {e}")
+        errors.append(str(e))
+        results = []
+    qualified = 0
+    for result in results:
+        if result["status"] in ("applied", "dry_run"):
+            qualified += 1
+            logger.info(f"[scoring] Qualified: {result['contact_id']}")
+        else:
+            logger.error(f"[scoring] Error processing {result['contact_id']}: {result['error']}")
+            errors.append(result["error"] or result["status"])
 
     return {
         "total_processed": len(contacts),
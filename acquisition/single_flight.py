@@ -0,0 +1,182 @@
+"""Single-flight guard for orchestrator cycles and phases.
+
+Overlapping runs of the same phase double-send DMs and double-count
+caps. SingleFlight allows one run per key at a time: a caller arriving
+while a run is in flight attaches to it and gets the same result
+instead of starting another.
+
+With the "postgres" backend the run also holds a lease in acq_run_locks
+(migration 011), so orchestrators in other processes skip the phase
+rather than running it alongside; they raise RunLockedError since they
+can't share this process's result.
+
+A run lasts as long as someone waits on it: when the last caller is
+cancelled (a cancelled job, shutdown), the run is cancelled too. A run
+whose lease is taken over is cancelled and raises RunLockedError.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from .config import RUN_LOCK_BACKEND, RUN_LOCK_TTL_SECONDS
+from .db.queries import release_run_lock, try_run_lock
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as a lease holder
+HOLDER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def phase_key(phase: str, dry_run: bool = False) -> str:
+    """Single-flight key for a phase; dry runs never share with live runs."""
+    return f"{phase}:dry_run" if dry_run else phase
+
+
+class RunLockedError(Exception):
+    """The phase is running in another process."""
+
+    def __init__(self, key: str, holder: str):
+        super().__init__(f"{key} is running in {holder}")
+        self.key = key
+        self.holder = holder
+
+
+class RunLease:
+    """A renewed acq_run_locks lease, held for the body of an async with.
+
+    If renewal finds the lease taken over, the task running the body is
+    cancelled and the async with raises RunLockedError.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        name: str,
+        *,
+        holder: str = HOLDER_ID,
+        ttl_seconds: int = RUN_LOCK_TTL_SECONDS,
+    ):
+        self.client = client
+        self.name = name
+        self.holder = holder
+        self.ttl_seconds = ttl_seconds
+        self.held = False
+        self.lost_to: str | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._owner: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "RunLease":
+        try:
+            current = await try_run_lock(self.client, self.name, self.holder, self.ttl_seconds)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+            # Migration 011 not applied: fall back to the in-process guard
+            logger.warning("[single-flight] acq_try_run_lock not deployed, locking in-process only")
+            return self
+        if current != self.holder:
+            raise RunLockedError(self.name, current)
+        self.held = True
+        self._owner = asyncio.current_task()
+        self._heartbeat = asyncio.create_task(self._renew())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+        if self.held:
+            try:
+                await release_run_lock(self.client, self.name, self.holder)
+            except Exception as e:
+                # The lease expires on its own
+                logger.warning(f"[single-flight] Failed to release {self.name}: {e}")
+            self.held = False
+        if self.lost_to is not None and exc_type is asyncio.CancelledError:
+            raise RunLockedError(self.name, self.lost_to) from exc
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            try:
+                current = await try_run_lock(self.client, self.name, self.holder, self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"[single-flight] Failed to renew {self.name}: {e}")
+                continue
+            if current != self.holder:
+                logger.error(f"[single-flight] Lost lease on {self.name} to {current}, stopping")
+                self.held = False
+                self.lost_to = current
+                self._owner.cancel()
+                return
+
+
+class SingleFlight:
+    """At most one in-flight run per key; later callers share its result."""
+
+    def __init__(self, *, backend: str = RUN_LOCK_BACKEND):
+        self.backend = backend
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._waiters: dict[asyncio.Task, int] = {}
+
+    def running(self) -> list[str]:
+        return list(self._inflight)
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        *,
+        client: httpx.AsyncClient | None = None,
+    ) -> Any:
+        """Run fn under `key`, or wait for the run already in flight.
+
+        Cancelling one caller doesn't cancel the run for the others;
+        cancelling the last one cancels the run and waits for it to stop.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            logger.info(f"[single-flight] {key} already running, attaching")
+        else:
+            task = asyncio.create_task(self._run(key, fn, client))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await self._wait(key, task)
+
+    async def _wait(self, key: str, task: asyncio.Task) -> Any:
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                logger.info(f"[single-flight] No one waiting on {key}, cancelling it")
+                task.cancel()
+                await asyncio.wait([task])
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    async def _run(self, key: str, fn, client: httpx.AsyncClient | None) -> Any:
+        if self.backend != "postgres" or client is None:
+            return await fn()
+        async with RunLease(client, key):
+            return await fn()
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _single_flight
@@ -0,0 +1,521 @@
+"""Local columnar mirror of the acquisition tables for offline analytics.
+
+An export job incrementally copies crm_contacts, acq_funnel_events,
+acq_discovery_runs and acq_outreach_sequences into Arrow IPC files
+partitioned by day:
+
+    {SNAPSHOT_DIR}/{table}/day=YYYY-MM-DD/part-{export_id}.arrow
+
+Each table tracks a high-water mark on its cursor column in _state.json.
+Rows are never rewritten in place: a changed row lands in a newer part
+and readers keep the last-written copy per id.
+
+LocalSnapshot reads the files memory-mapped and computes funnels,
+breakdowns and cohort frames with Arrow kernels over the mapped buffers,
+so reporting never touches the production database and never turns a
+window of events into per-row Python objects. Reads are blocking file
+I/O: async callers run them via asyncio.to_thread.
+
+Requires pyarrow (optional dependency; only this module needs it).
+
+Usage:
+    python -m acquisition.snapshot            # incremental export
+    python -m acquisition.snapshot --full     # re-export everything
+"""
+
+import asyncio
+import json
+import logging
+import shutil
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+from .analytics import NO_STAGE, STAGE_CODES, EventFrame
+from .config import PIPELINE_STAGES, REPORTING_SOURCE, SNAPSHOT_DIR
+from .db.queries import iter_rows
+from .http_client import create_http_client
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.json
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SnapshotTable:
+    """How a table is mirrored."""
+
+    name: str
+    cursor: str  # monotonic-ish timestamp column used for the high-water mark
+    refresh_days: int = 0  # re-export this trailing window (rows mutate without a cursor bump)
+
+
+SNAPSHOT_TABLES: dict[str, SnapshotTable] = {
+    t.name: t for t in (
+        SnapshotTable("crm_contacts", cursor="updated_at"),
+        SnapshotTable("acq_funnel_events", cursor="created_at"),
+        SnapshotTable("acq_discovery_runs", cursor="started_at"),
+        # status/sent_at change without an updated_at column
+        SnapshotTable("acq_outreach_sequences", cursor="created_at", refresh_days=14),
+    )
+}
+
+STATE_FILE = "_state.json"
+
+
+def _require_arrow():
+    if pa is None:
+        raise RuntimeError("Local snapshots need pyarrow: pip install pyarrow")
+
+
+# --- export ---
+
+async def export_snapshot(
+    client: httpx.AsyncClient,
+    *,
+    root: str | Path = SNAPSHOT_DIR,
+    tables: list[str] | None = None,
+    full: bool = False,
+    page_size: int = 1000,
+) -> dict:
+    """Mirror new/changed rows of each table into day partitions.
+
+    Returns per-table {"rows", "partitions", "high_water"}.
+    """
+    _require_arrow()
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    state = {} if full else _load_state(root)
+    export_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    summary = {}
+
+    for name in tables or list(SNAPSHOT_TABLES):
+        spec = SNAPSHOT_TABLES[name]
+        if full:
+            shutil.rmtree(root / name, ignore_errors=True)
+        result = await _export_table(
+            client, root, spec, state.get(name, {}).get("high_water"), export_id, page_size
+        )
+        if result["high_water"]:
+            state[name] = {
+                "high_water": result["high_water"],
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+            }
+        summary[name] = result
+        logger.info(f"[snapshot] {name}: {result['rows']} rows into {result['partitions']} partitions")
+
+    _save_state(root, state)
+    return summary
+
+
+async def _export_table(
+    client: httpx.AsyncClient,
+    root: Path,
+    spec: SnapshotTable,
+    high_water: str | None,
+    export_id: str,
+    page_size: int,
+) -> dict:
+    now = datetime.now(timezone.utc)
+    start = datetime.fromisoformat(high_water) if high_water else None
+    if start and spec.refresh_days:
+        start = min(start, now - timedelta(days=spec.refresh_days))
+
+    # gte on the mark re-reads boundary rows; readers dedupe by id
+    bounds = [f"{spec.cursor}.lte.{now.isoformat()}"]
+    if start:
+        bounds.insert(0, f"{spec.cursor}.gte.{start.isoformat()}")
+
+    rows_written = 0
+    partitions: set[str] = set()
+    buffer: list[dict] = []
+    buffer_day: str | None = None
+    latest = high_water
+
+    async for page in iter_rows(client, spec.name, params={
+        "and": f"({','.join(bounds)})",
+        "select": "*",
+    }, cursor=spec.cursor, page_size=page_size):
+        for row in page:
+            cursor = row.get(spec.cursor)
+            day = str(cursor)[:10] if cursor else "unknown"
+            if day != buffer_day and buffer:
+                _write_part(root, spec.name, buffer_day, export_id, buffer)
+                partitions.add(buffer_day)
+                rows_written += len(buffer)
+                buffer = []
+            buffer_day = day
+            buffer.append(row)
+            if cursor and (latest is None or _ts(cursor) > _ts(latest)):
+                latest = cursor
+
+    if buffer:
+        _write_part(root, spec.name, buffer_day, export_id, buffer)
+        partitions.add(buffer_day)
+        rows_written += len(buffer)
+
+    return {"rows": rows_written, "partitions": len(partitions), "high_water": latest}
+
+
+def _write_part(root: Path, table: str, day: str, export_id: str, rows: list[dict]):
+    part_dir = root / table / f"day={day}"
+    part_dir.mkdir(parents=True, exist_ok=True)
+    arrow_table = _to_arrow(rows)
+    tmp = part_dir / f".part-{export_id}.arrow.tmp"
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+    tmp.rename(part_dir / f"part-{export_id}.arrow")
+
+
+def _to_arrow(rows: list[dict]) -> "pa.Table":
+    """Rows → Arrow table. Nested values become JSON strings."""
+    names: dict[str, None] = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+
+    arrays, json_columns = [], []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if any(isinstance(v, (dict, list)) for v in values):
+            json_columns.append(name)
+            values = [json.dumps(v) if v is not None else None for v in values]
+        try:
+            arrays.append(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(pa.array([str(v) if v is not None else None for v in values]))
+
+    schema_meta = {b"json_columns": json.dumps(json_columns).encode()}
+    return pa.Table.from_arrays(arrays, names=list(names)).replace_schema_metadata(schema_meta)
+
+
+def _load_state(root: Path) -> dict:
+    path = root / STATE_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _save_state(root: Path, state: dict):
+    tmp = root / f"{STATE_FILE}.tmp"
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.rename(root / STATE_FILE)
+
+
+# --- query layer ---
+
+class LocalSnapshot:
+    """Read-only query layer over an exported snapshot."""
+
+    def __init__(self, root: str | Path = SNAPSHOT_DIR):
+        _require_arrow()
+        self.root = Path(root)
+
+    def state(self) -> dict:
+        return _load_state(self.root)
+
+    def partitions(
+        self,
+        table: str,
+        since: date | None = None,
+        until: date | None = None,
+    ) -> list[Path]:
+        """Part files for days in [since, until], oldest first."""
+        files = []
+        for day_dir in sorted((self.root / table).glob("day=*")):
+            day = day_dir.name[4:]
+            if since and day < since.isoformat():
+                continue
+            if until and day > until.isoformat():
+                continue
+            files.extend(sorted(day_dir.glob("part-*.arrow")))
+        return files
+
+    def read_table(
+        self,
+        table: str,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        columns: list[str] | None = None,
+    ) -> "pa.Table":
+        """A table as one Arrow table, last-written copy per id.
+
+        since/until filter on the table's cursor column, pruning whole
+        day partitions before any file is opened. Column data stays in
+        the memory-mapped buffers wherever no kernel had to copy it.
+        """
+        spec = SNAPSHOT_TABLES[table]
+        wanted = None
+        if columns is not None:
+            wanted = list(dict.fromkeys([*columns, "id", spec.cursor]))
+
+        files = self.partitions(
+            table,
+            since.date() if since else None,
+            until.date() if until else None,
+        )
+        parts = [_read_part(path, wanted) for path in files]
+        if not parts:
+            return pa.table({name: pa.nulls(0) for name in wanted or []})
+        return _filter_window(_dedupe(_concat(parts)), spec.cursor, since, until)
+
+    def read(self, table: str, **kwargs) -> dict[str, list]:
+        """Column-wise rows as Python lists, JSON columns decoded."""
+        arrow_table = self.read_table(table, **kwargs)
+        json_columns = _json_columns(arrow_table.schema)
+        out = {}
+        for name in arrow_table.column_names:
+            values = arrow_table.column(name).to_pylist()
+            if name in json_columns:
+                values = [json.loads(v) if v is not None else None for v in values]
+            out[name] = values
+        return out
+
+    def rows(self, table: str, **kwargs) -> list[dict]:
+        columns = self.read(table, **kwargs)
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+    def funnel_snapshot(self) -> dict[str, int]:
+        counts = dict.fromkeys(PIPELINE_STAGES, 0)
+        if not self._has("crm_contacts"):
+            return counts
+        stages = self.read_table("crm_contacts", columns=["pipeline_stage"])["pipeline_stage"]
+        for item in pc.value_counts(stages).to_pylist():
+            if item["values"] in counts:
+                counts[item["values"]] += item["counts"]
+        return counts
+
+    def platform_breakdown(
+        self,
+        since: datetime,
+        until: datetime | None = None,
+    ) -> dict[str, dict]:
+        breakdown: dict[str, dict[str, int]] = {}
+        if not self._has("acq_funnel_events"):
+            return breakdown
+        events = self.read_table(
+            "acq_funnel_events", since=since, until=until, columns=["to_stage", "metadata"]
+        )
+        if not events.num_rows:
+            return breakdown
+        meta = _json_fields(events["metadata"], ["platform"])
+        counts = pa.table({
+            "platform": pc.fill_null(meta["platform"], "unknown"),
+            "to_stage": pc.fill_null(events["to_stage"].cast(pa.string()), "unknown"),
+        }).group_by(["platform", "to_stage"]).aggregate([([], "count_all")])
+        for platform, stage, n in zip(*counts.to_pydict().values()):
+            breakdown.setdefault(platform, {})[stage] = n
+        return breakdown
+
+    def event_frame(
+        self,
+        since: datetime,
+        until: datetime | None = None,
+    ) -> EventFrame:
+        """Events for a window, filled into the frame's arrays from Arrow buffers.
+
+        Strings are dictionary-encoded by Arrow, so only each distinct
+        contact, stage and segment value passes through Python.
+        """
+        frame = EventFrame()
+        if not self._has("acq_funnel_events"):
+            return frame
+        events = self.read_table(
+            "acq_funnel_events",
+            since=since,
+            until=until,
+            columns=["contact_id", "from_stage", "to_stage", "metadata", "created_at"],
+        )
+        if not events.num_rows:
+            return frame
+        meta = _json_fields(events["metadata"], ["niche_id", "platform", "variant_id"])
+        frame.contact.frombytes(_codes(events["contact_id"], frame.contacts.encode, pa.int64()))
+        frame.from_stage.frombytes(_codes(events["from_stage"], _stage_code, pa.int8()))
+        frame.to_stage.frombytes(_codes(events["to_stage"], _stage_code, pa.int8()))
+        frame.ts.frombytes(_values(_epoch_seconds(events["created_at"])))
+        frame.niche.frombytes(_codes(meta["niche_id"], frame.niches.encode, pa.int64()))
+        frame.platform.frombytes(_codes(meta["platform"], frame.platforms.encode, pa.int64()))
+        frame.variant.frombytes(_codes(meta["variant_id"], frame.variants.encode, pa.int64()))
+        return frame
+
+    def _has(self, table: str) -> bool:
+        return (self.root / table).is_dir()
+
+
+def open_snapshot() -> LocalSnapshot | None:
+    """The configured snapshot when ACQ_REPORTING_SOURCE=snapshot, else None."""
+    if REPORTING_SOURCE != "snapshot":
+        return None
+    return LocalSnapshot(SNAPSHOT_DIR)
+
+
+def _read_part(path: Path, columns: list[str] | None) -> "pa.Table":
+    # Buffers keep the mapping alive after the file handle is closed
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select([c for c in columns if c in table.column_names])
+    return table
+
+
+def _json_columns(schema: "pa.Schema") -> set[str]:
+    return set(json.loads((schema.metadata or {}).get(b"json_columns", b"[]")))
+
+
+def _concat(parts: list["pa.Table"]) -> "pa.Table":
+    """Stack parts whose columns may differ, as strings where types clash."""
+    json_columns: set[str] = set()
+    types: dict[str, set] = {}
+    for part in parts:
+        json_columns |= _json_columns(part.schema)
+        for field in part.schema:
+            if not pa.types.is_null(field.type):
+                types.setdefault(field.name, set()).add(field.type)
+    clashing = {name for name, seen in types.items() if len(seen) > 1}
+    if clashing:
+        parts = [
+            pa.table({
+                name: part[name].cast(pa.string()) if name in clashing else part[name]
+                for name in part.column_names
+            }) if clashing & set(part.column_names) else part
+            for part in parts
+        ]
+    table = pa.concat_tables(parts, promote_options="default")
+    return table.replace_schema_metadata(
+        {b"json_columns": json.dumps(sorted(json_columns)).encode()}
+    )
+
+
+def _dedupe(table: "pa.Table") -> "pa.Table":
+    if "id" not in table.column_names or not table.num_rows:
+        return table
+    if pc.count_distinct(table["id"], mode="all").as_py() == table.num_rows:
+        return table
+    row = pc.subtract(pc.cumulative_sum(pa.repeat(1, table.num_rows)), 1)
+    last = (
+        pa.table({"id": table["id"], "row": row})
+        .group_by("id", use_threads=False)
+        .aggregate([("row", "max")])["row_max"]
+    )
+    return table.take(pc.take(last, pc.sort_indices(last)))
+
+
+def _filter_window(
+    table: "pa.Table",
+    cursor: str,
+    since: datetime | None,
+    until: datetime | None,
+) -> "pa.Table":
+    if not (since or until) or cursor not in table.column_names:
+        return table
+    ts = _timestamps(table[cursor])
+    # Rows without a cursor value fall outside every window
+    mask = pc.is_valid(ts)
+    if since:
+        mask = pc.and_(mask, pc.greater_equal(ts, pa.scalar(since, ts.type)))
+    if until:
+        mask = pc.and_(mask, pc.less(ts, pa.scalar(until, ts.type)))
+    if pc.all(mask).as_py():
+        return table
+    return table.filter(mask)
+
+
+def _timestamps(column) -> "pa.ChunkedArray":
+    """A cursor column as UTC microsecond timestamps."""
+    ts_type = pa.timestamp("us", tz="UTC")
+    if pa.types.is_timestamp(column.type) and column.type.tz is None:
+        return pc.assume_timezone(column, "UTC").cast(ts_type)
+    try:
+        return column.cast(ts_type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # Offset-less or otherwise odd ISO strings: parse them in Python
+        return pa.chunked_array([[
+            datetime.fromtimestamp(_ts(v), timezone.utc) if v is not None else None
+            for v in column.to_pylist()
+        ]], ts_type)
+
+
+def _epoch_seconds(column) -> "pa.Array":
+    micros = _timestamps(column).cast(pa.int64()).combine_chunks()
+    return pc.divide(pc.fill_null(micros, 0).cast(pa.float64()), 1e6)
+
+
+def _json_fields(column, fields: list[str]) -> "pa.Table":
+    """String fields of a JSON text column, one output row per value.
+
+    Values are joined into one newline-delimited buffer and parsed by
+    Arrow's JSON reader; missing fields and null values come back null.
+    """
+    schema = pa.schema([(name, pa.string()) for name in fields])
+    if pa.types.is_null(column.type):
+        return pa.table({name: pa.nulls(len(column), pa.string()) for name in fields})
+    text = pc.fill_null(column.cast(pa.string()), "{}").combine_chunks()
+    lines = pc.binary_join_element_wise(text, "", "\n")
+    end = pc.sum(pc.binary_length(lines)).as_py()
+    return pyarrow.json.read_json(
+        pa.BufferReader(lines.buffers()[2].slice(0, end)),
+        parse_options=pyarrow.json.ParseOptions(
+            explicit_schema=schema, unexpected_field_behavior="ignore"
+        ),
+    )
+
+
+def _codes(column, encode, code_type: "pa.DataType") -> memoryview:
+    """Raw code bytes for a string column, via one encode() per distinct value."""
+    values = pc.fill_null(column.cast(pa.string()), "").combine_chunks()
+    encoded = pc.dictionary_encode(values)
+    mapping = pa.array([encode(v) for v in encoded.dictionary.to_pylist()], code_type)
+    return _values(pc.take(mapping, encoded.indices))
+
+
+def _stage_code(stage: str) -> int:
+    return STAGE_CODES.get(stage, NO_STAGE)
+
+
+def _values(array: "pa.Array") -> memoryview:
+    """The data buffer of a null-free fixed-width array."""
+    width = array.type.bit_width // 8
+    data = memoryview(array.buffers()[1])
+    return data[array.offset * width:(array.offset + len(array)) * width]
+
+
+def _ts(value) -> float:
+    if isinstance(value, datetime):
+        ts = value
+    else:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+async def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export acquisition tables to a local columnar snapshot")
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help="Snapshot directory")
+    parser.add_argument("--table", action="append", choices=list(SNAPSHOT_TABLES), help="Limit to table(s)")
+    parser.add_argument("--full", action="store_true", help="Drop and re-export everything")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
+
+    async with create_http_client() as client:
+        summary = await export_snapshot(client, root=args.root, tables=args.table, full=args.full)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
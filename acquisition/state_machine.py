@@ -4,9 +4,15 @@ Valid transitions:
   new → qualified → warming → ready_for_dm → contacted → replied → call_booked
   Any stage → archived
   archived → new (re-entry after cooldown)
+
+VALID_TRANSITIONS is compiled at import into a Stage enum and a flat
+stage × stage boolean matrix, so checks are an index lookup. validate_many
+checks whole batches at once and returns a mask instead of raising.
 """
 
 from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from typing import Sequence
 
 from .config import ARCHIVE_COOLDOWN_DAYS, PIPELINE_STAGES
 
@@ -21,6 +27,24 @@ VALID_TRANSITIONS: dict[str, list[str]] = {
     "archived": ["new"],
 }
 
+Stage = IntEnum("Stage", [(s.upper(), i) for i, s in enumerate(PIPELINE_STAGES)])
+STAGE_BY_NAME: dict[str, Stage] = {s: Stage(i) for i, s in enumerate(PIPELINE_STAGES)}
+N_STAGES = len(PIPELINE_STAGES)
+UNKNOWN_STAGE = -1
+
+# TRANSITION_MATRIX[from * N_STAGES + to] == 1 iff from → to is allowed
+TRANSITION_MATRIX = bytearray(N_STAGES * N_STAGES)
+for _src, _targets in VALID_TRANSITIONS.items():
+    for _dst in _targets:
+        TRANSITION_MATRIX[STAGE_BY_NAME[_src] * N_STAGES + STAGE_BY_NAME[_dst]] = 1
+TRANSITION_MATRIX = bytes(TRANSITION_MATRIX)
+del _src, _targets, _dst
+
+COOLDOWN = timedelta(days=ARCHIVE_COOLDOWN_DAYS)
+_REENTRY = Stage.ARCHIVED * N_STAGES + Stage.NEW
+# Names and indexes (Stage members hash as their int) → index
+_CODES: dict[str | int, int] = {**STAGE_BY_NAME, **{i: i for i in range(N_STAGES)}}
+
 
 class InvalidTransitionError(Exception):
     pass
@@ -30,6 +54,11 @@ class CooldownViolationError(Exception):
     pass
 
 
+def stage_code(stage: str | int) -> int:
+    """Stage index for a name or index; UNKNOWN_STAGE if not a stage."""
+    return _CODES.get(stage, UNKNOWN_STAGE)
+
+
 def validate_transition(
     current_stage: str,
     target_stage: str,
@@ -40,32 +69,80 @@ def validate_transition(
     Raises InvalidTransitionError if the transition is not allowed.
     Raises CooldownViolationError if re-entering from archived too soon.
     """
-    if current_stage not in VALID_TRANSITIONS:
+    src = stage_code(current_stage)
+    if src == UNKNOWN_STAGE:
         raise InvalidTransitionError(
             f"Unknown current stage: {current_stage!r}. "
             f"Valid stages: {PIPELINE_STAGES}"
         )
 
-    if target_stage not in VALID_TRANSITIONS[current_stage]:
+    dst = stage_code(target_stage)
+    if dst == UNKNOWN_STAGE or not TRANSITION_MATRIX[src * N_STAGES + dst]:
         raise InvalidTransitionError(
             f"Cannot transition from {current_stage!r} to {target_stage!r}. "
-            f"Valid targets: {VALID_TRANSITIONS[current_stage]}"
+            f"Valid targets: {VALID_TRANSITIONS[PIPELINE_STAGES[src]]}"
         )
 
-    if current_stage == "archived" and target_stage == "new":
-        if archived_at is not None:
-            cooldown_end = archived_at + timedelta(days=ARCHIVE_COOLDOWN_DAYS)
-            now = datetime.now(timezone.utc)
-            if now < cooldown_end:
-                days_left = (cooldown_end - now).days
-                raise CooldownViolationError(
-                    f"Contact archived at {archived_at.isoformat()}. "
-                    f"Cooldown expires in {days_left} days."
-                )
+    if src * N_STAGES + dst == _REENTRY and archived_at is not None:
+        archived_at = _as_datetime(archived_at)
+        cooldown_end = archived_at + COOLDOWN
+        now = datetime.now(timezone.utc)
+        if now < cooldown_end:
+            days_left = (cooldown_end - now).days
+            raise CooldownViolationError(
+                f"Contact archived at {archived_at.isoformat()}. "
+                f"Cooldown expires in {days_left} days."
+            )
 
     return True
 
 
+def validate_many(
+    from_stages: Sequence[str | int],
+    to_stages: Sequence[str | int],
+    archived_at: Sequence[datetime | str | None] | None = None,
+    *,
+    now: datetime | None = None,
+) -> list[bool]:
+    """Validate a batch of transitions, returning a mask.
+
+    mask[i] is True iff from_stages[i] → to_stages[i] is allowed and, for
+    archived → new, archived_at[i] is past the cooldown. The cooldown is
+    one comparison against a cutoff computed once for the batch.
+    Use validate_transition on rejected rows for the reason.
+    """
+    if len(from_stages) != len(to_stages):
+        raise ValueError("from_stages and to_stages must be the same length")
+    if archived_at is not None and len(archived_at) != len(from_stages):
+        raise ValueError("archived_at must match the number of transitions")
+
+    codes = _CODES
+    keys = [
+        src * N_STAGES + dst if src >= 0 and dst >= 0 else -1
+        for src, dst in zip(
+            (codes.get(s, UNKNOWN_STAGE) for s in from_stages),
+            (codes.get(t, UNKNOWN_STAGE) for t in to_stages),
+        )
+    ]
+    matrix = TRANSITION_MATRIX
+    mask = [k >= 0 and matrix[k] == 1 for k in keys]
+
+    if archived_at is not None:
+        cutoff = (now or datetime.now(timezone.utc)) - COOLDOWN
+        for i, k in enumerate(keys):
+            if k == _REENTRY and mask[i] and archived_at[i] is not None:
+                mask[i] = _as_datetime(archived_at[i]) <= cutoff
+    return mask
+
+
 def get_valid_targets(current_stage: str) -> list[str]:
     """Return valid target stages for the given current stage."""
     return VALID_TRANSITIONS.get(current_stage, [])
+
+
+def _as_datetime(value: datetime | str) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
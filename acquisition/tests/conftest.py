@@ -0,0 +1,30 @@
+"""Shared fixtures: an in-memory Supabase and a client mounted on it."""
+
+import httpx
+import pytest
+
+from ..benchmarks.local_supabase import LocalSupabase
+from ..config import SUPABASE_URL
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db() -> LocalSupabase:
+    return LocalSupabase()
+
+
+@pytest.fixture
+async def client(db):
+    async with httpx.AsyncClient(mounts={SUPABASE_URL: httpx.ASGITransport(app=db)}) as c:
+        yield c
+
+
+def load_contacts(db: LocalSupabase, stage: str, count: int, **fields) -> list[dict]:
+    return db.load("crm_contacts", [
+        {"id": f"c{i}", "platform": "instagram", "platform_id": f"p{i}", "pipeline_stage": stage, **fields}
+        for i in range(count)
+    ])
@@ -0,0 +1,63 @@
+import pytest
+
+from ..config import DEFAULT_DAILY_CAPS
+from ..daily_caps import CapLedger
+
+pytestmark = pytest.mark.anyio
+
+LIMIT = DEFAULT_DAILY_CAPS["instagram"]["dm"]
+
+
+def stored(db, platform="instagram", action="dm"):
+    rows = [r for r in db.rows("acq_daily_caps") if (r["platform"], r["action"]) == (platform, action)]
+    return rows[0]["current_count"] if rows else 0
+
+
+def test_reserve_stops_at_the_limit():
+    ledger = CapLedger({("instagram", "dm"): LIMIT - 2})
+    assert ledger.reserve("instagram", "dm") == (True, LIMIT - 2, LIMIT)
+    assert ledger.reserve("instagram", "dm") == (True, LIMIT - 1, LIMIT)
+    assert ledger.reserve("instagram", "dm") == (False, LIMIT, LIMIT)
+
+
+def test_release_hands_back_a_reservation():
+    ledger = CapLedger({("instagram", "dm"): LIMIT - 1})
+    assert ledger.reserve("instagram", "dm")[0]
+    ledger.release("instagram", "dm")
+    ledger.release("instagram", "dm")  # Nothing reserved: no-op
+    assert ledger.used("instagram", "dm") == LIMIT - 1
+    assert ledger.reserve("instagram", "dm")[0]
+
+
+def test_unknown_platform_has_no_allowance():
+    assert CapLedger().reserve("myspace", "dm") == (False, 0, 0)
+
+
+async def test_load_and_commit_persist_counts(db, client):
+    ledger = await CapLedger.load(client)
+    ledger.reserve("instagram", "dm")
+    assert await ledger.commit(client, "instagram", "dm") == 1
+    assert stored(db) == 1
+    assert ledger.used("instagram", "dm") == 1
+
+    reloaded = await CapLedger.load(client)
+    assert reloaded.used("instagram", "dm") == 1
+
+
+async def test_commit_takes_other_processes_sends_into_account(db, client):
+    first, second = await CapLedger.load(client), await CapLedger.load(client)
+    first.reserve("instagram", "dm")
+    second.reserve("instagram", "dm")
+    await first.commit(client, "instagram", "dm")
+    assert await second.commit(client, "instagram", "dm") == 2
+    assert second.used("instagram", "dm") == 2
+
+
+async def test_commit_falls_back_without_the_rpc(db, client):
+    del db.rpcs["acq_increment_cap"]
+    ledger = await CapLedger.load(client)
+    for _ in range(2):
+        ledger.reserve("instagram", "dm")
+        await ledger.commit(client, "instagram", "dm")
+    assert stored(db) == 2
+    assert ledger.used("instagram", "dm") == 2
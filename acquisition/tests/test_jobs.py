@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from ..jobs import JobManager
+
+pytestmark = pytest.mark.anyio
+
+
+async def finished(job):
+    while not job.done:
+        await job.wait(1)
+    return job
+
+
+async def test_job_records_progress_and_result():
+    async def work(progress):
+        progress({"step": 1})
+        return {"ok": True}
+
+    job = await finished(JobManager().submit("cycle", work))
+    assert job.status == "succeeded"
+    assert job.result == {"ok": True}
+    assert [e.get("step", e.get("status")) for e in job.events] == ["queued", "running", 1, "succeeded"]
+
+
+async def test_error_in_result_fails_the_job():
+    async def work(progress):
+        return {"error": "boom"}
+
+    job = await finished(JobManager().submit("cycle", work))
+    assert (job.status, job.error, job.result) == ("failed", "boom", {"error": "boom"})
+
+
+async def test_jobs_beyond_max_concurrent_wait():
+    manager = JobManager(max_concurrent=1)
+    release = asyncio.Event()
+
+    async def work(progress):
+        await release.wait()
+
+    first, second = manager.submit("a", work), manager.submit("b", work)
+    await asyncio.sleep(0)
+    assert (first.status, second.status) == ("running", "queued")
+    release.set()
+    await finished(second)
+    assert first.status == second.status == "succeeded"
+
+
+async def test_cancel_and_shutdown():
+    manager = JobManager()
+
+    async def work(progress):
+        await asyncio.sleep(10)
+
+    job, other = manager.submit("a", work), manager.submit("b", work)
+    await asyncio.sleep(0)
+    assert manager.cancel(job.id)
+    await finished(job)
+    assert job.status == "cancelled"
+    assert not manager.cancel(job.id)
+
+    await manager.shutdown()
+    assert other.status == "cancelled"
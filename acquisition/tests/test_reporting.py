@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ..reporting_agent import get_funnel_activity
+
+pytestmark = pytest.mark.anyio
+
+GROUP_BY = ("niche_id", "platform", "to_stage")
+
+
+@pytest.fixture
+def events(db):
+    now = datetime.now(timezone.utc).replace(minute=30)
+    db.load("crm_contacts", [
+        {"id": "c0", "platform": "instagram", "niche_id": "saas"},
+        {"id": "c1", "platform": "tiktok", "niche_id": "fitness"},
+    ])
+    db.load("acq_funnel_events", [
+        {"contact_id": "c0", "from_stage": "new", "to_stage": "qualified",
+         "metadata": {}, "created_at": (now - timedelta(hours=2)).isoformat()},
+        {"contact_id": "c1", "from_stage": "new", "to_stage": "qualified",
+         "metadata": {"platform": "twitter"}, "created_at": (now - timedelta(hours=2)).isoformat()},
+        {"contact_id": "gone", "from_stage": "new", "to_stage": "qualified",
+         "metadata": {}, "created_at": (now - timedelta(hours=2)).isoformat()},
+    ])
+    return now - timedelta(days=1), now
+
+
+def keyed(rows):
+    return {tuple(r[d] for d in GROUP_BY): r["count"] for r in rows}
+
+
+async def test_raw_counts_attribute_like_the_rollups(db, client, events):
+    since, until = events
+    from_rollups = await get_funnel_activity(client, since, until, group_by=GROUP_BY)
+    del db.rpcs["acq_funnel_rollups"]
+    from_events = await get_funnel_activity(client, since, until, group_by=GROUP_BY)
+
+    assert keyed(from_events) == keyed(from_rollups) == {
+        ("saas", "instagram", "qualified"): 1,
+        ("fitness", "twitter", "qualified"): 1,
+        ("", "unknown", "qualified"): 1,
+    }
+
+
+async def test_unknown_granularity_is_rejected(client):
+    with pytest.raises(ValueError):
+        await get_funnel_activity(client, datetime.now(timezone.utc), granularity="week")
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from ..api.response_cache import PIPELINE_TAG, ResponseCache
+
+pytestmark = pytest.mark.anyio
+
+
+def counter():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"n": len(calls)}
+
+    return compute, calls
+
+
+async def test_concurrent_misses_share_one_computation():
+    cache, (compute, calls) = ResponseCache(), counter()
+    entries = await asyncio.gather(*(cache.get("k", compute, ttl=60) for _ in range(5)))
+    assert len(calls) == 1
+    assert len({e.etag for e in entries}) == 1
+    assert cache.metrics() == {"entries": 1, "hits": 4, "misses": 1}
+
+
+async def test_invalidate_by_tag():
+    cache, (compute, calls) = ResponseCache(), counter()
+    await cache.get("funnel", compute, ttl=60, tags=(PIPELINE_TAG,))
+    await cache.get("other", compute, ttl=60)
+    cache.invalidate_pipeline()
+    await cache.get("funnel", compute, ttl=60, tags=(PIPELINE_TAG,))
+    await cache.get("other", compute, ttl=60)
+    assert len(calls) == 3
+
+
+async def test_result_computed_across_an_invalidation_is_not_stored():
+    cache, (compute, calls) = ResponseCache(), counter()
+    pending = asyncio.create_task(cache.get("k", compute, ttl=60))
+    await asyncio.sleep(0)
+    cache.invalidate()
+    await pending
+    await cache.get("k", compute, ttl=60)
+    assert len(calls) == 2
+
+
+async def test_zero_ttl_is_never_stored():
+    cache, (compute, calls) = ResponseCache(), counter()
+    await cache.get("k", compute, ttl=0)
+    await cache.get("k", compute, ttl=0)
+    assert len(calls) == 2
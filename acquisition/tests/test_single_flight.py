@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from ..single_flight import RunLease, RunLockedError, SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_callers_share_one_run():
+    flight = SingleFlight(backend="memory")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await asyncio.gather(*(flight.run("cycle", work) for _ in range(3))) == [1, 1, 1]
+    assert flight.running() == []
+    assert await flight.run("cycle", work) == 2
+
+
+async def test_run_survives_until_the_last_waiter_is_cancelled():
+    flight = SingleFlight(backend="memory")
+    started, release = asyncio.Event(), asyncio.Event()
+    cancelled = False
+
+    async def work():
+        nonlocal cancelled
+        started.set()
+        try:
+            await release.wait()
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        return "done"
+
+    first = asyncio.create_task(flight.run("cycle", work))
+    second = asyncio.create_task(flight.run("cycle", work))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    assert not cancelled and flight.running() == ["cycle"]
+
+    second.cancel()
+    await asyncio.gather(second, return_exceptions=True)
+    assert cancelled
+    assert flight.running() == []
+
+
+async def test_second_holder_is_locked_out(db, client):
+    async with RunLease(client, "cycle", holder="a", ttl_seconds=60):
+        with pytest.raises(RunLockedError) as exc:
+            async with RunLease(client, "cycle", holder="b", ttl_seconds=60):
+                pass
+        assert exc.value.holder == "a"
+    assert db.rows("acq_run_locks") == []
+
+
+async def test_lost_lease_cancels_the_body(db, client):
+    started = asyncio.Event()
+
+    async def run():
+        async with RunLease(client, "cycle", holder="a", ttl_seconds=0.15):
+            started.set()
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(run())
+    await started.wait()
+    db.table("acq_run_locks").rows["cycle"]["holder"] = "b"
+
+    with pytest.raises(RunLockedError) as exc:
+        await asyncio.wait_for(task, 1)
+    assert exc.value.holder == "b"
+    # Released by the new holder, not the one that lost it
+    assert db.table("acq_run_locks").rows["cycle"]["holder"] == "b"
+
+
+async def test_lease_is_skipped_without_the_rpc(db, client):
+    del db.rpcs["acq_try_run_lock"]
+    async with RunLease(client, "cycle") as lease:
+        assert not lease.held
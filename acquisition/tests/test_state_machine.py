@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ..config import PIPELINE_STAGES
+from ..state_machine import (
+    COOLDOWN,
+    N_STAGES,
+    STAGE_BY_NAME,
+    TRANSITION_MATRIX,
+    VALID_TRANSITIONS,
+    CooldownViolationError,
+    InvalidTransitionError,
+    stage_code,
+    validate_many,
+    validate_transition,
+)
+
+
+def test_matrix_matches_valid_transitions():
+    for src in PIPELINE_STAGES:
+        for dst in PIPELINE_STAGES:
+            allowed = dst in VALID_TRANSITIONS.get(src, [])
+            assert TRANSITION_MATRIX[STAGE_BY_NAME[src] * N_STAGES + STAGE_BY_NAME[dst]] == allowed
+
+
+def test_stage_code_accepts_names_and_indexes():
+    assert stage_code("warming") == STAGE_BY_NAME["warming"]
+    assert stage_code(STAGE_BY_NAME["warming"]) == STAGE_BY_NAME["warming"]
+    assert stage_code("nope") == -1
+
+
+def test_validate_transition_raises_on_invalid():
+    assert validate_transition("qualified", "warming")
+    with pytest.raises(InvalidTransitionError):
+        validate_transition("new", "contacted")
+    with pytest.raises(InvalidTransitionError):
+        validate_transition("bogus", "new")
+
+
+def test_validate_transition_enforces_cooldown():
+    recent = datetime.now(timezone.utc) - timedelta(days=1)
+    with pytest.raises(CooldownViolationError):
+        validate_transition("archived", "new", recent)
+    assert validate_transition("archived", "new", recent - COOLDOWN)
+
+
+def test_validate_many_agrees_with_validate_transition():
+    pairs = [(s, t) for s in PIPELINE_STAGES for t in PIPELINE_STAGES] + [("bogus", "new"), ("new", "bogus")]
+    mask = validate_many([s for s, _ in pairs], [t for _, t in pairs])
+    for (src, dst), ok in zip(pairs, mask):
+        try:
+            validate_transition(src, dst)
+            expected = True
+        except InvalidTransitionError:
+            expected = False
+        assert ok == expected, (src, dst)
+
+
+def test_validate_many_cooldown_uses_one_cutoff():
+    now = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    mask = validate_many(
+        ["archived", "archived", "archived", "new"],
+        ["new", "new", "new", "qualified"],
+        [now - COOLDOWN, (now - timedelta(days=1)).isoformat().replace("+00:00", "Z"), None, now],
+        now=now,
+    )
+    assert mask == [True, False, True, True]
+
+
+def test_validate_many_rejects_mismatched_lengths():
+    with pytest.raises(ValueError):
+        validate_many(["new"], [])
+    with pytest.raises(ValueError):
+        validate_many(["new"], ["qualified"], [])
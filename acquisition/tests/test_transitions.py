@@ -0,0 +1,92 @@
+import httpx
+import pytest
+
+from ..config import SUPABASE_URL
+from ..transitions import Transition, TransitionOutbox, apply_transitions
+from .conftest import load_contacts
+
+pytestmark = pytest.mark.anyio
+
+
+def stage(db, contact_id):
+    return db.table("crm_contacts").rows[contact_id]["pipeline_stage"]
+
+
+@pytest.fixture(params=["rpc", "per_contact"])
+def backend(request, db):
+    if request.param == "per_contact":
+        del db.rpcs["acq_bulk_transition"]
+    return request.param
+
+
+async def test_apply_transitions_reports_every_status(db, client, backend):
+    load_contacts(db, "qualified", 3)
+    db.table("crm_contacts").update(db.table("crm_contacts").rows["c2"], {"pipeline_stage": "warming"})
+
+    results = await apply_transitions(client, [
+        Transition("c0", "qualified", "warming"),
+        Transition("c1", "qualified", "contacted"),
+        Transition("c0", "qualified", "archived"),
+        Transition("c2", "qualified", "warming"),
+    ])
+
+    assert [r["status"] for r in results] == ["applied", "invalid", "duplicate", "stale"]
+    assert stage(db, "c0") == "warming"
+    assert stage(db, "c1") == "qualified"
+    events = db.rows("acq_funnel_events")
+    assert [(e["contact_id"], e["to_stage"]) for e in events] == [("c0", "warming")]
+
+
+async def test_apply_transitions_dry_run_writes_nothing(db, client):
+    load_contacts(db, "qualified", 1)
+    results = await apply_transitions(client, [("c0", "qualified", "warming")], dry_run=True)
+    assert results[0]["status"] == "dry_run"
+    assert stage(db, "c0") == "qualified"
+    assert db.stats["requests"] == 0
+
+
+async def test_outbox_batches_and_resolves_futures(db, client, backend):
+    load_contacts(db, "ready_for_dm", 5)
+    async with TransitionOutbox(client, batch_size=2, flush_interval=60) as outbox:
+        futures = [outbox.add(Transition(f"c{i}", "ready_for_dm", "contacted")) for i in range(5)]
+        futures.append(outbox.add(Transition("c0", "ready_for_dm", "contacted")))
+
+    assert [f.result() for f in futures] == ["applied"] * 5 + ["stale"]
+    assert (outbox.applied, outbox.stale, outbox.failed) == (5, 1, 0)
+    assert len(db.rows("acq_funnel_events")) == 5
+
+
+async def test_outbox_rejects_invalid_transition(client):
+    outbox = TransitionOutbox(client)
+    with pytest.raises(Exception):
+        outbox.add(Transition("c0", "new", "contacted"))
+    assert outbox.pending == 0
+
+
+async def test_outbox_spools_then_replays_once(db, client, backend, tmp_path):
+    spool = tmp_path / "transitions.jsonl"
+    load_contacts(db, "ready_for_dm", 2)
+
+    def unavailable(request):
+        return httpx.Response(503, json={"message": "down"})
+
+    async with httpx.AsyncClient(mounts={SUPABASE_URL: httpx.MockTransport(unavailable)}) as down:
+        async with TransitionOutbox(down, spool=spool, max_attempts=1) as outbox:
+            futures = [outbox.add(Transition(f"c{i}", "ready_for_dm", "contacted")) for i in range(2)]
+    assert [f.result() for f in futures] == ["spooled", "spooled"]
+    assert len(spool.read_text().splitlines()) == 2
+    assert stage(db, "c0") == "ready_for_dm"
+
+    async with TransitionOutbox(client, spool=spool):
+        pass
+    assert not spool.exists()
+    assert stage(db, "c0") == stage(db, "c1") == "contacted"
+
+    # A spool replayed again (e.g. the rewrite was lost) changes nothing
+    spool.write_text(
+        '{"contact_id": "c0", "from_stage": "ready_for_dm", "to_stage": "contacted",'
+        ' "triggered_by": "automation", "metadata": {}}\n'
+    )
+    async with TransitionOutbox(client, spool=spool):
+        pass
+    assert len(db.rows("acq_funnel_events")) == 2
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from ..worker_pool import ServiceWorkerPool, get_worker_pool, service_key
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_jobs_run_serially_per_service_and_in_parallel_across():
+    pool = ServiceWorkerPool()
+    running: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    def job(name):
+        async def run():
+            running[name] = running.get(name, 0) + 1
+            peak[name] = max(peak.get(name, 0), running[name])
+            await asyncio.sleep(0.01)
+            running[name] -= 1
+            return name
+        return run
+
+    futures = [pool.submit("instagram", "dm", job("ig")) for _ in range(3)]
+    futures += [pool.submit("instagram", "inbox", job("ig")) for _ in range(2)]
+    futures += [pool.submit("twitter", "dm", job("tw")) for _ in range(3)]
+    await pool.join()
+    assert [f.result() for f in futures] == ["ig"] * 5 + ["tw"] * 3
+    assert peak == {"ig": 1, "tw": 1}
+    assert pool.services == [service_key("instagram", "dm"), service_key("twitter", "dm")]
+    await pool.close()
+
+
+async def test_failures_are_isolated():
+    pool = ServiceWorkerPool()
+
+    async def boom():
+        raise RuntimeError("boom")
+
+    async def ok():
+        return 1
+
+    first, second = pool.submit("instagram", "dm", boom), pool.submit("instagram", "dm", ok)
+    assert await asyncio.gather(first, second, return_exceptions=True) == [first.exception(), 1]
+    assert isinstance(first.exception(), RuntimeError)
+    await pool.close()
+
+
+async def test_cancelled_future_cancels_its_job():
+    pool = ServiceWorkerPool()
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def slow():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def ok():
+        return "next"
+
+    running = pool.submit("instagram", "dm", slow)
+    queued = pool.submit("instagram", "dm", slow)
+    after = pool.submit("instagram", "dm", ok)
+    await started.wait()
+    running.cancel()
+    queued.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert await asyncio.wait_for(after, 1) == "next"
+    await pool.close()
+
+
+async def test_close_resolves_every_waiter():
+    pool = ServiceWorkerPool()
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    futures = [pool.submit("instagram", "dm", slow) for _ in range(2)]
+    await started.wait()
+    await pool.close()
+    assert all(f.cancelled() for f in futures)
+
+
+async def test_shared_pool_is_per_process():
+    assert get_worker_pool() is get_worker_pool()
+
+    async def ok():
+        return 1
+
+    assert await get_worker_pool().submit("instagram", "dm", ok) == 1
@@ -0,0 +1,499 @@
+"""Bulk pipeline stage transitions.
+
+apply_transitions validates a batch locally in one validate_many pass,
+then applies every stage patch and funnel event in one transactional
+RPC (acq_bulk_transition) instead of two HTTP writes per contact.
+
+transition_one applies a single transition atomically, and
+TransitionOutbox batches transitions produced one at a time (as sends
+complete) into bulk writes with retries.
+
+Callbacks registered with add_pipeline_listener run after every write
+that may have changed stage counts, so caches of funnel data can drop
+their entries.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable
+
+import httpx
+
+from .db.queries import (
+    bulk_transition,
+    log_funnel_event,
+    transition_contact,
+    update_contact_stage,
+)
+from .state_machine import (
+    CooldownViolationError,
+    InvalidTransitionError,
+    validate_many,
+    validate_transition,
+)
+
+logger = logging.getLogger(__name__)
+
+_pipeline_listeners: list[Callable[[], None]] = []
+
+
+@dataclass
+class Transition:
+    contact_id: str
+    from_stage: str
+    to_stage: str
+    metadata: dict = field(default_factory=dict)
+    archived_at: datetime | str | None = None
+
+
+def add_pipeline_listener(listener: Callable[[], None]):
+    """Call `listener` whenever contacts change stage or are seeded."""
+    _pipeline_listeners.append(listener)
+
+
+def remove_pipeline_listener(listener: Callable[[], None]):
+    if listener in _pipeline_listeners:
+        _pipeline_listeners.remove(listener)
+
+
+def notify_pipeline_changed():
+    """Tell pipeline listeners that stage counts may have changed."""
+    for listener in list(_pipeline_listeners):
+        try:
+            listener()
+        except Exception as e:
+            logger.warning(f"[transitions] Pipeline listener failed: {e}")
+
+
+async def apply_transitions(
+    client: httpx.AsyncClient,
+    transitions: Iterable[Transition | tuple],
+    *,
+    triggered_by: str = "automation",
+    dry_run: bool = False,
+) -> list[dict]:
+    """Validate and apply a batch of stage transitions.
+
+    Accepts Transition objects or (contact_id, from, to[, metadata]) tuples.
+    Returns one result per input, in order:
+      {contact_id, from_stage, to_stage, status, error}
+    with status one of "applied", "stale" (contact had already moved),
+    "invalid" (rejected by the state machine), "duplicate" (contact
+    appears earlier in the batch), "error" (its write failed; only
+    without the bulk RPC) or "dry_run".
+    """
+    items = [t if isinstance(t, Transition) else Transition(*t) for t in transitions]
+    mask = validate_many(
+        [t.from_stage for t in items],
+        [t.to_stage for t in items],
+        [t.archived_at for t in items],
+    )
+
+    results: list[dict] = []
+    batch: list[dict] = []
+    pending: dict[str, dict] = {}
+
+    for t, valid in zip(items, mask):
+        result = {
+            "contact_id": t.contact_id,
+            "from_stage": t.from_stage,
+            "to_stage": t.to_stage,
+            "status": None,
+            "error": None,
+        }
+        results.append(result)
+
+        if t.contact_id in pending:
+            result["status"] = "duplicate"
+            continue
+        if not valid:
+            result["status"] = "invalid"
+            result["error"] = _rejection_reason(t)
+            continue
+
+        pending[t.contact_id] = result
+        batch.append(_row(t, triggered_by))
+
+    if not batch:
+        return results
+    if dry_run:
+        for result in pending.values():
+            result["status"] = "dry_run"
+        return results
+
+    rows = await _write_batch(client, batch)
+    for row in rows:
+        result = pending.get(str(row["contact_id"]))
+        if result is not None:
+            result["status"] = row["status"]
+            if row["status"] == "stale":
+                result["error"] = f"Contact is no longer in {result['from_stage']!r}"
+            elif row["status"] == "error":
+                result["error"] = str(row["error"])
+
+    applied = sum(1 for r in pending.values() if r["status"] == "applied")
+    logger.info(f"[transitions] Applied {applied}/{len(batch)} transitions ({triggered_by})")
+    return results
+
+
+async def transition_one(
+    client: httpx.AsyncClient,
+    transition: Transition,
+    *,
+    triggered_by: str = "automation",
+) -> str:
+    """Validate and apply one transition atomically.
+
+    Raises InvalidTransitionError/CooldownViolationError like
+    validate_transition. Returns "applied" or "stale".
+    """
+    t = transition
+    validate_transition(t.from_stage, t.to_stage, t.archived_at)
+    try:
+        status = await transition_contact(
+            client, t.contact_id, t.from_stage, t.to_stage,
+            triggered_by=triggered_by, metadata=t.metadata,
+        )
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+    else:
+        if status == "applied":
+            notify_pipeline_changed()
+        return status
+    rows = await _write_batch(client, [_row(t, triggered_by)])
+    return rows[0]["status"]
+
+
+class TransitionOutbox:
+    """Client-side batching for stage transitions.
+
+    add() validates and buffers a transition; buffered transitions go out
+    through acq_bulk_transition once batch_size is reached or
+    flush_interval has passed. Failed writes are retried with backoff and
+    stay buffered until they land, so a transient outage delays stage
+    changes rather than dropping them. Every row is conditional on its
+    from_stage, so replaying a batch whose response was lost reports
+    "stale" instead of applying twice.
+
+    With a spool path, transitions the final flush could not deliver are
+    appended to that file instead of dropped, and entering the next
+    outbox on the same spool delivers them before anything else runs —
+    raising if it still cannot. Use one for transitions recording
+    actions that must not be repeated, such as a sent DM.
+
+    Usage:
+        async with TransitionOutbox(client, triggered_by="outreach_agent") as outbox:
+            outbox.add(Transition(contact_id, "ready_for_dm", "contacted"))
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        *,
+        triggered_by: str = "automation",
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_attempts: int = 5,
+        retry_backoff: float = 0.5,
+        spool: str | Path | None = None,
+    ):
+        self.client = client
+        self.triggered_by = triggered_by
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.spool = Path(spool) if spool else None
+
+        self._buffer: list[tuple[dict, asyncio.Future]] = []
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+        self._flushes: set[asyncio.Task] = set()
+        self.applied = 0
+        self.stale = 0
+        self.failed = 0
+        self.spooled = 0
+
+    def add(self, transition: Transition | tuple) -> asyncio.Future:
+        """Validate and queue a transition.
+
+        Raises on an invalid transition. Returns a future resolved with
+        "applied" or "stale" once the batch containing it is written, or
+        "spooled" if it was left for the next run.
+        """
+        t = transition if isinstance(transition, Transition) else Transition(*transition)
+        validate_transition(t.from_stage, t.to_stage, t.archived_at)
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((_row(t, self.triggered_by), future))
+
+        if len(self._buffer) >= self.batch_size:
+            task = asyncio.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return future
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def flush(self, *, final: bool = False):
+        """Write everything buffered, batch by batch, in order.
+
+        A batch — or, without the bulk RPC, the rows of it — that still
+        fails after max_attempts is put back at the head of the buffer. If
+        final, it is spooled when the outbox has a spool, otherwise its
+        futures fail.
+        """
+        async with self._lock:
+            while self._buffer:
+                batch = self._take_batch()
+                try:
+                    rows = await self._write_with_retry([row for row, _ in batch])
+                except Exception as e:
+                    if self._undelivered(batch, e, final):
+                        return
+                    continue
+
+                written = {str(r["contact_id"]): r for r in rows}
+                failed, error = [], None
+                for row, future in batch:
+                    out = written.get(row["contact_id"])
+                    result = out["status"] if out else "stale"
+                    if result == "error":
+                        failed.append((row, future))
+                        error = out["error"]
+                        continue
+                    if result == "applied":
+                        self.applied += 1
+                    else:
+                        self.stale += 1
+                    if not future.done():
+                        future.set_result(result)
+                if failed and self._undelivered(failed, error, final):
+                    return
+
+    def _undelivered(
+        self,
+        batch: list[tuple[dict, asyncio.Future]],
+        error: Exception,
+        final: bool,
+    ) -> bool:
+        """Keep, spool or fail transitions whose write failed.
+
+        Returns True if they were put back for a later flush.
+        """
+        if not final and _retryable(error):
+            logger.warning(f"[transitions] Write failed, keeping {len(batch)} buffered: {error}")
+            self._buffer[:0] = batch
+            self._schedule_retry()
+            return True
+        if final and self.spool is not None:
+            _append_spool(self.spool, [row for row, _ in batch])
+            self.spooled += len(batch)
+            logger.warning(
+                f"[transitions] Spooled {len(batch)} transitions to {self.spool}: {error}"
+            )
+            for _, future in batch:
+                if not future.done():
+                    future.set_result("spooled")
+            return False
+        self.failed += len(batch)
+        logger.error(
+            f"[transitions] Dropping {len(batch)} transitions "
+            f"({', '.join(row['contact_id'] for row, _ in batch)}): {error}"
+        )
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+        return False
+
+    async def close(self):
+        """Flush what is left and stop the background timer."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush(final=True)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def __aenter__(self) -> "TransitionOutbox":
+        if self.spool is not None:
+            await self.replay_spool()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def replay_spool(self):
+        """Deliver transitions spooled by an earlier run.
+
+        Raises if a batch still fails; what was not delivered stays in
+        the spool.
+        """
+        rows = _read_spool(self.spool)
+        while rows:
+            batch = rows[:self.batch_size]
+            try:
+                written = await self._write_with_retry(batch)
+            except Exception:
+                _write_spool(self.spool, rows)
+                raise
+            errors = [r for r in written if r["status"] == "error"]
+            if errors:
+                _write_spool(self.spool, rows)
+                raise errors[0]["error"]
+            rows = rows[len(batch):]
+            logger.info(f"[transitions] Replayed {len(batch)} spooled transitions")
+            _write_spool(self.spool, rows)
+
+    def _take_batch(self) -> list[tuple[dict, asyncio.Future]]:
+        """Up to batch_size rows with no contact repeated.
+
+        acq_bulk_transition applies one transition per contact, so a second
+        move of the same contact waits for the next batch.
+        """
+        seen: set[str] = set()
+        take = 0
+        for row, _ in self._buffer[:self.batch_size]:
+            if row["contact_id"] in seen:
+                break
+            seen.add(row["contact_id"])
+            take += 1
+        batch, self._buffer = self._buffer[:take], self._buffer[take:]
+        return batch
+
+    async def _write_with_retry(self, rows: list[dict]) -> list[dict]:
+        """Write rows, retrying whole-batch failures and rows that errored.
+
+        Rows still errored after max_attempts keep status "error". Retrying
+        rows already applied is safe: they come back "stale".
+        """
+        results: dict[str, dict] = {}
+        pending = rows
+        for attempt in range(self.max_attempts):
+            last = attempt + 1 == self.max_attempts
+            try:
+                written = await _write_batch(self.client, pending)
+            except Exception as e:
+                if not _retryable(e) or last:
+                    raise
+            else:
+                results.update((str(r["contact_id"]), r) for r in written)
+                retry = {
+                    str(r["contact_id"]) for r in written
+                    if r["status"] == "error" and _retryable(r["error"])
+                }
+                if not retry or last:
+                    break
+                pending = [r for r in pending if str(r["contact_id"]) in retry]
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+        return [results[str(r["contact_id"])] for r in rows if str(r["contact_id"]) in results]
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_interval)
+            self._timer = None
+            await self.flush()
+        except Exception as e:
+            logger.error(f"[transitions] Background flush failed: {e}")
+
+    def _schedule_retry(self):
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+
+def _row(t: Transition, triggered_by: str) -> dict:
+    return {
+        "contact_id": t.contact_id,
+        "from_stage": t.from_stage,
+        "to_stage": t.to_stage,
+        "triggered_by": triggered_by,
+        "metadata": t.metadata or {},
+    }
+
+
+def _read_spool(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def _write_spool(path: Path, rows: list[dict]):
+    if not rows:
+        path.unlink(missing_ok=True)
+        return
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    tmp.rename(path)
+
+
+def _append_spool(path: Path, rows: list[dict]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        f.writelines(json.dumps(row) + "\n" for row in rows)
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return isinstance(error, httpx.TransportError)
+
+
+async def _write_batch(client: httpx.AsyncClient, batch: list[dict]) -> list[dict]:
+    try:
+        rows = await bulk_transition(client, batch)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+        logger.warning("[transitions] acq_bulk_transition RPC missing, applying one by one")
+        rows = await _apply_individually(client, batch)
+    if any(row["status"] == "applied" for row in rows):
+        notify_pipeline_changed()
+    return rows
+
+
+def _rejection_reason(t: Transition) -> str:
+    try:
+        validate_transition(t.from_stage, t.to_stage, t.archived_at)
+    except (InvalidTransitionError, CooldownViolationError) as e:
+        return str(e)
+    return "Rejected by state machine"
+
+
+async def _apply_individually(client: httpx.AsyncClient, batch: list[dict]) -> list[dict]:
+    """Per-contact PATCH + event insert, for databases without the RPC.
+
+    Like acq_bulk_transition, a row only applies while the contact is
+    still in its from_stage ("stale" otherwise, with no event logged). A
+    row whose PATCH fails gets status "error" with the exception, and the
+    rest of the batch still goes out.
+    """
+    rows = []
+    for item in batch:
+        try:
+            updated = await update_contact_stage(
+                client, item["contact_id"], item["to_stage"], from_stage=item["from_stage"]
+            )
+        except Exception as e:
+            logger.error(f"[transitions] Failed to apply {item['contact_id']}: {e}")
+            rows.append({**item, "status": "error", "error": e})
+            continue
+        if not updated:
+            rows.append({**item, "status": "stale"})
+            continue
+        # The contact moved; a retry would only come back stale
+        try:
+            await log_funnel_event(client, **item)
+        except Exception as e:
+            logger.error(f"[transitions] Moved {item['contact_id']} but its event was not logged: {e}")
+        rows.append({**item, "status": "applied"})
+    return rows
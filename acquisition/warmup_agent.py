@@ -4,102 +4,197 @@ Schedules and posts warmup comments on prospect content
 before transitioning them to ready_for_dm.
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 
 import httpx
 
-from .config import SAFARI_PORTS
-from .daily_caps import check_cap, increment_cap
+from .config import NicheConfig
+from .daily_caps import CapLedger
 from .db.queries import (
-    create_warmup_schedule,
+    create_warmup_schedules,
+    get_active_niches,
     get_contacts_by_stage,
     get_pending_warmups,
+    get_warmups_by_ids,
     mark_warmup_sent,
     mark_warmup_failed,
-    update_contact_stage,
-    log_funnel_event,
+    record_warmup_sent,
 )
-from .state_machine import validate_transition
+from .pacing import PacingScheduler
+from .worker_pool import get_worker_pool, service_port
+from .transitions import Transition, apply_transitions
 
 logger = logging.getLogger(__name__)
 
 
+def plan_warmups(
+    contacts: list[dict],
+    niches: dict[str, NicheConfig],
+    *,
+    now: datetime | None = None,
+    comments_required: int | None = None,
+    interval_hours: int | None = None,
+) -> tuple[list[dict], list[Transition]]:
+    """Build warmup rows and stage transitions for qualified contacts.
+
+    Each contact gets its niche's warmup_comments_before_dm comments,
+    warmup_interval_hours apart (explicit arguments override the niche).
+    Contacts needing no warmup — the niche asks for none, or the platform
+    has no comment service — go straight to ready_for_dm.
+    """
+    now = now or datetime.now(timezone.utc)
+    default = NicheConfig(niche_id="", name="", platforms=[], keywords=[])
+    rows: list[dict] = []
+    transitions: list[Transition] = []
+
+    for contact in contacts:
+        platform = contact.get("platform", "")
+        niche = niches.get(contact.get("niche_id") or "", default)
+        count = niche.warmup_comments_before_dm if comments_required is None else comments_required
+        interval = timedelta(
+            hours=niche.warmup_interval_hours if interval_hours is None else interval_hours
+        )
+        if service_port(platform, "comment") is None:
+            count = 0
+
+        if count <= 0:
+            transitions.append(Transition(
+                contact["id"], "qualified", "ready_for_dm",
+                metadata={"comments_scheduled": 0, "platform": platform},
+            ))
+            continue
+
+        rows.extend(
+            {
+                "contact_id": contact["id"],
+                "platform": platform,
+                "post_url": "",  # Will be filled by content scanner
+                "comment_text": "",  # Will be generated by Claude
+                "scheduled_at": (now + interval * (i + 1)).isoformat(),
+            }
+            for i in range(count)
+        )
+        transitions.append(Transition(
+            contact["id"], "qualified", "warming",
+            metadata={"comments_scheduled": count, "platform": platform},
+        ))
+
+    return rows, transitions
+
+
 async def schedule_warmups(
     client: httpx.AsyncClient,
     *,
-    comments_required: int = 3,
-    interval_hours: int = 24,
+    batch_size: int = 20,
+    comments_required: int | None = None,
+    interval_hours: int | None = None,
+    niches: dict[str, NicheConfig] | None = None,
     dry_run: bool = False,
 ) -> dict:
-    """Create warmup comment schedules for qualified contacts."""
-    contacts = await get_contacts_by_stage(client, "qualified", limit=20)
-    scheduled = 0
+    """Plan warmups for a batch of qualified contacts.
 
-    for contact in contacts:
-        contact_id = contact["id"]
-        platform = contact.get("platform", "")
-        if platform not in SAFARI_PORTS or "comments" not in SAFARI_PORTS.get(platform, {}):
-            continue
+    The contacts move in one bulk transition first, then schedule rows
+    for those that actually moved go out in one array POST, so a contact
+    another worker moved meanwhile gets no orphan warmups. `niches` maps
+    niche_id → NicheConfig; it is loaded from acq_niche_configs when not
+    given.
+    """
+    contacts = await get_contacts_by_stage(client, "qualified", limit=batch_size)
+    if not contacts:
+        return {"contacts_scheduled": 0, "contacts_ready": 0, "comments_scheduled": 0, "total_qualified": 0}
+    if niches is None:
+        niches = {row["niche_id"]: NicheConfig.from_row(row) for row in await get_active_niches(client)}
 
-        now = datetime.now(timezone.utc)
-        for i in range(comments_required):
-            scheduled_at = now + timedelta(hours=interval_hours * (i + 1))
-            if not dry_run:
-                await create_warmup_schedule(
-                    client,
-                    contact_id=contact_id,
-                    platform=platform,
-                    post_url="",  # Will be filled by content scanner
-                    comment_text="",  # Will be generated by Claude
-                    scheduled_at=scheduled_at.isoformat(),
-                )
-
-        if not dry_run:
-            validate_transition("qualified", "warming")
-            await update_contact_stage(client, contact_id, "warming")
-            await log_funnel_event(
-                client,
-                contact_id=contact_id,
-                from_stage="qualified",
-                to_stage="warming",
-                triggered_by="warmup_agent",
-                metadata={"comments_scheduled": comments_required},
-            )
-        scheduled += 1
+    rows, transitions = plan_warmups(
+        contacts, niches,
+        comments_required=comments_required,
+        interval_hours=interval_hours,
+    )
+    results = await apply_transitions(
+        client, transitions, triggered_by="warmup_agent", dry_run=dry_run
+    )
+    moved = [r for r in results if r["status"] in ("applied", "dry_run")]
+    warming = {r["contact_id"] for r in moved if r["to_stage"] == "warming"}
+    rows = [row for row in rows if row["contact_id"] in warming]
+    if not dry_run:
+        await create_warmup_schedules(client, rows)
 
-    return {"contacts_scheduled": scheduled, "total_qualified": len(contacts)}
+    return {
+        "contacts_scheduled": sum(1 for r in moved if r["to_stage"] == "warming"),
+        "contacts_ready": sum(1 for r in moved if r["to_stage"] == "ready_for_dm"),
+        "comments_scheduled": len(rows),
+        "total_qualified": len(contacts),
+    }
 
 
 async def execute_warmups(
     client: httpx.AsyncClient,
     *,
     dry_run: bool = False,
+    pacer: PacingScheduler | None = None,
+    ledger: CapLedger | None = None,
+    page_size: int = 100,
+    max_warmups: int = 1000,
 ) -> dict:
-    """Execute due warmup comments via Safari comment services."""
-    warmups = await get_pending_warmups(client, limit=10)
+    """Execute due warmup comments via Safari comment services.
+
+    Due warmups are read in keyset pages (up to max_warmups) and sharded
+    per comment service: serial within a platform's browser, concurrent
+    across platforms, so a slow service only delays its own queue. Caps
+    are reserved against a CapLedger loaded once per run. With a pacer,
+    each comment waits for its platform's timetable slot and is re-read
+    afterwards, so rows sent or failed meanwhile are skipped.
+    """
+    warmups: list[dict] = []
+    after: tuple[str, str] | None = None
+    while len(warmups) < max_warmups:
+        page = await get_pending_warmups(
+            client, limit=min(page_size, max_warmups - len(warmups)), after=after
+        )
+        warmups += page
+        if len(page) < page_size:
+            break
+        after = (page[-1]["scheduled_at"], page[-1]["id"])
+
+    if ledger is None:
+        ledger = await CapLedger.load(client)
     sent = 0
     failed = 0
+    errors: list[str] = []
+    stopped: set[str] = set()
 
-    for warmup in warmups:
+    async def send_one(warmup: dict, port: int):
+        nonlocal sent, failed
         platform = warmup["platform"]
-        allowed, current, limit = await check_cap(client, platform, "comment")
+        if platform in stopped:
+            return
+
+        allowed, current, limit = ledger.reserve(platform, "comment")
         if not allowed:
             logger.info(f"[warmup] Daily cap reached for {platform} comments ({current}/{limit})")
-            continue
+            stopped.add(platform)
+            return
+
+        if pacer:
+            if not await pacer.wait_turn(platform, "comment", current):
+                logger.info(f"[warmup] No {platform} comment slot left this cycle")
+                ledger.release(platform, "comment")
+                stopped.add(platform)
+                return
+            # The row was read before a wait that can span the cycle
+            rows = await get_warmups_by_ids(client, [warmup["id"]], select="id,status")
+            if not rows or rows[0].get("status") != "pending":
+                ledger.release(platform, "comment")
+                return
 
         if dry_run:
             logger.info(f"[dry-run] Would send warmup comment: {warmup['id']}")
             sent += 1
-            continue
+            return
 
         try:
-            port = SAFARI_PORTS.get(platform, {}).get("comments")
-            if not port:
-                await mark_warmup_failed(client, warmup["id"], "No comment service for platform")
-                failed += 1
-                continue
-
             resp = await client.post(
                 f"http://localhost:{port}/api/comment",
                 json={
@@ -109,13 +204,67 @@ async def execute_warmups(
                 timeout=30.0,
             )
             resp.raise_for_status()
-            await mark_warmup_sent(client, warmup["id"])
-            await increment_cap(client, platform, "comment")
-            sent += 1
-
         except Exception as e:
             logger.error(f"[warmup] Failed to send comment: {e}")
+            ledger.release(platform, "comment")
             await mark_warmup_failed(client, warmup["id"], str(e))
             failed += 1
+            return
+
+        # The comment is posted: count it against the cap before the rest
+        # of the bookkeeping, which may fail on its own. An uncommitted
+        # reservation still holds the slot for the rest of this run.
+        sent += 1
+        try:
+            await ledger.commit(client, platform, "comment")
+        except Exception as e:
+            logger.error(f"[warmup] Failed to count {platform} comment against the cap: {e}")
+            errors.append(f"{warmup['id']}: cap not recorded: {e}")
+        try:
+            await _record_sent(client, warmup)
+        except Exception as e:
+            logger.error(f"[warmup] Comment posted but not recorded for {warmup['id']}: {e}")
+            errors.append(f"{warmup['id']}: send not recorded: {e}")
+
+    jobs = []
+    pool = get_worker_pool()
+    for warmup in warmups:
+        if not warmup.get("post_url") or not warmup.get("comment_text"):
+            # Not filled by the content scanner yet
+            continue
+        platform = warmup["platform"]
+        port = service_port(platform, "comment")
+        if not port:
+            if not dry_run:
+                await mark_warmup_failed(client, warmup["id"], "No comment service for platform")
+            failed += 1
+            continue
+        jobs.append(pool.submit(
+            platform, "comment", lambda w=warmup, p=port: send_one(w, p)
+        ))
+
+    for outcome in await asyncio.gather(*jobs, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            logger.error(f"[warmup] Worker error: {outcome}")
+            errors.append(str(outcome))
+
+    return {"sent": sent, "failed": failed, "total_due": len(warmups), "errors": errors}
+
+
+async def _record_sent(client: httpx.AsyncClient, warmup: dict):
+    """Mark sent and count it toward the contact's promotion threshold.
 
-    return {"sent": sent, "failed": failed, "total_due": len(warmups)}
+    Promotion needs migration 008 (the RPC and the counter column it
+    bumps); without it the warmup is only marked sent.
+    """
+    try:
+        await record_warmup_sent(client, warmup["id"])
+        return
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+    logger.error(
+        "[warmup] acq_record_warmup_sent RPC missing: apply migration 008, "
+        "sent warmups are not counted toward promotion"
+    )
+    await mark_warmup_sent(client, warmup["id"])
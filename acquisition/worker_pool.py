@@ -0,0 +1,152 @@
+"""Per-service worker queues for the Safari automation services.
+
+Each Safari service drives a single browser and can only perform one
+action at a time. Work is sharded into one queue per (platform, service)
+with a single worker, so different services run in parallel while each
+browser still sees strictly serial actions.
+
+Agents share the process-wide pool from get_worker_pool(), so phases
+running concurrently (the API can run several jobs at once) still queue
+behind each other on the same browser instead of each getting their own
+worker for it.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from .config import SAFARI_PORTS
+
+logger = logging.getLogger(__name__)
+
+# Cap/action names → service names in SAFARI_PORTS
+ACTION_SERVICES = {
+    "dm": "dm",
+    "inbox": "dm",
+    "connection_request": "dm",
+    "comment": "comments",
+    "comments": "comments",
+}
+
+
+def service_key(platform: str, action: str) -> tuple[str, str]:
+    """Return the (platform, service) key that owns a browser for an action."""
+    return platform, ACTION_SERVICES.get(action, action)
+
+
+def service_port(platform: str, action: str) -> int | None:
+    """Return the Safari service port for a platform/action, if any."""
+    _, service = service_key(platform, action)
+    return SAFARI_PORTS.get(platform, {}).get(service)
+
+
+class ServiceWorkerPool:
+    """One concurrency-1 worker queue per Safari service.
+
+    Usage:
+        pool = get_worker_pool()
+        futures = [pool.submit(p, "dm", job) for p, job in work]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+
+    Cancelling a job's future cancels the job, queued or running, so a
+    caller that stops waiting takes its work off the browser. Used as a
+    context manager, leaving it waits for every queue to drain.
+    """
+
+    def __init__(self):
+        self._queues: dict[tuple[str, str], asyncio.Queue] = {}
+        self._workers: dict[tuple[str, str], asyncio.Task] = {}
+
+    def submit(
+        self,
+        platform: str,
+        action: str,
+        job: Callable[[], Awaitable[Any]],
+    ) -> asyncio.Future:
+        """Queue a job on the service for platform/action.
+
+        Returns a future resolved with the job's result (or exception).
+        """
+        key = service_key(platform, action)
+        loop = asyncio.get_running_loop()
+        queue, worker = self._queues.get(key), self._workers.get(key)
+        # A worker from an earlier event loop (asyncio.run per CLI call) is gone
+        if queue is None or worker.done() or worker.get_loop() is not loop:
+            queue = self._queues[key] = asyncio.Queue()
+            self._workers[key] = asyncio.create_task(self._worker(key, queue))
+        future = loop.create_future()
+        queue.put_nowait((job, future))
+        return future
+
+    @property
+    def services(self) -> list[tuple[str, str]]:
+        return list(self._queues)
+
+    def depth(self) -> dict[str, int]:
+        """Pending jobs per service, keyed "platform/service"."""
+        return {f"{p}/{s}": q.qsize() for (p, s), q in self._queues.items()}
+
+    async def join(self):
+        """Wait until every service queue has drained."""
+        await asyncio.gather(*(q.join() for q in self._queues.values()))
+
+    async def close(self):
+        """Cancel all workers. Jobs still queued are cancelled."""
+        for queue in self._queues.values():
+            while not queue.empty():
+                _, future = queue.get_nowait()
+                future.cancel()
+                queue.task_done()
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._queues.clear()
+        self._workers.clear()
+
+    async def __aenter__(self) -> "ServiceWorkerPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await self.join()
+        finally:
+            await self.close()
+
+    async def _worker(self, key: tuple[str, str], queue: asyncio.Queue):
+        while True:
+            job, future = await queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                try:
+                    task = asyncio.ensure_future(job())
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                future.add_done_callback(lambda f, t=task: t.cancel() if f.cancelled() else None)
+                try:
+                    await asyncio.wait([task])
+                except BaseException:
+                    # The pool is closing: no waiter may be left hanging
+                    task.cancel()
+                    future.cancel()
+                    raise
+                if future.done():
+                    continue
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    logger.debug(f"[pool] {key[0]}/{key[1]} job failed: {task.exception()}")
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result())
+            finally:
+                queue.task_done()
+
+
+_worker_pool = ServiceWorkerPool()
+
+
+def get_worker_pool() -> ServiceWorkerPool:
+    return _worker_pool